@@ -20,13 +20,16 @@ import math
 import random
 import re
 import statistics
+import sqlite3
 import sys
+import threading
 import time
 import urllib.error
 import urllib.parse
 import urllib.request
 import xml.etree.ElementTree as ET
-from collections import Counter
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Iterator, Optional
@@ -40,47 +43,104 @@ VERSION = "1.1.1"
 # ---------------------------------------------------------------------------
 
 NCBI_INTERVAL     = 0.34    # ≤3 req/s without an API key
+NCBI_KEY_INTERVAL = 0.10    # ≤10 req/s with an API key
 UNIPROT_INTERVAL  = 0.10
 ENSEMBL_INTERVAL  = 0.15    # conservative; Ensembl REST allows ~6-7 req/s unauthenticated
 INTERPRO_INTERVAL = 0.20    # EBI servers: ~5 req/s to be safe
 PDB_INTERVAL      = 0.10    # RCSB is generous; 10 req/s is well within limits
 
-_last_ncbi_request:     float = 0.0
-_last_uniprot_request:  float = 0.0
-_last_ensembl_request:  float = 0.0
-_last_interpro_request: float = 0.0
-_last_pdb_request:      float = 0.0
-
 # Default HTTP retry settings (overridden by --retries)
 HTTP_RETRIES: int = 3
-HTTP_BACKOFF: float = 1.0   # initial sleep seconds; doubles on each retry
+HTTP_BACKOFF: float = 1.0   # initial sleep seconds; doubles (±50 % jitter) on each retry
+
+# Private RNG for retry jitter so --seed sampling stays reproducible
+_jitter_rng = random.Random()
+
+
+class TokenBucket:
+    """Thread-safe token-bucket rate limiter.
+
+    Refills at ``1 / interval`` tokens per second up to *capacity*.  The
+    default capacity of one token spaces requests evenly, which is what the
+    per-second limits of the public REST APIs ask for.  A caller that finds
+    the bucket empty reserves the next token under the lock and sleeps
+    outside it, so concurrent callers queue up in arrival order.
+    """
+
+    def __init__(self, interval: float, capacity: float = 1.0) -> None:
+        self.interval = interval
+        self.capacity = capacity
+        self._tokens = capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._stamp) / self.interval)
+            self._stamp = now
+            self._tokens -= 1.0
+            wait = -self._tokens * self.interval
+        if wait > 0:
+            time.sleep(wait)
 
 
-def _throttle(interval: float, last_t: float) -> float:
-    """Sleep if the required interval has not yet elapsed; return the new timestamp."""
-    wait = interval - (time.monotonic() - last_t)
-    if wait > 0:
-        time.sleep(wait)
-    return time.monotonic()
+_limiters: dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def _throttle(host: str) -> None:
+    """Block until *host* ("ncbi", "uniprot", …) may receive another request.
+
+    Each database host has its own bucket, created on first use from the
+    current ``*_INTERVAL`` setting, so lookups against different hosts never
+    wait on each other.
+    """
+    bucket = _limiters.get(host)
+    if bucket is None:
+        interval = {
+            "ncbi": NCBI_INTERVAL,
+            "uniprot": UNIPROT_INTERVAL,
+            "ensembl": ENSEMBL_INTERVAL,
+            "interpro": INTERPRO_INTERVAL,
+            "pdb": PDB_INTERVAL,
+        }[host]
+        with _limiters_lock:
+            bucket = _limiters.setdefault(host, TokenBucket(interval))
+    bucket.acquire()
+
+
+def _backoff(attempt: int) -> float:
+    """Return the jittered back-off delay before retry number *attempt* + 1."""
+    return HTTP_BACKOFF * (2 ** attempt) * _jitter_rng.uniform(0.5, 1.5)
 
 
 def _get(url: str, timeout: int = 30) -> str:
-    """Fetch *url* with automatic retry on transient errors.
+    """Fetch *url* and return the decoded body (see ``_fetch`` for retries)."""
+    return _fetch(url, lambda resp: resp.read().decode("utf-8"), timeout)
+
+
+def _fetch(url: str, consume, timeout: int = 30, data: Optional[bytes] = None):
+    """Open *url* and return ``consume(response)``, retrying transient errors.
 
     Retries up to ``HTTP_RETRIES`` times with exponential back-off starting at
     ``HTTP_BACKOFF`` seconds.  HTTP 429 / 5xx and network errors are retried;
-    HTTP 4xx (except 429) are raised immediately as non-retryable.
+    HTTP 4xx (except 429) are raised immediately as non-retryable.  *consume*
+    runs inside the retry loop, so a connection dropped mid-body is retried
+    as a whole.  Passing *data* sends a form-encoded POST instead of a GET.
     """
     headers = {"User-Agent": f"fasta_relabel/{VERSION} (bioinformatics tool)"}
     last_exc: Exception = RuntimeError("no attempts made")
     for attempt in range(max(HTTP_RETRIES, 1)):
         try:
-            req = urllib.request.Request(url, headers=headers)
+            req = urllib.request.Request(url, data=data, headers=headers)
             with urllib.request.urlopen(req, timeout=timeout) as resp:
-                return resp.read().decode("utf-8")
+                return consume(resp)
         except urllib.error.HTTPError as exc:
             if exc.code in (429, 500, 502, 503, 504) and attempt < HTTP_RETRIES - 1:
-                wait = HTTP_BACKOFF * (2 ** attempt)
+                wait = _backoff(attempt)
                 # Honour Retry-After header when the server supplies one
                 retry_after = exc.headers.get("Retry-After", "")
                 try:
@@ -93,7 +153,7 @@ def _get(url: str, timeout: int = 30) -> str:
             raise
         except (urllib.error.URLError, OSError, TimeoutError) as exc:
             if attempt < HTTP_RETRIES - 1:
-                time.sleep(HTTP_BACKOFF * (2 ** attempt))
+                time.sleep(_backoff(attempt))
                 last_exc = exc
                 continue
             raise
@@ -618,11 +678,46 @@ def _is_empty_info(info: dict) -> bool:
 # UniProt query
 # ---------------------------------------------------------------------------
 
+UNIPROT_REST = "https://rest.uniprot.org/uniprotkb"
+UNIPROT_BATCH_SIZE = 500    # accessions per batched stream query
+
+
 def _query_uniprot(accession: str, nucl_type: str) -> dict:
-    global _last_uniprot_request
-    _last_uniprot_request = _throttle(UNIPROT_INTERVAL, _last_uniprot_request)
-    data = json.loads(_get(f"https://rest.uniprot.org/uniprotkb/{accession}.json"))
+    _throttle("uniprot")
+    data = json.loads(_get(f"{UNIPROT_REST}/{accession}.json"))
+    return _uniprot_info(data, accession, nucl_type)
+
 
+def _query_uniprot_batch(accessions: list[str], nucl_type: str) -> Iterator[tuple[str, dict]]:
+    """Look up many UniProt accessions with one stream query per chunk.
+
+    Accessions are grouped ``UNIPROT_BATCH_SIZE`` at a time into an
+    ``accession:(A OR B …)`` query against the ``/stream`` endpoint.  Yields
+    ``(accession, info)`` for every requested accession found among the
+    returned entries (by primary or secondary accession); misses are simply
+    not yielded so the caller can fall back to single lookups.
+    """
+    wanted = list(dict.fromkeys(accessions))
+    found: set[str] = set()
+    for start in range(0, len(wanted), max(UNIPROT_BATCH_SIZE, 1)):
+        chunk = wanted[start:start + max(UNIPROT_BATCH_SIZE, 1)]
+        chunk_set = set(chunk)
+        query = "accession:(" + " OR ".join(chunk) + ")"
+        _throttle("uniprot")
+        body = _get(
+            f"{UNIPROT_REST}/stream?"
+            + urllib.parse.urlencode({"query": query, "format": "json"}),
+            timeout=120,
+        )
+        for data in json.loads(body).get("results") or []:
+            for acc in [data.get("primaryAccession", "")] + (data.get("secondaryAccessions") or []):
+                if acc in chunk_set and acc not in found:
+                    found.add(acc)
+                    yield acc, _uniprot_info(data, acc, nucl_type)
+
+
+def _uniprot_info(data: dict, accession: str, nucl_type: str) -> dict:
+    """Convert one UniProtKB JSON entry into an info dict for *accession*."""
     result = _empty_info(accession, data.get("uniProtkbId", accession))
 
     # Protein name
@@ -709,38 +804,148 @@ def _query_uniprot(accession: str, nucl_type: str) -> dict:
 # NCBI query
 # ---------------------------------------------------------------------------
 
+NCBI_EUTILS = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+NCBI_EPOST_SIZE = 10_000    # ids per epost (history-server upload)
+NCBI_FETCH_PAGE = 500       # records per efetch page from the history server
+
+
+def _ncbi_params(email: Optional[str], api_key: Optional[str], **params) -> dict:
+    if email:
+        params["email"] = email
+    if api_key:
+        params["api_key"] = api_key
+    return params
+
+
 def _query_ncbi(
     accession: str,
     email: Optional[str],
     api_key: Optional[str],
 ) -> dict:
-    global _last_ncbi_request
-    _last_ncbi_request = _throttle(NCBI_INTERVAL, _last_ncbi_request)
-    params: dict = {"db": "protein", "id": accession, "rettype": "gb", "retmode": "xml"}
-    if email:
-        params["email"] = email
-    if api_key:
-        params["api_key"] = api_key
-    url = (
-        "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi?"
-        + urllib.parse.urlencode(params)
+    _throttle("ncbi")
+    params = _ncbi_params(
+        email, api_key, db="protein", id=accession, rettype="gb", retmode="xml"
     )
+    url = f"{NCBI_EUTILS}/efetch.fcgi?" + urllib.parse.urlencode(params)
     return _parse_ncbi_xml(_get(url), accession)
 
 
+def _ncbi_epost(ids: list[str], email: Optional[str], api_key: Optional[str]) -> tuple[str, str]:
+    """Upload *ids* to the Entrez history server; return ``(WebEnv, query_key)``."""
+    _throttle("ncbi")
+    form = urllib.parse.urlencode(
+        _ncbi_params(email, api_key, db="protein", id=",".join(ids))
+    ).encode("ascii")
+    root = ET.fromstring(_fetch(f"{NCBI_EUTILS}/epost.fcgi", lambda r: r.read(), data=form))
+    webenv = root.findtext("WebEnv") or ""
+    query_key = root.findtext("QueryKey") or ""
+    if not webenv or not query_key:
+        raise RuntimeError(f"epost failed: {root.findtext('ERROR') or 'no WebEnv returned'}")
+    return webenv, query_key
+
+
+def _iter_gbseq(source) -> Iterator[ET.Element]:
+    """Yield each ``GBSeq`` element of a GBSet document as soon as it is complete.
+
+    Finished records are cleared from the tree once the caller resumes, so
+    memory stays flat however many records the stream holds.
+    """
+    root: Optional[ET.Element] = None
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if root is None:
+            root = elem
+        elif event == "end" and elem.tag == "GBSeq":
+            yield elem
+            root.clear()
+
+
+def _gbseq_ids(gbseq: ET.Element) -> set[str]:
+    """Return every identifier a GBSeq record answers to.
+
+    That is the versioned and version-less accession plus the ids listed in
+    ``GBSeq_other-seqids`` (``gi|123``, ``ref|NP_000509.1|``, …).
+    """
+    ids = {
+        gbseq.findtext("GBSeq_accession-version") or "",
+        gbseq.findtext("GBSeq_primary-accession") or "",
+    }
+    for seqid in gbseq.iterfind("GBSeq_other-seqids/GBSeqid"):
+        parts = (seqid.text or "").split("|")
+        if len(parts) > 1:
+            ids.add(parts[1])
+    ids.discard("")
+    return ids
+
+
+def _query_ncbi_batch(
+    accessions: list[str],
+    email: Optional[str],
+    api_key: Optional[str],
+) -> Iterator[tuple[str, dict]]:
+    """Look up many NCBI protein accessions through the Entrez history server.
+
+    Ids are uploaded ``NCBI_EPOST_SIZE`` at a time with epost, then fetched
+    back as GenBank XML in pages of ``NCBI_FETCH_PAGE`` and parsed
+    incrementally.  Records are mapped back to the requested ids through
+    ``_gbseq_ids``, so ``NP_000509``, ``NP_000509.1`` and its GI all resolve
+    to the same record.  Yields ``(accession, info)``; misses are not yielded.
+    """
+    wanted = list(dict.fromkeys(accessions))
+    for start in range(0, len(wanted), NCBI_EPOST_SIZE):
+        chunk = wanted[start:start + NCBI_EPOST_SIZE]
+        chunk_set = set(chunk)
+        webenv, query_key = _ncbi_epost(chunk, email, api_key)
+
+        def _parse_page(resp) -> list[tuple[str, dict]]:
+            page: list[tuple[str, dict]] = []
+            for gbseq in _iter_gbseq(resp):
+                matched = sorted(_gbseq_ids(gbseq) & chunk_set)
+                if matched:
+                    info = _gbseq_info(gbseq, matched[0])
+                    page.append((matched[0], info))
+                    for acc in matched[1:]:
+                        page.append((acc, _copy_info(info, acc)))
+            return page
+
+        page_size = max(NCBI_FETCH_PAGE, 1)
+        for retstart in range(0, len(chunk), page_size):
+            _throttle("ncbi")
+            url = f"{NCBI_EUTILS}/efetch.fcgi?" + urllib.parse.urlencode(_ncbi_params(
+                email, api_key, db="protein", WebEnv=webenv, query_key=query_key,
+                retstart=retstart, retmax=page_size, rettype="gb", retmode="xml",
+            ))
+            try:
+                page = _fetch(url, _parse_page, timeout=120)
+            except ET.ParseError:
+                continue    # empty or non-XML page; its ids fall back to single lookups
+            yield from page
+
+
+def _copy_info(info: dict, accession: str) -> dict:
+    """Return a copy of *info* for *accession* that shares no mutable lists."""
+    out = {k: list(v) if isinstance(v, list) else v for k, v in info.items()}
+    out["id"] = accession
+    return out
+
+
 def _parse_ncbi_xml(xml_text: str, accession: str) -> dict:
-    result = _empty_info(accession)
-    _ncbi_ec_seen:   set[str] = set()
-    _ncbi_go_seen:   set[str] = set()
-    _ncbi_pfam_seen: set[str] = set()
     try:
         root = ET.fromstring(xml_text)
     except ET.ParseError:
-        return result
+        return _empty_info(accession)
 
     gbseq = root.find(".//GBSeq")
     if gbseq is None:
-        return result
+        return _empty_info(accession)
+    return _gbseq_info(gbseq, accession)
+
+
+def _gbseq_info(gbseq: ET.Element, accession: str) -> dict:
+    """Convert one GenBank XML ``GBSeq`` element into an info dict for *accession*."""
+    result = _empty_info(accession)
+    _ncbi_ec_seen:   set[str] = set()
+    _ncbi_go_seen:   set[str] = set()
+    _ncbi_pfam_seen: set[str] = set()
 
     av = gbseq.findtext("GBSeq_accession-version")
     if av:
@@ -831,8 +1036,7 @@ def _ensembl_lookup(eid: str) -> dict:
     """Fetch one Ensembl /lookup/id call; results are cached by ID."""
     if eid in _ensembl_obj_cache:
         return _ensembl_obj_cache[eid]
-    global _last_ensembl_request
-    _last_ensembl_request = _throttle(ENSEMBL_INTERVAL, _last_ensembl_request)
+    _throttle("ensembl")
     url = (
         f"https://rest.ensembl.org/lookup/id/{urllib.parse.quote(eid)}"
         "?expand=0&content-type=application/json"
@@ -853,8 +1057,7 @@ def _ensembl_taxonomy(species: str) -> tuple[str, str]:
     sci_name = species.replace("_", " ").capitalize()
     taxid = lineage = ""
     try:
-        global _last_ensembl_request
-        _last_ensembl_request = _throttle(ENSEMBL_INTERVAL, _last_ensembl_request)
+        _throttle("ensembl")
         nodes = json.loads(
             _get(
                 f"https://rest.ensembl.org/taxonomy/name/{urllib.parse.quote(sci_name)}"
@@ -864,7 +1067,7 @@ def _ensembl_taxonomy(species: str) -> tuple[str, str]:
         if nodes:
             taxid = str(nodes[0].get("id", ""))
         if taxid:
-            _last_ensembl_request = _throttle(ENSEMBL_INTERVAL, _last_ensembl_request)
+            _throttle("ensembl")
             cls = json.loads(
                 _get(
                     f"https://rest.ensembl.org/taxonomy/classification/{taxid}"
@@ -889,8 +1092,7 @@ def _query_ensembl(accession: str) -> dict:
     the gene description and display name are always populated regardless of
     which Ensembl ID type is supplied.
     """
-    global _last_ensembl_request
-    _last_ensembl_request = _throttle(ENSEMBL_INTERVAL, _last_ensembl_request)
+    _throttle("ensembl")
 
     data = _ensembl_lookup(accession)
     obj_type = data.get("object_type", "")
@@ -926,7 +1128,7 @@ def _query_ensembl(accession: str) -> dict:
 
     # GO terms via /xrefs/id endpoint (best-effort; silently skipped on error)
     try:
-        _last_ensembl_request = _throttle(ENSEMBL_INTERVAL, _last_ensembl_request)
+        _throttle("ensembl")
         xrefs = json.loads(_get(
             f"https://rest.ensembl.org/xrefs/id/{urllib.parse.quote(accession)}"
             "?content-type=application/json"
@@ -971,8 +1173,7 @@ def _query_interpro(accession: str) -> dict:
     individual sequences, so organism / lineage fields are left empty.
     The entry type (e.g. ``Domain``, ``Family``) is appended to the name.
     """
-    global _last_interpro_request
-    _last_interpro_request = _throttle(INTERPRO_INTERVAL, _last_interpro_request)
+    _throttle("interpro")
     url = (
         f"https://www.ebi.ac.uk/interpro/api/entry/interpro/{accession.upper()}/"
         "?format=json"
@@ -1012,8 +1213,7 @@ def _query_pdb(accession: str) -> dict:
     used.  Organism and gene data are taken from the first source organism of
     the polymer entity.
     """
-    global _last_pdb_request
-    _last_pdb_request = _throttle(PDB_INTERVAL, _last_pdb_request)
+    _throttle("pdb")
 
     parts = accession.upper().split("_", 1)
     pdb_id = parts[0]
@@ -1069,61 +1269,315 @@ def _query_pdb(accession: str) -> dict:
 
 
 # ---------------------------------------------------------------------------
-# In-memory cache (avoid re-querying the same accession in a batch)
+# Lookup cache  (in-memory LRU layer over an optional SQLite store)
 # ---------------------------------------------------------------------------
 
-_cache: dict[str, dict] = {}
-_disk_cache_keys: set[str] = set()   # keys that came from the disk cache
-_disk_cache_hits: int = 0            # lookups served from the disk cache
+CACHE_TTL_DAYS: float = 90.0           # positive entries older than this are refetched
+CACHE_NEGATIVE_TTL_DAYS: float = 1.0   # "not found" entries expire much sooner
 
+# HTTP status codes that mean "this accession does not exist" (negative-cacheable)
+_NOT_FOUND_CODES = frozenset({400, 404, 410})
+_EMPTY_RECORD_ERROR = "database returned empty record"
+
+# A cache entry is ``(info, "")`` for a found record or ``(None, error)`` for a
+# record the database does not have.
+CacheEntry = tuple[Optional[dict], str]
 
-# ---------------------------------------------------------------------------
-# Persistent disk cache  (JSON, human-readable)
-# ---------------------------------------------------------------------------
 
-def load_disk_cache(path: Path) -> int:
-    """Merge a JSON cache file into the in-memory ``_cache``.
+class SqliteCache:
+    """Persistent lookup store backed by a single SQLite file.
 
-    Returns the number of entries loaded.  Missing or corrupted files are
-    handled gracefully — a warning is printed and the run continues without
-    cached data.
+    Rows are keyed ``db:accession:nucl_type`` and carry the JSON info dict
+    (NULL for negative entries), the error text and a fetched-at timestamp;
+    entries older than their TTL are treated as absent.  The database runs in
+    WAL mode with a generous busy timeout, so several fasta_relabel processes
+    can share one file, and an upsert never replaces a newer row with an
+    older one.  Writes are buffered and committed ``FLUSH_ROWS`` at a time.
     """
-    if not path.is_file():
-        return 0
-    try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError) as exc:
-        print(f"Warning: could not read cache file {path}: {exc}", file=sys.stderr)
-        return 0
-    if not isinstance(data, dict):
-        print(f"Warning: cache file {path} is not a JSON object; ignoring", file=sys.stderr)
-        return 0
-    count = 0
-    for key, val in data.items():
-        if key not in _cache and isinstance(val, dict):
+
+    FLUSH_ROWS = 200
+
+    def __init__(
+        self,
+        path: Path,
+        ttl_days: float = CACHE_TTL_DAYS,
+        negative_ttl_days: float = CACHE_NEGATIVE_TTL_DAYS,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl_days * 86400.0
+        self.negative_ttl = negative_ttl_days * 86400.0
+        self._lock = threading.Lock()
+        self._pending: list[tuple[str, Optional[str], str, float]] = []
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS lookups ("
+                " key TEXT PRIMARY KEY,"
+                " info TEXT,"
+                " error TEXT NOT NULL DEFAULT '',"
+                " fetched_at REAL NOT NULL)"
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._flush_locked()
+            return self._conn.execute("SELECT COUNT(*) FROM lookups").fetchone()[0]
+
+    def _fresh(self, info: Optional[str], fetched_at: float, now: float) -> bool:
+        ttl = self.ttl if info is not None else self.negative_ttl
+        return now - fetched_at < ttl
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the fresh entry stored under *key*, or ``None``."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT info, error, fetched_at FROM lookups WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or not self._fresh(row[0], row[2], time.time()):
+            return None
+        return (json.loads(row[0]) if row[0] is not None else None), row[1]
+
+    def put(self, key: str, info: Optional[dict], error: str = "", fetched_at: Optional[float] = None) -> None:
+        row = (
+            key,
+            json.dumps(info, ensure_ascii=False) if info is not None else None,
+            error,
+            time.time() if fetched_at is None else fetched_at,
+        )
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.FLUSH_ROWS:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO lookups (key, info, error, fetched_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET info = excluded.info, "
+                "error = excluded.error, fetched_at = excluded.fetched_at "
+                "WHERE excluded.fetched_at >= lookups.fetched_at",
+                self._pending,
+            )
+        self._pending.clear()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
+
+    def stats(self) -> dict:
+        """Return entry counts per database, split into fresh / stale and found / not found."""
+        now = time.time()
+        per_db: dict[str, Counter] = {}
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(
+                "SELECT substr(key, 1, instr(key, ':') - 1), info IS NOT NULL, fetched_at "
+                "FROM lookups"
+            ).fetchall()
+        for db, found, fetched_at in rows:
+            kind = "found" if found else "not_found"
+            fresh = now - fetched_at < (self.ttl if found else self.negative_ttl)
+            per_db.setdefault(db, Counter())[f"{kind}_{'fresh' if fresh else 'stale'}"] += 1
+        return {
+            "path": str(self.path),
+            "size_bytes": self.path.stat().st_size if self.path.exists() else 0,
+            "entries": len(rows),
+            "databases": {db: dict(c) for db, c in sorted(per_db.items())},
+        }
+
+    def purge_expired(self) -> int:
+        """Delete entries past their TTL and compact the file; return rows removed."""
+        now = time.time()
+        with self._lock:
+            self._flush_locked()
+            with self._conn:
+                cur = self._conn.execute(
+                    "DELETE FROM lookups WHERE "
+                    "(info IS NOT NULL AND fetched_at <= ?) OR (info IS NULL AND fetched_at <= ?)",
+                    (now - self.ttl, now - self.negative_ttl),
+                )
+            self._conn.execute("VACUUM")
+        return cur.rowcount
+
+    def export_json(self, path: Path) -> int:
+        """Write fresh found entries to *path* as a ``{key: info}`` JSON object."""
+        now = time.time()
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(
+                "SELECT key, info FROM lookups WHERE info IS NOT NULL AND fetched_at > ? "
+                "ORDER BY key",
+                (now - self.ttl,),
+            ).fetchall()
+        data = {key: json.loads(info) for key, info in rows}
+        path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+        return len(data)
+
+    def import_json(self, data: dict, fetched_at: float) -> int:
+        """Import a legacy ``{key: info}`` JSON cache; return the number of entries."""
+        count = 0
+        for key, val in data.items():
+            if not isinstance(val, dict):
+                continue
             # Normalize lineage separator from older cache entries
             if "lineage" in val and isinstance(val["lineage"], str) and ";" in val["lineage"]:
                 val["lineage"] = re.sub(r";\s*", ">", val["lineage"])
-            _cache[key] = val
-            _disk_cache_keys.add(key)
+            self.put(key, val, fetched_at=fetched_at)
             count += 1
-    return count
+        self.flush()
+        return count
 
 
-def save_disk_cache(path: Path) -> int:
-    """Write the current in-memory cache to *path* (JSON).
+class LookupCache:
+    """In-memory lookup cache with an optional LRU cap and SQLite backing store.
 
-    Existing content is replaced so the file always reflects the full merged
-    cache (pre-existing entries + new entries from this run).  Returns the
-    number of entries written.
+    ``get`` consults memory first and then the store, promoting store hits
+    into memory; ``put`` writes through to both.  With *max_entries* set the
+    memory layer evicts the least recently used entries, so a long run over
+    many files keeps a bounded footprint while the store keeps everything.
+    Safe to use from the lookup worker threads.
     """
-    try:
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(json.dumps(_cache, indent=2, ensure_ascii=False), encoding="utf-8")
-        return len(_cache)
-    except OSError as exc:
-        print(f"Warning: could not write cache file {path}: {exc}", file=sys.stderr)
-        return 0
+
+    def __init__(self, max_entries: Optional[int] = None) -> None:
+        self.max_entries = max_entries
+        self.store: Optional[SqliteCache] = None
+        self.disk_hits = 0       # lookups served from the persistent store
+        self.new_entries = 0     # entries fetched (or found missing) this run
+        self._mem: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._from_store: set[str] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._mem)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._from_store.clear()
+            self.disk_hits = self.new_entries = 0
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        self._mem[key] = entry
+        self._mem.move_to_end(key)
+        if self.max_entries:
+            while len(self._mem) > self.max_entries:
+                old, _ = self._mem.popitem(last=False)
+                self._from_store.discard(old)
+
+    def get(self, key: str, count_hit: bool = False) -> Optional[CacheEntry]:
+        """Return the cached entry for *key*, or ``None`` when it must be fetched.
+
+        *count_hit* counts a hit on a store-backed entry towards ``disk_hits``.
+        """
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                self._mem.move_to_end(key)
+                if count_hit and key in self._from_store:
+                    self.disk_hits += 1
+                return entry
+        if self.store is None:
+            return None
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        with self._lock:
+            self._remember(key, entry)
+            self._from_store.add(key)
+            if count_hit:
+                self.disk_hits += 1
+        return entry
+
+    def put(self, key: str, info: dict) -> None:
+        """Cache a found record; empty records are cached as "not found"."""
+        if _is_empty_info(info):
+            self.put_missing(key, _EMPTY_RECORD_ERROR)
+            return
+        with self._lock:
+            self._remember(key, (info, ""))
+            self.new_entries += 1
+        if self.store is not None:
+            self.store.put(key, info)
+
+    def put_missing(self, key: str, error: str) -> None:
+        """Cache a "not found" result (kept for the shorter negative TTL on disk)."""
+        with self._lock:
+            self._remember(key, (None, error))
+            self.new_entries += 1
+        if self.store is not None:
+            self.store.put(key, None, error)
+
+
+_cache = LookupCache()
+
+
+def _looks_like_json(path: Path) -> bool:
+    with open(path, "rb") as fh:
+        return fh.read(64).lstrip()[:1] == b"{"
+
+
+def open_disk_cache(
+    path: Path,
+    ttl_days: float = CACHE_TTL_DAYS,
+    negative_ttl_days: float = CACHE_NEGATIVE_TTL_DAYS,
+) -> SqliteCache:
+    """Open (or create) the SQLite cache at *path*, migrating a JSON cache first.
+
+    A legacy JSON cache file found at *path* is imported into a fresh SQLite
+    database that takes its place; the original is kept alongside as
+    ``<name>.bak``.  Imported entries are stamped with the JSON file's
+    modification time so they age out like everything else.
+    """
+    if path.is_file() and path.stat().st_size and _looks_like_json(path):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError) as exc:
+            raise ValueError(f"could not read JSON cache file {path}: {exc}") from exc
+        if not isinstance(data, dict):
+            raise ValueError(f"cache file {path} is not a JSON object")
+        tmp = path.with_name(path.name + ".sqlite.tmp")
+        tmp.unlink(missing_ok=True)
+        store = SqliteCache(tmp, ttl_days, negative_ttl_days)
+        n = store.import_json(data, fetched_at=path.stat().st_mtime)
+        store.close()
+        backup = path.with_name(path.name + ".bak")
+        path.replace(backup)
+        tmp.replace(path)
+        print(
+            f"  Cache: migrated {n} JSON entries into SQLite cache {path} "
+            f"(original kept as {backup})",
+            file=sys.stderr,
+        )
+    return SqliteCache(path, ttl_days, negative_ttl_days)
+
+
+def format_cache_stats(stats: dict) -> str:
+    """Render ``SqliteCache.stats()`` as a small text table."""
+    lines = [
+        f"Cache file : {stats['path']}",
+        f"Size       : {_fmt_int(stats['size_bytes'])} bytes",
+        f"Entries    : {_fmt_int(stats['entries'])}",
+        "",
+        f"  {'Database':<10} {'Found':>10} {'Not found':>10} {'Stale':>10}",
+        f"  {'─' * 10} {'─' * 10} {'─' * 10} {'─' * 10}",
+    ]
+    for db, c in stats["databases"].items():
+        stale = c.get("found_stale", 0) + c.get("not_found_stale", 0)
+        lines.append(
+            f"  {db:<10} {_fmt_int(c.get('found_fresh', 0)):>10} "
+            f"{_fmt_int(c.get('not_found_fresh', 0)):>10} {_fmt_int(stale):>10}"
+        )
+    return "\n".join(lines)
 
 
 def fetch_info(
@@ -1135,14 +1589,12 @@ def fetch_info(
     verbose: bool,
 ) -> tuple[Optional[dict], str]:
     """Return (info_dict_or_None, error_string)."""
-    global _disk_cache_hits
     # Include nucl_type in the cache key so changing --nucl-type always
     # produces the correct result (UniProt re-picked; NCBI unaffected).
     key = f"{db}:{accession}:{nucl_type}"
-    if key in _cache:
-        if key in _disk_cache_keys:
-            _disk_cache_hits += 1
-        return _cache[key], ""
+    cached = _cache.get(key, count_hit=True)
+    if cached is not None:
+        return cached
     try:
         if verbose:
             print(f"  [{db}] querying {accession} …", file=sys.stderr)
@@ -1156,11 +1608,13 @@ def fetch_info(
             info = _query_pdb(accession)
         else:
             info = _query_ncbi(accession, email, api_key)
-        _cache[key] = info
+        _cache.put(key, info)
         return info, ""
     except urllib.error.HTTPError as exc:
         msg = f"HTTP {exc.code} {exc.reason}"
         print(f"  Warning: {msg} for {accession}", file=sys.stderr)
+        if exc.code in _NOT_FOUND_CODES:
+            _cache.put_missing(key, msg)
         return None, msg
     except Exception as exc:  # noqa: BLE001
         msg = str(exc)
@@ -1168,6 +1622,64 @@ def fetch_info(
         return None, msg
 
 
+def _prefetch(db: str, accessions: list[str], nucl_type: str, verbose: bool, query) -> int:
+    """Fill ``_cache`` for uncached *db* accessions from the batched *query*.
+
+    *query* maps a list of accessions to an iterator of ``(accession, info)``
+    pairs.  Returns the number of entries added.  A failed batch only prints
+    a warning: whatever it did not deliver stays uncached and ``fetch_info``
+    later retries it one accession at a time, exactly as if batching were
+    disabled.
+    """
+    pending = [
+        acc for acc in dict.fromkeys(accessions)
+        if _cache.get(f"{db}:{acc}:{nucl_type}") is None
+    ]
+    if len(pending) < 2:
+        return 0
+    if verbose:
+        print(f"  [{db}] batch querying {len(pending)} accessions …", file=sys.stderr)
+    added = 0
+    try:
+        for acc, info in query(pending):
+            _cache.put(f"{db}:{acc}:{nucl_type}", info)
+            added += 1
+    except urllib.error.HTTPError as exc:
+        print(
+            f"  Warning: {db} batch query failed (HTTP {exc.code} {exc.reason}); "
+            f"falling back to single lookups",
+            file=sys.stderr,
+        )
+    except Exception as exc:  # noqa: BLE001
+        print(
+            f"  Warning: {db} batch query failed ({exc}); falling back to single lookups",
+            file=sys.stderr,
+        )
+    return added
+
+
+def prefetch_uniprot(accessions: list[str], nucl_type: str, verbose: bool) -> int:
+    """Batch-resolve UniProt *accessions* into the lookup cache."""
+    return _prefetch(
+        "uniprot", accessions, nucl_type, verbose,
+        lambda accs: _query_uniprot_batch(accs, nucl_type),
+    )
+
+
+def prefetch_ncbi(
+    accessions: list[str],
+    email: Optional[str],
+    api_key: Optional[str],
+    nucl_type: str,
+    verbose: bool,
+) -> int:
+    """Batch-resolve NCBI protein *accessions* into the lookup cache."""
+    return _prefetch(
+        "ncbi", accessions, nucl_type, verbose,
+        lambda accs: _query_ncbi_batch(accs, email, api_key),
+    )
+
+
 # ---------------------------------------------------------------------------
 # Header formatting
 # ---------------------------------------------------------------------------
@@ -2244,6 +2756,8 @@ class ProcessConfig:
     rename_map_file: Optional[Path] = None  # write old→new header TSV map
     go_enrichment_fdr: Optional[float] = None  # FDR cutoff; None = disabled
     exclude_failed: bool = False               # omit failed records from output
+    batch_size: int = UNIPROT_BATCH_SIZE       # accessions per batched lookup; ≤1 = off
+    workers: int = 4                           # concurrent lookups per database host
 
 
 # ---------------------------------------------------------------------------
@@ -2282,31 +2796,121 @@ def _build_record_result(
     )
 
 
+def _concurrent_lookups(
+    pending: list[tuple[str, str]],
+    cfg: ProcessConfig,
+    on_done,
+    stop: Optional[threading.Event] = None,
+) -> dict[tuple[str, str], tuple[Optional[dict], str]]:
+    """Run ``fetch_info`` for the ``(db, accession)`` pairs in *pending* concurrently.
+
+    Each database gets its own pool of at most ``cfg.workers`` threads, so a
+    tightly rate-limited host (NCBI without an API key) never ties up the
+    workers of another; the per-host token buckets behind ``_throttle`` keep
+    each host within its limits.  A mixed-database file therefore takes about
+    as long as its slowest host rather than the sum of all of them.
+    ``on_done(key)`` is called from the calling thread as each lookup
+    finishes.  Once *stop* is set no further lookup is submitted, the queued
+    ones are cancelled and only the results gathered so far are returned
+    (the lookups already running are allowed to finish).
+    """
+    by_db: dict[str, list[str]] = {}
+    for db, acc in pending:
+        by_db.setdefault(db, []).append(acc)
+    pools = {
+        db: ThreadPoolExecutor(max_workers=min(cfg.workers, len(accs)), thread_name_prefix=f"{db}-lookup")
+        for db, accs in by_db.items()
+    }
+    results: dict[tuple[str, str], tuple[Optional[dict], str]] = {}
+    try:
+        futures = {}
+        for db, accs in by_db.items():
+            for acc in accs:
+                if stop is not None and stop.is_set():
+                    return results
+                fut = pools[db].submit(
+                    fetch_info, acc, db, cfg.email, cfg.api_key, cfg.nucl_type, cfg.verbose
+                )
+                futures[fut] = (db, acc)
+        for fut in as_completed(futures):
+            key = futures[fut]
+            results[key] = fut.result()
+            on_done(key)
+            if stop is not None and stop.is_set():
+                break
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+    return results
+
+
 def _run_lookups(
     records: list[tuple[str, str]],
     cfg: ProcessConfig,
     bar: "ProgressBar",
 ) -> list[tuple[str, str, Optional[dict], str]]:
-    """Run DB lookups for all records, returning ``(db, accession, info, error)`` tuples."""
+    """Run DB lookups for all records, returning ``(db, accession, info, error)`` tuples.
+
+    UniProt and NCBI accessions are resolved up front in batches (see
+    ``prefetch_uniprot`` / ``prefetch_ncbi``).  The remaining uncached
+    accessions, including batch misses, are looked up once each — across
+    ``cfg.workers`` threads per database when ``cfg.workers > 1`` — and the
+    results are then assembled in input order.
+    """
+    hits = [
+        None if _is_empty_seq(seq) else detect_id(header, cfg.db, cfg.id_delimiter, cfg.id_field)
+        for header, seq in records
+    ]
+    if cfg.batch_size > 1:
+        batches = [
+            lambda: prefetch_uniprot(
+                [h[1] for h in hits if h is not None and h[0] == "uniprot"],
+                cfg.nucl_type, cfg.verbose,
+            ),
+            lambda: prefetch_ncbi(
+                [h[1] for h in hits if h is not None and h[0] == "ncbi"],
+                cfg.email, cfg.api_key, cfg.nucl_type, cfg.verbose,
+            ),
+        ]
+        if cfg.workers > 1:
+            with ThreadPoolExecutor(max_workers=len(batches)) as pool:
+                list(pool.map(lambda job: job(), batches))
+        else:
+            for job in batches:
+                job()
+
+    fetched: dict[tuple[str, str], tuple[Optional[dict], str]] = {}
+    if cfg.workers > 1:
+        counts = Counter(h for h in hits if h is not None)
+        pending = [
+            key for key in counts
+            if _cache.get(f"{key[0]}:{key[1]}:{cfg.nucl_type}") is None
+        ]
+        fetched = _concurrent_lookups(pending, cfg, lambda key: bar.update(counts[key]))
+
     out: list[tuple[str, str, Optional[dict], str]] = []
-    for header, _seq in records:
+    for (header, _seq), hit in zip(records, hits):
         if _is_empty_seq(_seq):
             first_token = _first_token(header)
             out.append(("", first_token, None, "empty sequence"))
             bar.update()
             continue
-        hit = detect_id(header, cfg.db, cfg.id_delimiter, cfg.id_field)
         if hit is None:
             first_token = _first_token(header)
             out.append(("", first_token, None, "no recognised identifier in header"))
         else:
             detected_db, accession = hit
-            info, error = fetch_info(
-                accession, detected_db, cfg.email, cfg.api_key, cfg.nucl_type, cfg.verbose
-            )
+            if hit in fetched:
+                info, error = fetched[hit]
+            else:
+                info, error = fetch_info(
+                    accession, detected_db, cfg.email, cfg.api_key, cfg.nucl_type, cfg.verbose
+                )
             if info is not None and _is_empty_info(info):
-                info, error = None, "database returned empty record"
+                info, error = None, _EMPTY_RECORD_ERROR
             out.append((detected_db, accession, info, error))
+            if hit in fetched:
+                continue    # progress already counted as the lookup finished
         bar.update()
     return out
 
@@ -2523,7 +3127,7 @@ def _process_file_streaming(
                     accession, detected_db, cfg.email, cfg.api_key, cfg.nucl_type, cfg.verbose
                 )
                 if info is not None and _is_empty_info(info):
-                    info, error = None, "database returned empty record"
+                    info, error = None, _EMPTY_RECORD_ERROR
 
             if info is None:
                 out_header = header
@@ -2730,6 +3334,14 @@ EXAMPLES
   fasta_relabel sequences.fasta --rename-map mapping.tsv
   fasta_relabel sequences.fasta --validate                    # check only, no relabeling
   fasta_relabel alignment.fasta --min-len 50 --dedupe-sequence  # alignment-aware
+  fasta_relabel sequences.fasta --cache-file lookups.sqlite
+  fasta_relabel --cache-file lookups.sqlite --cache-stats      # inspect the cache
+  fasta_relabel prefetch *.fasta --cache-file lookups.sqlite   # warm the cache
+
+PREFETCH  (fasta_relabel prefetch --help)
+  Fills --cache-file from FASTA files or plain accession lists without
+  writing any FASTA, so later relabel runs with the same cache can work
+  offline.  Interrupted runs resume where they stopped.
 
 CONFIG FILE  (--config FILE)
   Any long option can appear as a key in a TOML file.  Use underscores
@@ -2768,8 +3380,9 @@ CONFIG FILE  (--config FILE)
 
     # ── Input / output ───────────────────────────────────────────────────────
     parser.add_argument(
-        "input", nargs="+",
-        help="FASTA file(s) or directory/directories to process",
+        "input", nargs="*",
+        help="FASTA file(s) or directory/directories to process (not needed "
+             "with --cache-stats, --cache-vacuum or --cache-export)",
     )
     parser.add_argument(
         "--format", "-f",
@@ -2893,6 +3506,28 @@ CONFIG FILE  (--config FILE)
              "(429, 5xx, network failures).  Uses exponential back-off starting "
              "at 1 s (default: 3).",
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=UNIPROT_BATCH_SIZE,
+        metavar="N",
+        help="Resolve accessions N at a time before relabeling: UniProt through "
+             "the stream endpoint, NCBI through the Entrez history server "
+             "(epost, then efetch in pages of N).  Accessions missing from a "
+             "batch fall back to single lookups.  Use 0 to disable batching "
+             f"(default: {UNIPROT_BATCH_SIZE}).  Ignored with --streaming.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        metavar="N",
+        help="Run up to N lookups at once against each database host.  Every "
+             "host keeps its own rate limit, so a file mixing UniProt, NCBI, "
+             "Ensembl, … IDs finishes in about the time of its slowest host.  "
+             "Use 1 for strictly sequential lookups (default: 4).  Ignored with "
+             "--streaming.",
+    )
     # ── Sequence filters ─────────────────────────────────────────────────────
     parser.add_argument(
         "--min-len",
@@ -3124,11 +3759,55 @@ CONFIG FILE  (--config FILE)
     parser.add_argument(
         "--cache-file",
         metavar="FILE",
-        help="Path to a JSON file used to persist database lookup results across "
-             "runs.  Entries already present in the file are used without making "
-             "a network request; newly fetched entries are appended on exit.  "
-             "If the file does not exist it is created on the first run.  "
-             "Example: --cache-file ~/.fasta_relabel_cache.json",
+        help="Path to a SQLite file used to persist database lookup results "
+             "across runs (and across concurrent runs sharing the file).  Fresh "
+             "entries are used without making a network request; new results "
+             "are written as they arrive.  Created on the first run.  An "
+             "existing JSON cache from older versions is migrated "
+             "automatically (the original is kept as FILE.bak).  "
+             "Example: --cache-file ~/.fasta_relabel_cache.sqlite",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=CACHE_TTL_DAYS,
+        metavar="DAYS",
+        help="Refetch cached records older than DAYS "
+             f"(default: {CACHE_TTL_DAYS:g})",
+    )
+    parser.add_argument(
+        "--cache-negative-ttl",
+        type=float,
+        default=CACHE_NEGATIVE_TTL_DAYS,
+        metavar="DAYS",
+        help="Retry accessions the database reported as not found (HTTP "
+             "400/404/410 or an empty record) after DAYS "
+             f"(default: {CACHE_NEGATIVE_TTL_DAYS:g})",
+    )
+    parser.add_argument(
+        "--cache-memory",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Keep at most N lookup results in memory, evicting the least "
+             "recently used (default: unlimited).  With --cache-file evicted "
+             "entries are re-read from disk when needed.",
+    )
+    parser.add_argument(
+        "--cache-stats",
+        action="store_true",
+        help="Print entry counts per database for --cache-file and exit",
+    )
+    parser.add_argument(
+        "--cache-vacuum",
+        action="store_true",
+        help="Delete expired entries from --cache-file, compact it, and exit",
+    )
+    parser.add_argument(
+        "--cache-export",
+        metavar="FILE",
+        help="Write the fresh found entries of --cache-file to FILE as a JSON "
+             "object keyed db:accession:nucl_type, and exit",
     )
 
     # ── Misc ─────────────────────────────────────────────────────────────────
@@ -3351,6 +4030,308 @@ def resolve_output(
     return input_path.with_stem(input_path.stem + suffix)
 
 
+# ---------------------------------------------------------------------------
+# Prefetch subcommand  (cache warm-up, no FASTA output)
+# ---------------------------------------------------------------------------
+
+PREFETCH_MEMORY_ENTRIES = 10_000   # in-memory LRU cap; everything lands on disk anyway
+
+
+def build_prefetch_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="fasta_relabel prefetch",
+        description=(
+            "Detect accessions in FASTA files or plain accession lists and fill "
+            "the lookup cache through the batched endpoints, without writing "
+            "any FASTA output.  Already cached accessions are skipped, so an "
+            "interrupted prefetch resumes where it stopped when re-run.  Use "
+            "the same --nucl-type as the later relabel runs (it is part of the "
+            "cache key).  Exits with status 1 if some lookups failed with "
+            "transient errors; re-run to retry them."
+        ),
+    )
+    parser.add_argument(
+        "input", nargs="+",
+        help="FASTA file(s), directories, or accession lists (one ID per line; "
+             "a file whose first non-blank line does not start with '>' is "
+             "read as a list; '#' starts a comment)",
+    )
+    parser.add_argument(
+        "--cache-file", required=True, metavar="FILE",
+        help="SQLite lookup cache to fill (created if missing; JSON caches "
+             "are migrated as in the main command)",
+    )
+    parser.add_argument(
+        "--db",
+        choices=["auto", "uniprot", "ncbi", "ensembl", "interpro", "pdb"],
+        default="auto",
+        help="Database to query — auto-detects from accession format (default: auto)",
+    )
+    parser.add_argument("--id-delimiter", metavar="DELIM",
+                        help="Split headers on DELIM instead of whitespace")
+    parser.add_argument("--id-field", type=int, metavar="N",
+                        help="0-based field holding the accession")
+    parser.add_argument(
+        "--nucl-type", choices=["genomic", "mrna", "any"], default="genomic",
+        metavar="TYPE", help="Nucleotide cross-reference preference (default: genomic)",
+    )
+    parser.add_argument(
+        "--ext", default=".fasta,.fa,.fna,.faa,.ffn", metavar="EXTS",
+        help="Comma-separated extensions for directory scans "
+             "(default: .fasta,.fa,.fna,.faa,.ffn)",
+    )
+    parser.add_argument("--email", metavar="ADDR", help="E-mail for NCBI E-utilities")
+    parser.add_argument("--ncbi-api-key", metavar="KEY",
+                        help="NCBI API key (10 instead of 3 requests/second)")
+    parser.add_argument("--retries", type=int, default=3, metavar="N",
+                        help="HTTP retry attempts for transient errors (default: 3)")
+    parser.add_argument(
+        "--batch-size", type=int, default=UNIPROT_BATCH_SIZE, metavar="N",
+        help=f"Accessions per batched UniProt / NCBI request; 0 disables "
+             f"batching (default: {UNIPROT_BATCH_SIZE})",
+    )
+    parser.add_argument("--workers", type=int, default=4, metavar="N",
+                        help="Concurrent single lookups per database host (default: 4)")
+    parser.add_argument("--cache-ttl", type=float, default=CACHE_TTL_DAYS, metavar="DAYS",
+                        help=f"Refetch cached records older than DAYS (default: {CACHE_TTL_DAYS:g})")
+    parser.add_argument(
+        "--cache-negative-ttl", type=float, default=CACHE_NEGATIVE_TTL_DAYS, metavar="DAYS",
+        help=f"Retry not-found accessions after DAYS (default: {CACHE_NEGATIVE_TTL_DAYS:g})",
+    )
+    parser.add_argument("--report", metavar="FILE",
+                        help="Write the coverage report to FILE instead of stdout")
+    parser.add_argument("--no-progress", action="store_true", help="Disable the progress bar")
+    parser.add_argument("--verbose", "-v", action="store_true",
+                        help="Show per-request progress on stderr")
+    return parser
+
+
+def _prefetch_lines(path: Path) -> Iterator[str]:
+    """Yield the FASTA headers of *path*, or its lines if it is an accession list."""
+    with open(path) as fh:
+        first = next((line for line in fh if line.strip()), "")
+    if first.startswith(">"):
+        for header, _seq in parse_fasta(path):
+            yield header
+        return
+    with open(path) as fh:
+        for line in fh:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                yield line
+
+
+def run_prefetch(
+    input_files: list[Path],
+    cfg: ProcessConfig,
+    stop: Optional[threading.Event] = None,
+) -> tuple[dict[str, Counter], int]:
+    """Resolve every distinct accession in *input_files* into the lookup cache.
+
+    Accessions are deduplicated across files and grouped per database; each
+    database is worked through in ``cfg.batch_size`` chunks (batched
+    UniProt / NCBI queries first, then single lookups for the misses) in its
+    own thread, so hosts proceed side by side under their own rate limits.
+    Setting *stop* (also done on any exception, e.g. Ctrl-C) makes every
+    database cancel its queued lookups, let the running ones finish and
+    return; whatever was fetched is already in the cache, so a re-run
+    resumes from there.
+
+    Returns ``(per_db, unrecognised)`` where ``per_db[db]`` counts
+    ``accessions``, ``cached`` (already fresh before this run), ``found``,
+    ``not_found`` and ``errors``.
+    """
+    stop = stop or threading.Event()
+    keys: dict[tuple[str, str], None] = {}
+    unrecognised = 0
+    for path in input_files:
+        for text in _prefetch_lines(path):
+            hit = detect_id(text, cfg.db, cfg.id_delimiter, cfg.id_field)
+            if hit is None:
+                unrecognised += 1
+            else:
+                keys[hit] = None
+
+    per_db: dict[str, Counter] = {}
+    pending: dict[str, list[str]] = {}
+    for db, acc in keys:
+        counts = per_db.setdefault(db, Counter())
+        counts["accessions"] += 1
+        if _cache.get(f"{db}:{acc}:{cfg.nucl_type}") is not None:
+            counts["cached"] += 1
+        else:
+            pending.setdefault(db, []).append(acc)
+    n_pending = sum(len(v) for v in pending.values())
+    print(
+        f"Prefetch: {len(keys)} unique accessions in {len(input_files)} file(s); "
+        f"{len(keys) - n_pending} already cached, {n_pending} to fetch",
+        file=sys.stderr,
+    )
+
+    bar = ProgressBar(n_pending, "prefetch", enabled=cfg.show_progress and not cfg.verbose)
+    bar_lock = threading.Lock()
+
+    def advance(n: int) -> None:
+        with bar_lock:
+            bar.update(n)
+
+    def work_db(db: str, accs: list[str]) -> None:
+        step = cfg.batch_size if cfg.batch_size > 1 else UNIPROT_BATCH_SIZE
+        for start in range(0, len(accs), step):
+            if stop.is_set():
+                return
+            part = accs[start:start + step]
+            if cfg.batch_size > 1 and db == "uniprot":
+                prefetch_uniprot(part, cfg.nucl_type, cfg.verbose)
+            elif cfg.batch_size > 1 and db == "ncbi":
+                prefetch_ncbi(part, cfg.email, cfg.api_key, cfg.nucl_type, cfg.verbose)
+            misses = [acc for acc in part if _cache.get(f"{db}:{acc}:{cfg.nucl_type}") is None]
+            advance(len(part) - len(misses))
+            _concurrent_lookups(
+                [(db, acc) for acc in misses], cfg, lambda key: advance(1), stop
+            )
+
+    if pending:
+        pool = ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="prefetch")
+        try:
+            for fut in [pool.submit(work_db, db, accs) for db, accs in pending.items()]:
+                fut.result()
+        except BaseException:
+            stop.set()
+            raise
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    bar.clear()
+
+    for db, acc in keys:
+        entry = _cache.get(f"{db}:{acc}:{cfg.nucl_type}")
+        if entry is None:
+            per_db[db]["errors"] += 1
+        elif entry[0] is None:
+            per_db[db]["not_found"] += 1
+        else:
+            per_db[db]["found"] += 1
+    return per_db, unrecognised
+
+
+def format_prefetch_report(per_db: dict[str, Counter], unrecognised: int, cache_path: Path) -> str:
+    """Render the per-database coverage table printed at the end of a prefetch."""
+    cols = ("accessions", "cached", "found", "not_found", "errors")
+    lines = [
+        f"Prefetch coverage — {cache_path}",
+        "",
+        f"  {'Database':<10} {'IDs':>9} {'Cached':>9} {'Found':>9} "
+        f"{'Not found':>9} {'Errors':>9} {'Offline':>8}",
+        f"  {'─' * 10} {'─' * 9} {'─' * 9} {'─' * 9} {'─' * 9} {'─' * 9} {'─' * 8}",
+    ]
+    total: Counter = Counter()
+    rows = sorted(per_db.items())
+    for db, c in rows + [("total", total)]:
+        if db == "total":
+            if len(rows) < 2:
+                break
+            lines.append(f"  {'─' * 10} {'─' * 9} {'─' * 9} {'─' * 9} {'─' * 9} {'─' * 9} {'─' * 8}")
+        else:
+            total.update(c)
+        # Round down so a single outstanding error never shows as 100.0 %
+        offline = math.floor(
+            1000 * (c["found"] + c["not_found"]) / c["accessions"]
+        ) / 10 if c["accessions"] else 0.0
+        lines.append(
+            f"  {db:<10} " + " ".join(f"{_fmt_int(c[k]):>9}" for k in cols)
+            + f" {offline:>7.1f}%"
+        )
+    lines.append("")
+    lines.append("  Offline = share of IDs a relabel run can now resolve from the cache alone.")
+    if unrecognised:
+        lines.append(f"  {_fmt_int(unrecognised)} header(s)/line(s) had no recognised identifier.")
+    return "\n".join(lines)
+
+
+def prefetch_main(argv: list[str]) -> None:
+    parser = build_prefetch_parser()
+    args = parser.parse_args(argv)
+    _apply_network_settings(args, parser)
+
+    input_files = _collect_input_files(args.input, {e.strip() for e in args.ext.split(",")})
+    if not input_files:
+        print("Error: no input files found", file=sys.stderr)
+        sys.exit(1)
+
+    cache_path = Path(args.cache_file)
+    try:
+        _cache.store = open_disk_cache(cache_path, args.cache_ttl, args.cache_negative_ttl)
+    except (ValueError, sqlite3.Error) as exc:
+        print(f"Error: could not open cache file {cache_path}: {exc}", file=sys.stderr)
+        sys.exit(1)
+    _cache.max_entries = PREFETCH_MEMORY_ENTRIES
+
+    cfg = ProcessConfig(
+        fmt="", db=args.db, email=args.email, api_key=args.ncbi_api_key,
+        nucl_type=args.nucl_type, use_underscores=False, overwrite=False,
+        id_delimiter=args.id_delimiter, id_field=args.id_field,
+        verbose=args.verbose, dry_run=True, show_progress=not args.no_progress,
+        batch_size=args.batch_size, workers=args.workers,
+    )
+    try:
+        per_db, unrecognised = run_prefetch(input_files, cfg)
+    except KeyboardInterrupt:
+        _cache.store.close()
+        print(
+            "\nInterrupted — results so far are saved; re-run the same command to resume.",
+            file=sys.stderr,
+        )
+        sys.exit(130)
+    _cache.store.close()
+    _cache.store = None
+
+    report = format_prefetch_report(per_db, unrecognised, cache_path)
+    if args.report:
+        Path(args.report).write_text(report + "\n", encoding="utf-8")
+        print(f"Prefetch report → {args.report}", file=sys.stderr)
+    else:
+        print(report)
+    sys.exit(1 if any(c["errors"] for c in per_db.values()) else 0)
+
+
+# ---------------------------------------------------------------------------
+# Shared CLI helpers
+# ---------------------------------------------------------------------------
+
+def _apply_network_settings(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    """Validate the network / cache options and push them into the module settings."""
+    if args.batch_size < 0:
+        parser.error("--batch-size must be zero or a positive integer")
+    if args.workers < 1:
+        parser.error("--workers must be a positive integer")
+    if args.cache_ttl <= 0 or args.cache_negative_ttl <= 0:
+        parser.error("--cache-ttl and --cache-negative-ttl must be positive")
+
+    global NCBI_INTERVAL, HTTP_RETRIES, UNIPROT_BATCH_SIZE, NCBI_FETCH_PAGE
+    if args.ncbi_api_key:
+        NCBI_INTERVAL = NCBI_KEY_INTERVAL
+    _limiters.clear()   # rebuild the per-host buckets from the settled intervals
+    HTTP_RETRIES = args.retries
+    if args.batch_size > 1:
+        UNIPROT_BATCH_SIZE = NCBI_FETCH_PAGE = args.batch_size
+
+
+def _collect_input_files(raw_inputs: list[str], extensions: set[str]) -> list[Path]:
+    """Expand files and directories (scanned recursively for *extensions*); exit on a bad path."""
+    input_files: list[Path] = []
+    for raw in raw_inputs:
+        p = Path(raw)
+        if p.is_dir():
+            for ext in extensions:
+                input_files.extend(sorted(p.rglob(f"*{ext}")))
+        elif p.is_file():
+            input_files.append(p)
+        else:
+            print(f"Error: {raw!r} is not a file or directory", file=sys.stderr)
+            sys.exit(1)
+    return input_files
+
+
 def main(argv: Optional[list[str]] = None) -> None:
     # Accept single-dash convenience aliases for --help and --version
     if argv is None:
@@ -3361,6 +4342,10 @@ def main(argv: Optional[list[str]] = None) -> None:
         for a in argv
     ]
 
+    if argv and argv[0] == "prefetch":
+        prefetch_main(argv[1:])
+        return
+
     parser = build_parser()
 
     if not argv:
@@ -3393,27 +4378,38 @@ def main(argv: Optional[list[str]] = None) -> None:
     if args.in_place and args.output:
         parser.error("--in-place and --output are mutually exclusive")
 
-    if args.ncbi_api_key:
-        global NCBI_INTERVAL
-        NCBI_INTERVAL = 0.1  # ≤10 req/s with an API key
+    _apply_network_settings(args, parser)
+    if args.cache_memory is not None and args.cache_memory < 1:
+        parser.error("--cache-memory must be a positive integer")
 
-    global HTTP_RETRIES
-    HTTP_RETRIES = args.retries
+    # ── Cache maintenance commands: run and exit ─────────────────────────────
+    if args.cache_stats or args.cache_vacuum or args.cache_export:
+        if not args.cache_file:
+            parser.error("--cache-stats, --cache-vacuum and --cache-export need --cache-file")
+        try:
+            store = open_disk_cache(
+                Path(args.cache_file), args.cache_ttl, args.cache_negative_ttl
+            )
+        except (ValueError, sqlite3.Error) as exc:
+            print(f"Error: {exc}", file=sys.stderr)
+            sys.exit(1)
+        if args.cache_vacuum:
+            n_removed = store.purge_expired()
+            print(f"Cache: removed {n_removed} expired entries from {args.cache_file}")
+        if args.cache_export:
+            n_exported = store.export_json(Path(args.cache_export))
+            print(f"Cache: exported {n_exported} entries → {args.cache_export}")
+        if args.cache_stats:
+            print(format_cache_stats(store.stats()))
+        store.close()
+        sys.exit(0)
+
+    if not args.input:
+        parser.error("the following arguments are required: input")
 
     extensions = {e.strip() for e in args.ext.split(",")}
 
-    # Collect input files
-    input_files: list[Path] = []
-    for raw in args.input:
-        p = Path(raw)
-        if p.is_dir():
-            for ext in extensions:
-                input_files.extend(sorted(p.rglob(f"*{ext}")))
-        elif p.is_file():
-            input_files.append(p)
-        else:
-            print(f"Error: {raw!r} is not a file or directory", file=sys.stderr)
-            sys.exit(1)
+    input_files = _collect_input_files(args.input, extensions)
 
     if not input_files:
         print("Error: no input files found", file=sys.stderr)
@@ -3507,14 +4503,24 @@ def main(argv: Optional[list[str]] = None) -> None:
             else None
         ),
         exclude_failed=args.exclude_failed,
+        batch_size=args.batch_size,
+        workers=args.workers,
     )
 
     # ── Persistent cache: load ───────────────────────────────────────────────
     cache_path: Optional[Path] = Path(args.cache_file) if args.cache_file else None
+    _cache.max_entries = args.cache_memory
     if cache_path is not None:
-        n_loaded = load_disk_cache(cache_path)
-        if n_loaded:
-            print(f"  Cache: loaded {n_loaded} entries from {cache_path}", file=sys.stderr)
+        try:
+            _cache.store = open_disk_cache(cache_path, args.cache_ttl, args.cache_negative_ttl)
+        except (ValueError, sqlite3.Error) as exc:
+            print(
+                f"Warning: could not open cache file {cache_path}: {exc}; "
+                f"continuing without it",
+                file=sys.stderr,
+            )
+        else:
+            print(f"  Cache: {len(_cache.store)} entries in {cache_path}", file=sys.stderr)
 
     t_start = time.monotonic()
     all_results: list[RecordResult] = []
@@ -3557,12 +4563,13 @@ def main(argv: Optional[list[str]] = None) -> None:
     elapsed = time.monotonic() - t_start
 
     # ── Persistent cache: save ───────────────────────────────────────────────
-    if cache_path is not None:
-        n_saved = save_disk_cache(cache_path)
-        n_new = n_saved - len(_disk_cache_keys)
+    if _cache.store is not None:
+        n_saved = len(_cache.store)
+        _cache.store.close()
+        _cache.store = None
         print(
             f"  Cache: saved {n_saved} entries to {cache_path} "
-            f"({n_new} new, {_disk_cache_hits} hits from disk)",
+            f"({_cache.new_entries} new, {_cache.disk_hits} hits from disk)",
             file=sys.stderr,
         )
 
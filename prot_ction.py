@@ -29,6 +29,8 @@ from __future__ import annotations
 VERSION = "1.1.1"
 
 import re
+import io
+import os
 import sys
 import csv
 import json
@@ -36,16 +38,27 @@ import math
 import time
 import hashlib
 import logging
+import sqlite3
 import pathlib
 import argparse
 import tempfile
+import threading
 import statistics
-import urllib.request
-import urllib.error
-from collections import defaultdict
+import urllib.parse
+from collections import Counter, defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, NamedTuple
 from itertools import combinations
-from xml.etree import ElementTree as ET
+
+if TYPE_CHECKING:
+    from xml.etree import ElementTree as ET
+
+# Anything heavier than the standard library basics (urllib.request and the
+# http/ssl stack, ElementTree, NumPy, SciPy, matplotlib, Biopython,
+# WeasyPrint) is imported inside the functions that need it, so --help and
+# runs that only write tables start quickly.
 
 # Gap characters recognised in aligned sequences
 _GAP: frozenset[str] = frozenset("-.")
@@ -57,6 +70,19 @@ _log = logging.getLogger("prot_ction")
 # Identifier parsing
 # ---------------------------------------------------------------------------
 
+# Header patterns, compiled once: they run for every record of every file
+_UNIPROT_ID_RE   = re.compile(r"(?:sp|tr)\|([A-Z0-9]+)\|\S+")
+_GI_ID_RE        = re.compile(r"gi\|\d+\|\w+\|([A-Z_0-9.]+)\|?")
+_BARE_ACC_RE     = re.compile(r"([A-Z]{1,3}[_]?\d+\.?\d*)")
+_BRACKET_ORG_RE  = re.compile(r"\[([^\[\]]+)\]\s*$")
+_UNIPROT_HEAD_RE = re.compile(r"(?:sp|tr)\|[A-Z0-9]+\|\S+\s+")
+# A UniProt description runs up to the first of these fields; the organism
+# (OS=) up to the first of the fields after it
+_UNIPROT_FIELD_RE = re.compile(r"\s+(?:OS|OX|GN|PE|SV)=")
+_OS_END_RE        = re.compile(r"\s+(?:OX|GN|PE|SV)=")
+_WORD_CHAR_RE     = re.compile(r"\w")
+
+
 def parse_identifier(header: str) -> tuple[str, str]:
     """
     Extract accession and database type from a FASTA header line.
@@ -71,17 +97,17 @@ def parse_identifier(header: str) -> tuple[str, str]:
     header = header.lstrip(">").strip()
 
     # UniProt Swiss-Prot / TrEMBL
-    m = re.match(r"(?:sp|tr)\|([A-Z0-9]+)\|\S+", header)
+    m = _UNIPROT_ID_RE.match(header)
     if m:
         return m.group(1), "uniprot"
 
     # NCBI gi pipe format  gi|12345|ref|NP_000001.1|
-    m = re.search(r"gi\|\d+\|\w+\|([A-Z_0-9.]+)\|?", header)
+    m = _GI_ID_RE.search(header) if "gi|" in header else None
     if m:
         return m.group(1), "genbank"
 
     # Bare GenBank/RefSeq accession (e.g. NP_000001.1, XP_001234567.2, P12345)
-    m = re.match(r"([A-Z]{1,3}[_]?\d+\.?\d*)", header)
+    m = _BARE_ACC_RE.match(header)
     if m:
         return m.group(1), "genbank"
 
@@ -104,17 +130,35 @@ def _extract_org_hint(header: str) -> str:
     Returns an empty string when nothing can be found.
     """
     h = header.lstrip(">").strip()
-    # UniProt OS= field
-    m = re.search(r"\bOS=(.+?)(?:\s+OX=|\s+GN=|\s+PE=|\s+SV=|$)", h)
-    if m:
-        return m.group(1).strip()
+    # UniProt OS= field: the first "OS=" at a word start with a value
+    i = h.find("OS=")
+    while i >= 0:
+        if (i == 0 or not _WORD_CHAR_RE.match(h, i - 1)) and i + 3 < len(h):
+            end = _OS_END_RE.search(h, i + 4)
+            return h[i + 3:end.start() if end else len(h)].strip()
+        i = h.find("OS=", i + 1)
     # GenBank/RefSeq bracketed organism at (or near) end of description
-    m = re.search(r"\[([^\[\]]+)\]\s*$", h)
-    if m:
-        return m.group(1).strip()
+    if h.endswith("]"):
+        m = _BRACKET_ORG_RE.search(h)
+        if m:
+            return m.group(1).strip()
     return ""
 
 
+def _drop_trailing_bracket(text: str) -> str:
+    """
+    Remove a trailing ``[Organism name]`` group (and the whitespace before
+    it) from *text*; a ``str.rfind`` version of the regex
+    ``\\s*\\[[^\\[\\]]+\\]\\s*$``, which is slow on long descriptions.
+    """
+    t = text.rstrip()
+    if t.endswith("]"):
+        j = t.rfind("[", 0, -1)
+        if 0 <= j < len(t) - 2 and "]" not in t[j + 1:-1]:
+            return t[:j].rstrip()
+    return text
+
+
 def _extract_protein_name(header: str) -> str:
     """
     Best-effort extraction of the protein/product name from a FASTA header.
@@ -129,22 +173,39 @@ def _extract_protein_name(header: str) -> str:
     """
     h = header.lstrip(">").strip()
     # UniProt: accession block ends at first space; name runs until OS=/OX=/GN=/PE=/SV=
-    m = re.match(r"(?:sp|tr)\|[A-Z0-9]+\|\S+\s+(.*?)(?:\s+OS=|\s+OX=|\s+GN=|\s+PE=|\s+SV=|$)", h)
+    m = _UNIPROT_HEAD_RE.match(h)
     if m:
-        return m.group(1).strip()
+        end = _UNIPROT_FIELD_RE.search(h, m.end())
+        return h[m.end():end.start() if end else len(h)].strip()
     # GenBank/RefSeq: first token is accession, rest is description, remove trailing [Organism]
     parts = h.split(None, 1)
     if len(parts) < 2:
         return ""
     desc = parts[1].strip()
     # Remove trailing bracketed organism
-    desc = re.sub(r"\s*\[[^\[\]]+\]\s*$", "", desc)
-    return desc.strip()
+    return _drop_trailing_bracket(desc).strip()
+
+
+class LabelHints:
+    """
+    Protein-name votes collected from FASTA headers while a file is parsed,
+    so ``_infer_protein_label`` does not have to read the file again.
+    """
+
+    def __init__(self) -> None:
+        self.counts: dict[str, int] = {}
+
+    def add(self, header: str) -> None:
+        name = _extract_protein_name(header)
+        if name:
+            key = name.rstrip(".,; ")
+            self.counts[key] = self.counts.get(key, 0) + 1
 
 
 def _infer_protein_label(
     path: str,
     db_protein_names: "dict[str, str] | None" = None,
+    hints: "LabelHints | None" = None,
 ) -> str:
     """
     Infer a consensus/majority protein name for the sequences in *path*.
@@ -153,7 +214,8 @@ def _infer_protein_label(
     NCBI lookup) is provided and non-empty, the majority name from those
     database records is used — this is far more reliable than header parsing.
 
-    **Fallback**: parse FASTA headers for protein descriptions.
+    **Fallback**: the protein descriptions in the FASTA headers – taken from
+    *hints* when the parser collected them, otherwise by reading *path*.
 
     Returns the file stem if nothing can be determined.
     """
@@ -171,15 +233,14 @@ def _infer_protein_label(
                 return f"{best} (+{len(counts) - 1} others)"
             return best
 
-    # ── Attempt 2: parse FASTA headers ────────────────────────────────────
-    counts2: "dict[str, int]" = {}
-    with open(path) as fh:
-        for raw in fh:
-            if raw.startswith(">"):
-                name = _extract_protein_name(raw)
-                if name:
-                    key = name.rstrip(".,; ")
-                    counts2[key] = counts2.get(key, 0) + 1
+    # ── Attempt 2: FASTA header descriptions ──────────────────────────────
+    if hints is None:
+        hints = LabelHints()
+        with open_input(path, text=True) as fh:
+            for raw in fh:
+                if raw.startswith(">"):
+                    hints.add(raw)
+    counts2 = hints.counts
     if counts2:
         best = max(counts2, key=counts2.get)     # type: ignore[arg-type]
         total = sum(counts2.values())
@@ -187,10 +248,179 @@ def _infer_protein_label(
             return f"{best} (+{len(counts2) - 1} others)"
         return best
 
-    return pathlib.Path(path).stem
+    return input_stem(path)
+
+
+# Bytes read per chunk by the streaming FASTA scanner
+_FASTA_CHUNK = 1 << 24
+# A header line: '>' after optional leading whitespace (matched at the
+# start of the file, then after every newline)
+_FASTA_FIRST_HEADER = re.compile(rb"[^\S\n]*>")
+_FASTA_NEXT_HEADER  = re.compile(rb"\n[^\S\n]*>")
+
+# Compressed input is recognised by its magic bytes, whatever its name
+_COMPRESSION_MAGIC = (
+    (b"\x1f\x8b",         "gzip"),
+    (b"BZh",              "bz2"),
+    (b"\xfd7zXZ\x00",     "lzma"),
+)
+_COMPRESSION_EXTS = frozenset({".gz", ".bz2", ".xz"})
+
 
+def _compression(path: str) -> "str | None":
+    """Module that decompresses *path* (gzip, bz2, lzma), or None."""
+    with open(path, "rb") as fh:
+        head = fh.read(6)
+    for magic, module in _COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return module
+    return None
 
-def parse_fasta(path: str) -> list[tuple[str, str, str, str]]:
+
+def open_input(path: str, text: bool = False):
+    """
+    Open an input file for reading, binary unless *text*; gzip, bzip2 and
+    xz files are decompressed transparently.
+    """
+    module = _compression(path)
+    if module is None:
+        return open(path) if text else open(path, "rb")
+    import importlib
+    return importlib.import_module(module).open(path, "rt" if text else "rb")
+
+_WHITESPACE_BYTES = b" \t\r\n\v\f"
+
+
+class FaiEntry(NamedTuple):
+    """
+    One line of a samtools-style ``.fai`` index.  A NamedTuple rather than
+    a dataclass: millions of these stay invisible to the cyclic GC.
+    """
+    name: str          # first word of the header
+    length: int        # residues
+    offset: int        # byte offset of the first residue
+    linebases: int     # residues per full line
+    linewidth: int     # bytes per full line, including the line ending
+
+
+def _fai_entry(header: bytes, body: bytes, offset: int, length: int) -> FaiEntry:
+    """Index entry for one record; raises ValueError for ragged line lengths."""
+    name = header.split(None, 1)[0].decode() if header.strip() else ""
+    core = body.rstrip()                 # trailing blank lines are fine
+    if not core:
+        return FaiEntry(name, 0, offset, 0, 0)
+    nl = core.find(b"\n")
+    if nl < 0:                           # single-line record
+        crlf = body[len(core):len(core) + 2] == b"\r\n"
+        return FaiEntry(name, length, offset, len(core), len(core) + 1 + crlf)
+    width = nl + 1
+    bases = nl - 1 if core[nl - 1:nl] == b"\r" else nl
+    full  = core[:core.rfind(b"\n") + 1]         # every line but the last
+    n_full, rest = divmod(len(full), width)
+    if (rest or full[width - 1::width].count(b"\n") != n_full
+            or full.count(b"\n") != n_full
+            or len(core) - len(full) > bases):
+        raise ValueError(
+            f"cannot index record {name!r}: sequence lines have "
+            f"different lengths (a .fai index needs fixed-width lines)")
+    return FaiEntry(name, length, offset, bases, width)
+
+
+def _scan_fasta(path: str) -> "Iterator[tuple[bytes, bytearray, int]]":
+    """
+    Split a FASTA file into raw records without decoding them.
+
+    The file is read in ``_FASTA_CHUNK`` byte blocks and cut before every
+    line whose first non-blank character is ``>`` (so, as in a line-by-line
+    parser that strips each line, indented headers are recognised).
+    Yields ``(header, body, body_offset)``: the header line without its
+    ``>`` and leading whitespace, the undecoded sequence lines, and the byte
+    offset of the body in the file (in the decompressed stream for
+    compressed input).  Anything before the first header is ignored.
+    """
+    with open_input(path) as fh:
+        buf  = bytearray()
+        base = 0              # file offset of buf[0]
+        pos  = -1             # start of the current record ('>') in buf
+        scan = 0              # where the search for the next header resumes
+        while True:
+            chunk = fh.read(_FASTA_CHUNK)
+            buf  += chunk
+            if pos < 0:
+                if _FASTA_FIRST_HEADER.match(buf):
+                    pos = 0
+                else:
+                    m = _FASTA_NEXT_HEADER.search(buf)
+                    if m is None:
+                        if not chunk:
+                            return
+                        keep = max(buf.rfind(b"\n"), 0)   # may start a header
+                        base += keep
+                        del buf[:keep]
+                        continue
+                    pos = m.start() + 1
+                scan = pos
+            ends = [m.start() + 1 for m in _FASTA_NEXT_HEADER.finditer(buf, scan)]
+            if not chunk:
+                ends.append(len(buf))
+            for end in ends:
+                rec = buf[pos:end]
+                nl  = rec.find(b"\n")
+                if nl < 0:
+                    nl = len(rec)
+                gt  = rec.find(b">")
+                yield bytes(rec[gt + 1:nl]), rec[nl + 1:], base + pos + nl + 1
+                pos = end
+            if not chunk:
+                return
+            base += pos
+            del buf[:pos]
+            pos  = 0
+            # A header split across reads starts at the last newline
+            scan = max(buf.rfind(b"\n"), 0)
+
+
+def iter_fasta(
+    path: str,
+    hints: "LabelHints | None" = None,
+    index: "list[FaiEntry] | None" = None,
+) -> "Iterator[tuple[str, str, str, str]]":
+    """
+    Stream the records of a FASTA file.
+
+    Yields the same ``(accession, db_type, sequence, org_hint)`` tuples as
+    ``parse_fasta`` while holding no more than one read chunk plus the
+    current record (see ``_scan_fasta``).  Whitespace in the sequence
+    lines is dropped with one ``bytes.translate`` per record instead of
+    stripping line by line.
+
+    With *hints*, protein-name votes for ``_infer_protein_label`` are
+    collected in the same pass.  With *index*, one ``FaiEntry`` per record
+    is appended to it; a record that cannot be indexed (ragged sequence
+    lines) logs a warning and leaves *index* empty, without stopping the
+    parse.
+    """
+    for header, body, offset in _scan_fasta(path):
+        seq = body.translate(None, _WHITESPACE_BYTES)
+        if index is not None:
+            try:
+                index.append(_fai_entry(header, body, offset, len(seq)))
+            except ValueError as exc:
+                _log.warning("%s: %s", path, exc)
+                index.clear()
+                index = None
+        line = header.decode().strip()
+        if hints is not None:
+            hints.add(line)
+        acc, db = parse_identifier(line)
+        yield acc, db, seq.upper().decode(), _extract_org_hint(line)
+
+
+def parse_fasta(
+    path: str,
+    hints: "LabelHints | None" = None,
+    index: "list[FaiEntry] | None" = None,
+) -> list[tuple[str, str, str, str]]:
     """
     Parse a FASTA file.
 
@@ -198,140 +428,225 @@ def parse_fasta(path: str) -> list[tuple[str, str, str, str]]:
     *org_hint* is the organism name extracted from the header line (empty
     string when not present).
     Sequences are uppercased; ambiguous/gap characters are preserved.
+    *hints* and *index* are filled as described for ``iter_fasta``.
     """
-    records = []
-    acc = db = org = None
-    buf: list[str] = []
+    return list(iter_fasta(path, hints=hints, index=index))
 
-    with open(path) as fh:
-        for raw in fh:
-            line = raw.strip()
-            if not line:
-                continue
-            if line.startswith(">"):
-                if acc is not None:
-                    records.append((acc, db, "".join(buf).upper(), org))
-                acc, db = parse_identifier(line)
-                org = _extract_org_hint(line)
-                buf = []
-            else:
-                buf.append(line)
 
-    if acc is not None:
-        records.append((acc, db, "".join(buf).upper(), org))
+class FastaIndex:
+    """
+    Random access to the records of a FASTA file through a samtools-style
+    ``.fai`` index (``NAME LENGTH OFFSET LINEBASES LINEWIDTH``, tab-separated).
+
+    Records are looked up by the first word of their header line.
+    """
+
+    def __init__(self, fasta_path: str, entries: list[FaiEntry]) -> None:
+        self.fasta_path = str(fasta_path)
+        self.entries    = entries
+        self._by_name   = {e.name: e for e in entries}
 
-    return records
+    @staticmethod
+    def fai_path(fasta_path: str) -> pathlib.Path:
+        return pathlib.Path(f"{fasta_path}.fai")
+
+    @classmethod
+    def build(cls, fasta_path: str) -> "FastaIndex":
+        """Index *fasta_path* in one streaming pass (nothing is written)."""
+        if _compression(fasta_path):
+            raise ValueError(f"cannot index {fasta_path}: a .fai index "
+                             f"needs an uncompressed FASTA file")
+        entries = [
+            _fai_entry(header, body, offset,
+                       len(body.translate(None, _WHITESPACE_BYTES)))
+            for header, body, offset in _scan_fasta(fasta_path)
+        ]
+        return cls(fasta_path, entries)
+
+    @classmethod
+    def load(cls, fasta_path: str) -> "FastaIndex":
+        """Read the existing ``<fasta_path>.fai``."""
+        entries = []
+        with open(cls.fai_path(fasta_path)) as fh:
+            for line in fh:
+                name, length, offset, bases, width = line.rstrip("\n").split("\t")[:5]
+                entries.append(FaiEntry(name, int(length), int(offset),
+                                        int(bases), int(width)))
+        return cls(fasta_path, entries)
+
+    @classmethod
+    def open(cls, fasta_path: str) -> "FastaIndex":
+        """Load ``<fasta_path>.fai`` if it is up to date, else build and write it."""
+        fai = cls.fai_path(fasta_path)
+        try:
+            if fai.stat().st_mtime >= os.stat(fasta_path).st_mtime:
+                return cls.load(fasta_path)
+        except (OSError, ValueError):
+            pass
+        idx = cls.build(fasta_path)
+        idx.write()
+        return idx
+
+    def write(self, path: "str | pathlib.Path | None" = None) -> pathlib.Path:
+        out = pathlib.Path(path) if path else self.fai_path(self.fasta_path)
+        with _atomic_path(out) as tmp, open(tmp, "w") as fh:
+            for e in self.entries:
+                fh.write(f"{e.name}\t{e.length}\t{e.offset}\t"
+                         f"{e.linebases}\t{e.linewidth}\n")
+        return out
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def fetch(self, name: str, start: int = 0, end: "int | None" = None) -> str:
+        """
+        Residues ``[start, end)`` of record *name* (uppercased), read with one
+        seek; KeyError for an unknown name.
+        """
+        e   = self._by_name[name]
+        end = e.length if end is None else min(end, e.length)
+        if start >= end or not e.linebases:
+            return ""
+        first = e.offset + (start // e.linebases) * e.linewidth + start % e.linebases
+        last  = e.offset + ((end - 1) // e.linebases) * e.linewidth + (end - 1) % e.linebases
+        with open(self.fasta_path, "rb") as fh:
+            fh.seek(first)
+            raw = fh.read(last - first + 1)
+        return raw.translate(None, _WHITESPACE_BYTES).upper().decode()
 
 
 # ---------------------------------------------------------------------------
 # Additional alignment format parsers  (Stockholm, Clustal, NEXUS)
 # ---------------------------------------------------------------------------
 
+# Bytes of (decompressed) input examined by detect_format
+_DETECT_BYTES = 1 << 16
+
+
 def detect_format(path: str) -> str:
-    """Auto-detect alignment format from the first non-blank line."""
-    with open(path) as fh:
-        for line in fh:
-            line = line.strip()
-            if not line:
-                continue
-            if line.startswith("# STOCKHOLM"):
-                return "stockholm"
-            if line.startswith("CLUSTAL"):
-                return "clustal"
-            if line.upper().startswith("#NEXUS"):
-                return "nexus"
-            return "fasta"
+    """
+    Auto-detect alignment format from the first non-blank line.
+
+    Only the first ``_DETECT_BYTES`` bytes are read; compressed files are
+    looked at after decompression.
+    """
+    with open_input(path) as fh:
+        head = fh.read(_DETECT_BYTES)
+    line = head.lstrip(b"\xef\xbb\xbf" + _WHITESPACE_BYTES).split(b"\n", 1)[0]
+    if line.startswith(b"# STOCKHOLM"):
+        return "stockholm"
+    if line.startswith(b"CLUSTAL"):
+        return "clustal"
+    if line.upper().startswith(b"#NEXUS"):
+        return "nexus"
     return "fasta"
 
 
-def parse_stockholm(path: str) -> list[tuple[str, str, str, str]]:
-    """Parse a Stockholm (.sto/.sth) alignment file."""
-    seqs: dict[str, list[str]] = {}
-    order: list[str] = []
-    with open(path) as fh:
-        for line in fh:
-            line = line.rstrip()
-            if line.startswith("#") or line.startswith("//") or not line.strip():
+# The row readers below take a binary file handle and yield one
+# ``(name, residues)`` pair per sequence line, as undecoded bytes;
+# ``_join_rows`` collects the blocks of interleaved formats into lists and
+# joins each sequence once at the end.
+
+def _stockholm_rows(fh) -> "Iterator[tuple[bytes, bytes]]":
+    for line in fh:
+        if line[:1] == b"#" or line[:2] == b"//":
+            continue
+        parts = line.split()
+        if len(parts) == 2:
+            yield parts[0], parts[1]
+
+
+def _clustal_rows(fh) -> "Iterator[tuple[bytes, bytes]]":
+    first = True
+    for line in fh:
+        if first:
+            first = False
+            if line.startswith(b"CLUSTAL"):
                 continue
-            parts = line.split()
-            if len(parts) == 2:
-                name, seq = parts
-                if name not in seqs:
-                    order.append(name)
-                    seqs[name] = []
-                seqs[name].append(seq)
+        if line[:1] == b" " or not line.strip():   # conservation, blank
+            continue
+        parts = line.split()
+        if len(parts) >= 2:
+            yield parts[0], parts[1]
+
+
+def _nexus_rows(fh) -> "Iterator[tuple[bytes, bytes]]":
+    in_matrix = False
+    for line in fh:
+        stripped = line.strip()
+        low = stripped.lower()
+        if not in_matrix:
+            in_matrix = low == b"matrix"
+            continue
+        if stripped == b";" or low.startswith(b"end"):
+            in_matrix = False
+            continue
+        parts = stripped.split()
+        if len(parts) >= 2:
+            yield parts[0], parts[1]
+
+
+_ROW_READERS = {
+    "stockholm": _stockholm_rows,
+    "clustal":   _clustal_rows,
+    "nexus":     _nexus_rows,
+}
+
+
+def _join_rows(rows: "Iterator[tuple[bytes, bytes]]") -> dict[bytes, bytes]:
+    """Concatenate the blocks of each name, in order of first appearance."""
+    blocks: dict[bytes, list[bytes]] = {}
+    for name, seq in rows:
+        blk = blocks.get(name)
+        if blk is None:
+            blocks[name] = [seq]
+        else:
+            blk.append(seq)
+    return {name: b"".join(blk) for name, blk in blocks.items()}
+
+
+def _read_rows(path: str, fmt: str) -> dict[bytes, bytes]:
+    with open_input(path) as fh:
+        return _join_rows(_ROW_READERS[fmt](fh))
+
+
+def _alignment_records(rows: dict[bytes, bytes]) -> list[tuple[str, str, str, str]]:
     records: list[tuple[str, str, str, str]] = []
-    for name in order:
-        full_seq = "".join(seqs[name]).upper()
-        acc, db = parse_identifier(">" + name)
-        org = _extract_org_hint(">" + name)
-        records.append((acc, db, full_seq, org))
+    for raw_name, seq in rows.items():
+        name = ">" + raw_name.decode()
+        acc, db = parse_identifier(name)
+        records.append((acc, db, seq.upper().decode(), _extract_org_hint(name)))
     return records
 
 
+def parse_stockholm(path: str) -> list[tuple[str, str, str, str]]:
+    """Parse a Stockholm (.sto/.sth) alignment file."""
+    return _alignment_records(_read_rows(path, "stockholm"))
+
+
 def parse_clustal(path: str) -> list[tuple[str, str, str, str]]:
     """Parse a Clustal (.aln) alignment file."""
-    seqs: dict[str, list[str]] = {}
-    order: list[str] = []
-    with open(path) as fh:
-        for i, line in enumerate(fh):
-            line = line.rstrip()
-            if i == 0 and line.startswith("CLUSTAL"):
-                continue
-            if not line.strip() or line[0] == " ":
-                continue
-            parts = line.split()
-            if len(parts) >= 2:
-                name, seq = parts[0], parts[1]
-                if name not in seqs:
-                    order.append(name)
-                    seqs[name] = []
-                seqs[name].append(seq)
-    records: list[tuple[str, str, str, str]] = []
-    for name in order:
-        full_seq = "".join(seqs[name]).upper()
-        acc, db = parse_identifier(">" + name)
-        org = _extract_org_hint(">" + name)
-        records.append((acc, db, full_seq, org))
-    return records
+    return _alignment_records(_read_rows(path, "clustal"))
 
 
 def parse_nexus(path: str) -> list[tuple[str, str, str, str]]:
     """Parse a NEXUS (.nex/.nexus) alignment file."""
-    seqs: dict[str, list[str]] = {}
-    order: list[str] = []
-    in_matrix = False
-    with open(path) as fh:
-        for line in fh:
-            stripped = line.strip()
-            low = stripped.lower()
-            if low == "matrix":
-                in_matrix = True
-                continue
-            if in_matrix:
-                if stripped == ";" or low.startswith("end"):
-                    in_matrix = False
-                    continue
-                parts = stripped.split()
-                if len(parts) >= 2:
-                    name, seq = parts[0], parts[1]
-                    if name not in seqs:
-                        order.append(name)
-                        seqs[name] = []
-                    seqs[name].append(seq)
-    records: list[tuple[str, str, str, str]] = []
-    for name in order:
-        full_seq = "".join(seqs[name]).upper()
-        acc, db = parse_identifier(">" + name)
-        org = _extract_org_hint(">" + name)
-        records.append((acc, db, full_seq, org))
-    return records
+    return _alignment_records(_read_rows(path, "nexus"))
 
 
-def parse_alignment(path: str) -> list[tuple[str, str, str, str]]:
+def parse_alignment(
+    path: str,
+    hints: "LabelHints | None" = None,
+    index: "list[FaiEntry] | None" = None,
+) -> list[tuple[str, str, str, str]]:
     """Auto-detect format and parse an alignment file.
 
-    Supported formats: FASTA, Stockholm, Clustal, NEXUS.
+    Supported formats: FASTA, Stockholm, Clustal, NEXUS.  *hints* and
+    *index* are passed through to ``parse_fasta`` (other formats carry no
+    FASTA descriptions to collect and cannot be indexed).
     """
     fmt = detect_format(path)
     if fmt == "stockholm":
@@ -340,7 +655,7 @@ def parse_alignment(path: str) -> list[tuple[str, str, str, str]]:
         return parse_clustal(path)
     if fmt == "nexus":
         return parse_nexus(path)
-    return parse_fasta(path)
+    return parse_fasta(path, hints=hints, index=index)
 
 
 # ---------------------------------------------------------------------------
@@ -352,6 +667,12 @@ UNIPROT_BASE = "https://rest.uniprot.org/uniprotkb"
 # NCBI rate limit: ≤3 req/s without key, ≤10 req/s with key
 _NCBI_DELAY     = 0.34
 _NCBI_DELAY_KEY = 0.11
+# UniProt publishes no hard limit; stay polite
+_UNIPROT_DELAY  = 0.2
+
+# Batched taxonomy resolution: ids per request, concurrent requests
+_TAX_BATCH_SIZE = 200
+_TAX_WORKERS    = 4
 
 
 @dataclass
@@ -384,13 +705,17 @@ class TaxInfo:
 # Taxonomy – persistent cache
 # ---------------------------------------------------------------------------
 
-_CACHE_VERSION = 1
-_DEFAULT_CACHE  = "~/.protein_conservation_cache.json"
+_CACHE_VERSION  = 1
+_SQLITE_VERSION = 1
+_DEFAULT_CACHE  = "~/.protein_conservation_cache.sqlite"
+CACHE_BACKENDS  = ("sqlite", "json")
+# Buffered SQLite writes are flushed (in one short transaction) at this size
+_SQLITE_COMMIT_EVERY = 1000
 
 
 class TaxCache:
     """
-    Persistent JSON cache for taxonomy lookups.
+    Persistent cache for taxonomy lookups (backend interface).
 
     Two independent lookup tables are stored:
 
@@ -401,18 +726,11 @@ class TaxCache:
     keyed on the taxon ID avoids redundant NCBI Taxonomy calls for proteins
     from the same organism.
 
-    The cache is loaded from disk in ``__init__`` and written back only when
-    ``save()`` is called and new entries have been added (dirty flag).  A safe
-    write-then-rename strategy prevents corruption on interrupted runs.
+    Backends: :class:`SqliteTaxCache` (default) and :class:`JsonTaxCache`;
+    use :func:`open_tax_cache` to pick one.
     """
 
-    def __init__(self, path: str) -> None:
-        self._path  = pathlib.Path(path).expanduser()
-        self._taxids:       dict[str, int]     = {}
-        self._taxonomy:     dict[int, TaxInfo] = {}
-        self._protein_names: dict[str, str]    = {}   # accession → protein name
-        self._dirty = False
-        self._load()
+    _path: pathlib.Path
 
     # ------------------------------------------------------------------
     # Serialisation helpers
@@ -440,6 +758,58 @@ class TaxCache:
             ],
         )
 
+    # ------------------------------------------------------------------
+    # Interface
+    # ------------------------------------------------------------------
+
+    def get_taxid(self, accession: str) -> int | None:
+        raise NotImplementedError
+
+    def set_taxid(self, accession: str, taxid: int) -> None:
+        raise NotImplementedError
+
+    def get_taxonomy(self, taxid: int) -> TaxInfo | None:
+        raise NotImplementedError
+
+    def set_taxonomy(self, taxid: int, info: TaxInfo) -> None:
+        raise NotImplementedError
+
+    def get_protein_name(self, accession: str) -> str:
+        """Return the cached protein name for *accession* (empty if absent)."""
+        raise NotImplementedError
+
+    def set_protein_name(self, accession: str, name: str) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> tuple[int, int]:
+        """Return (n_accessions_cached, n_taxa_cached)."""
+        raise NotImplementedError
+
+    def save(self) -> None:
+        """Flush new entries to disk."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        self.save()
+
+
+class JsonTaxCache(TaxCache):
+    """
+    Persistent JSON cache for taxonomy lookups.
+
+    The cache is loaded from disk in ``__init__`` and written back only when
+    ``save()`` is called and new entries have been added (dirty flag).  A safe
+    write-then-rename strategy prevents corruption on interrupted runs.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path  = pathlib.Path(path).expanduser()
+        self._taxids:       dict[str, int]     = {}
+        self._taxonomy:     dict[int, TaxInfo] = {}
+        self._protein_names: dict[str, str]    = {}   # accession → protein name
+        self._dirty = False
+        self._load()
+
     # ------------------------------------------------------------------
     # Persistence
     # ------------------------------------------------------------------
@@ -520,44 +890,307 @@ class TaxCache:
         return len(self._taxids), len(self._taxonomy)
 
 
+class SqliteTaxCache(TaxCache):
+    """
+    Persistent SQLite cache for taxonomy lookups.
+
+    Each lookup table is an indexed SQLite table with a per-entry
+    ``updated`` timestamp, so lookups and inserts touch only the affected
+    rows instead of loading and rewriting the whole cache.  The database runs
+    in WAL mode: concurrent readers never block, and concurrent runs
+    serialise their write transactions through SQLite's own locking.
+
+    Writes are buffered in memory and flushed in a single short transaction
+    every ``_SQLITE_COMMIT_EVERY`` entries, on ``save()``, and before any read
+    that could see them.  No transaction is ever left open between calls, so
+    the write lock is never held across network I/O and other processes
+    sharing the file are not locked out.  With *ttl_days* set, entries older than that are treated as
+    missing and are refreshed on the next lookup.
+
+    On first use a legacy JSON cache (``_CACHE_VERSION`` 1) found at the same
+    path with a ``.json`` suffix is imported once; the JSON file is left in
+    place.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key   TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS taxids (
+            accession TEXT PRIMARY KEY,
+            taxid     INTEGER NOT NULL,
+            updated   REAL NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS taxonomy (
+            taxid   INTEGER PRIMARY KEY,
+            info    TEXT NOT NULL,
+            updated REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS protein_names (
+            accession TEXT PRIMARY KEY,
+            name      TEXT NOT NULL,
+            updated   REAL NOT NULL
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS taxids_taxid ON taxids (taxid);
+    """
+
+    def __init__(self, path: str, ttl_days: float | None = None) -> None:
+        self._path = pathlib.Path(path).expanduser()
+        self._ttl  = ttl_days * 86400.0 if ttl_days else None
+        self._pending: list[tuple[str, tuple]] = []
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self._path), timeout=30.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self._SCHEMA)
+        row = self._db.execute(
+            "SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None:
+            self._db.execute("INSERT OR IGNORE INTO meta VALUES ('version', ?)",
+                             (str(_SQLITE_VERSION),))
+        elif int(row[0]) != _SQLITE_VERSION:
+            raise ValueError(f"cache {self._path} has unsupported schema "
+                             f"version {row[0]}")
+        self._db.commit()
+        self._migrate_json(self._path.with_suffix(".json"))
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _migrate_json(self, json_path: pathlib.Path) -> None:
+        """Import a version-1 JSON cache once, recording it in ``meta``."""
+        if json_path == self._path or not json_path.exists():
+            return
+        done = self._db.execute(
+            "SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone()
+        if done:
+            return
+        legacy = JsonTaxCache(str(json_path))
+        now = time.time()
+        with self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO taxids VALUES (?, ?, ?)",
+                ((a, t, now) for a, t in legacy._taxids.items()))
+            self._db.executemany(
+                "INSERT OR IGNORE INTO taxonomy VALUES (?, ?, ?)",
+                ((t, json.dumps(self._info_to_dict(i)), now)
+                 for t, i in legacy._taxonomy.items()))
+            self._db.executemany(
+                "INSERT OR IGNORE INTO protein_names VALUES (?, ?, ?)",
+                ((a, n, now) for a, n in legacy._protein_names.items()))
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES "
+                             "('migrated_json', ?)", (str(json_path),))
+        n_acc, n_tax = len(legacy._taxids), len(legacy._taxonomy)
+        if n_acc or n_tax:
+            print(f"  Cache: migrated {n_acc} accession(s), {n_tax} taxon "
+                  f"record(s) from {json_path}")
+
+    def _fresh(self) -> float:
+        """Oldest ``updated`` timestamp still considered valid."""
+        return time.time() - self._ttl if self._ttl else float("-inf")
+
+    def _write(self, sql: str, params: tuple) -> None:
+        self._pending.append((sql, params))
+        if len(self._pending) >= _SQLITE_COMMIT_EVERY:
+            self.save()
+
+    def _read(self, sql: str, params: tuple) -> sqlite3.Cursor:
+        if self._pending:
+            self.save()
+        return self._db.execute(sql, params)
+
+    def save(self) -> None:
+        """Flush buffered writes in one transaction; no-op when nothing changed."""
+        if not self._pending:
+            return
+        try:
+            with self._db:
+                for sql, params in self._pending:
+                    self._db.execute(sql, params)
+            self._pending.clear()
+        except sqlite3.Error as exc:
+            print(f"  Warning: could not write cache to {self._path}: {exc}",
+                  file=sys.stderr)
+
+    def close(self) -> None:
+        self.save()
+        self._db.close()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get_taxid(self, accession: str) -> int | None:
+        row = self._read(
+            "SELECT taxid FROM taxids WHERE accession = ? AND updated >= ?",
+            (accession, self._fresh())).fetchone()
+        return row[0] if row else None
+
+    def set_taxid(self, accession: str, taxid: int) -> None:
+        self._write("INSERT OR REPLACE INTO taxids VALUES (?, ?, ?)",
+                    (accession, int(taxid), time.time()))
+
+    def get_taxonomy(self, taxid: int) -> TaxInfo | None:
+        row = self._read(
+            "SELECT info FROM taxonomy WHERE taxid = ? AND updated >= ?",
+            (int(taxid), self._fresh())).fetchone()
+        return self._dict_to_info(json.loads(row[0])) if row else None
+
+    def set_taxonomy(self, taxid: int, info: TaxInfo) -> None:
+        self._write("INSERT OR REPLACE INTO taxonomy VALUES (?, ?, ?)",
+                    (int(taxid), json.dumps(self._info_to_dict(info)),
+                     time.time()))
+
+    def get_protein_name(self, accession: str) -> str:
+        """Return the cached protein name for *accession* (empty if absent)."""
+        row = self._read(
+            "SELECT name FROM protein_names WHERE accession = ? AND updated >= ?",
+            (accession, self._fresh())).fetchone()
+        return row[0] if row else ""
+
+    def set_protein_name(self, accession: str, name: str) -> None:
+        if name:
+            self._write("INSERT OR REPLACE INTO protein_names VALUES (?, ?, ?)",
+                        (accession, name, time.time()))
+
+    def stats(self) -> tuple[int, int]:
+        """Return (n_accessions_cached, n_taxa_cached), excluding expired entries."""
+        fresh = self._fresh()
+        n_acc = self._read(
+            "SELECT COUNT(*) FROM taxids WHERE updated >= ?", (fresh,)).fetchone()[0]
+        n_tax = self._db.execute(
+            "SELECT COUNT(*) FROM taxonomy WHERE updated >= ?", (fresh,)).fetchone()[0]
+        return n_acc, n_tax
+
+
+def cache_path(path: str, backend: str = "sqlite") -> pathlib.Path:
+    """
+    Resolve the on-disk cache file for *backend*.
+
+    The SQLite backend swaps a ``.json`` suffix for ``.sqlite`` so that an
+    old ``--cache-file`` setting keeps working (and gets migrated); the JSON
+    backend uses *path* unchanged.
+    """
+    p = pathlib.Path(path).expanduser()
+    if backend == "sqlite" and p.suffix == ".json":
+        p = p.with_suffix(".sqlite")
+    return p
+
+
+def open_tax_cache(path: str, backend: str = "sqlite",
+                   ttl_days: float | None = None) -> TaxCache:
+    """Open the taxonomy cache at *path* with the chosen *backend*."""
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(f"unknown cache backend {backend!r}; "
+                         f"choose from {', '.join(CACHE_BACKENDS)}")
+    p = cache_path(path, backend)
+    if backend == "json":
+        return JsonTaxCache(str(p))
+    return SqliteTaxCache(str(p), ttl_days=ttl_days)
+
+
+def clear_tax_cache(path: str, backend: str = "sqlite") -> list[pathlib.Path]:
+    """
+    Delete the cache file and return the paths removed.
+
+    For SQLite this includes the WAL side files and the legacy JSON cache
+    that would otherwise be migrated straight back in.
+    """
+    p = cache_path(path, backend)
+    files = [p]
+    if backend == "sqlite":
+        files += [p.with_name(p.name + "-wal"), p.with_name(p.name + "-shm"),
+                  p.with_suffix(".json")]
+    removed = []
+    for f in files:
+        if f.exists():
+            f.unlink()
+            removed.append(f)
+    return removed
+
+
 # ---------------------------------------------------------------------------
 # Taxonomy – API helpers
 # ---------------------------------------------------------------------------
 
+_USER_AGENT = "protein_conservation/2.0 (github)"
+
+
 def _http_get(url: str, timeout: int = 20) -> str:
-    req = urllib.request.Request(
-        url, headers={"User-Agent": "protein_conservation/2.0 (github)"}
-    )
+    import urllib.request
+    req = urllib.request.Request(url, headers={"User-Agent": _USER_AGENT})
     with urllib.request.urlopen(req, timeout=timeout) as resp:
         return resp.read().decode()
 
 
-def _ncbi_delay(api_key: str | None) -> None:
-    time.sleep(_NCBI_DELAY_KEY if api_key else _NCBI_DELAY)
+def _http_post(url: str, data: dict, timeout: int = 60) -> str:
+    """POST *data* form-encoded to *url* and return the decoded body."""
+    import urllib.request
+    req = urllib.request.Request(
+        url, data=urllib.parse.urlencode(data).encode(),
+        headers={"User-Agent": _USER_AGENT,
+                 "Content-Type": "application/x-www-form-urlencoded"},
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return resp.read().decode()
 
 
-def _taxonomy_from_ncbi(taxid: int, api_key: str | None = None) -> TaxInfo | None:
+class TokenBucket:
     """
-    Fetch full taxonomic lineage from the NCBI Taxonomy database.
-    Returns a TaxInfo with the complete LineageEx plus the organism itself.
+    Thread-safe token-bucket rate limiter.
+
+    Tokens refill continuously at *rate* per second up to *capacity*;
+    ``acquire()`` takes one token, sleeping until one is available.
     """
-    url = (f"{NCBI_BASE}/efetch.fcgi?db=taxonomy&id={taxid}&retmode=xml"
-           + (f"&api_key={api_key}" if api_key else ""))
-    _ncbi_delay(api_key)
-    try:
-        body = _http_get(url)
-    except Exception:
-        return None
 
-    try:
-        root = ET.fromstring(body)
-    except ET.ParseError:
-        return None
+    def __init__(self, rate: float, capacity: float = 1.0) -> None:
+        self.rate     = rate
+        self.capacity = capacity
+        self._tokens  = capacity
+        self._last    = time.monotonic()
+        self._lock    = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity,
+                                   self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# One bucket per remote host, shared by every thread
+_HOST_DELAYS: dict[str, float] = {
+    "ncbi":     _NCBI_DELAY,
+    "ncbi_key": _NCBI_DELAY_KEY,
+    "uniprot":  _UNIPROT_DELAY,
+}
+_BUCKETS: dict[str, TokenBucket] = {}
+_BUCKETS_LOCK = threading.Lock()
+
+
+def _rate_limit(host: str) -> None:
+    """Block until a request to *host* (a ``_HOST_DELAYS`` key) is allowed."""
+    with _BUCKETS_LOCK:
+        bucket = _BUCKETS.get(host)
+        if bucket is None:
+            bucket = _BUCKETS[host] = TokenBucket(1.0 / _HOST_DELAYS[host])
+    bucket.acquire()
 
-    taxon_el = root.find("Taxon")
-    if taxon_el is None:
-        return None
 
+def _ncbi_delay(api_key: str | None) -> None:
+    _rate_limit("ncbi_key" if api_key else "ncbi")
+
+
+def _parse_taxon(taxon_el: ET.Element, taxid: int) -> TaxInfo:
+    """Build a TaxInfo for *taxid* from an NCBI Taxonomy ``<Taxon>`` element."""
     sci_name = taxon_el.findtext("ScientificName", "").strip()
     rank     = taxon_el.findtext("Rank", "no rank").strip().lower()
 
@@ -575,25 +1208,56 @@ def _taxonomy_from_ncbi(taxid: int, api_key: str | None = None) -> TaxInfo | Non
     return TaxInfo(taxon_id=taxid, scientific_name=sci_name, lineage=lineage)
 
 
-def _taxid_from_uniprot(accession: str) -> "tuple[int | None, str]":
+def _taxonomy_from_ncbi(taxid: int, api_key: str | None = None) -> TaxInfo | None:
     """
-    Look up the NCBI taxon ID for a UniProt accession via the UniProt REST API.
-
-    Returns ``(taxid, protein_name)`` where *protein_name* is the
-    recommended or submitted full protein name (empty string if unavailable).
+    Fetch full taxonomic lineage from the NCBI Taxonomy database.
+    Returns a TaxInfo with the complete LineageEx plus the organism itself.
     """
-    url = f"{UNIPROT_BASE}/{accession}.json"
+    from xml.etree import ElementTree as ET
+    url = (f"{NCBI_BASE}/efetch.fcgi?db=taxonomy&id={taxid}&retmode=xml"
+           + (f"&api_key={api_key}" if api_key else ""))
+    _ncbi_delay(api_key)
     try:
         body = _http_get(url)
-    except urllib.error.HTTPError as exc:
+    except Exception:
+        return None
+
+    try:
+        root = ET.fromstring(body)
+    except ET.ParseError:
+        return None
+
+    taxon_el = root.find("Taxon")
+    if taxon_el is None:
+        return None
+    return _parse_taxon(taxon_el, taxid)
+
+
+def _taxid_from_uniprot(accession: str) -> "tuple[int | None, str]":
+    """
+    Look up the NCBI taxon ID for a UniProt accession via the UniProt REST API.
+
+    Returns ``(taxid, protein_name)`` where *protein_name* is the
+    recommended or submitted full protein name (empty string if unavailable).
+    """
+    import urllib.error
+    url = f"{UNIPROT_BASE}/{accession}.json"
+    _rate_limit("uniprot")
+    try:
+        body = _http_get(url)
+    except urllib.error.HTTPError as exc:
         if exc.code == 404:
             return None, ""
         raise
     data = json.loads(body)
     taxid = data.get("organism", {}).get("taxonId")
-    # Extract protein name from the response
+    return taxid, _uniprot_protein_name(data)
+
+
+def _uniprot_protein_name(entry: dict) -> str:
+    """Recommended (else first submitted) full name of a UniProt JSON entry."""
     prot_name = ""
-    pdesc = data.get("proteinDescription", {})
+    pdesc = entry.get("proteinDescription", {})
     rec = pdesc.get("recommendedName")
     if rec:
         prot_name = rec.get("fullName", {}).get("value", "")
@@ -601,7 +1265,7 @@ def _taxid_from_uniprot(accession: str) -> "tuple[int | None, str]":
         sub = pdesc.get("submissionNames", [])
         if sub:
             prot_name = sub[0].get("fullName", {}).get("value", "")
-    return taxid, prot_name
+    return prot_name
 
 
 def _taxid_from_ncbi_protein(accession: str, api_key: str | None = None) -> "tuple[int | None, str]":
@@ -612,6 +1276,7 @@ def _taxid_from_ncbi_protein(accession: str, api_key: str | None = None) -> "tup
     Returns ``(taxid, protein_name)`` where *protein_name* is the
     ``<GBSeq_definition>`` text (empty string if unavailable).
     """
+    from xml.etree import ElementTree as ET
     url = (f"{NCBI_BASE}/efetch.fcgi?db=protein&id={accession}"
            f"&rettype=gp&retmode=xml"
            + (f"&api_key={api_key}" if api_key else ""))
@@ -627,11 +1292,7 @@ def _taxid_from_ncbi_protein(accession: str, api_key: str | None = None) -> "tup
         return None, ""
 
     # Extract protein name from <GBSeq_definition>
-    prot_name = ""
-    defn = root.findtext(".//GBSeq_definition")
-    if defn:
-        # Strip trailing "[Organism name]" bracket
-        prot_name = re.sub(r"\s*\[[^\[\]]+\]\s*$", "", defn).strip()
+    prot_name = _strip_organism(root.findtext(".//GBSeq_definition") or "")
 
     taxid = None
     for qual in root.iter("GBQualifier"):
@@ -643,6 +1304,11 @@ def _taxid_from_ncbi_protein(accession: str, api_key: str | None = None) -> "tup
     return taxid, prot_name
 
 
+def _strip_organism(definition: str) -> str:
+    """Drop a trailing ``[Organism name]`` bracket from an NCBI title."""
+    return _drop_trailing_bracket(definition).strip()
+
+
 def fetch_taxonomy(accession: str, db_type: str,
                    api_key: str | None = None,
                    cache: "TaxCache | None" = None) -> "tuple[TaxInfo | None, bool, str]":
@@ -701,14 +1367,250 @@ def fetch_taxonomy(accession: str, db_type: str,
         return None, False, ""
 
 
+# ---------------------------------------------------------------------------
+# Taxonomy – batched resolution
+# ---------------------------------------------------------------------------
+
+def _chunked(items: list, size: int) -> list[list]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _taxids_from_uniprot_batch(
+    accessions: list[str],
+) -> "dict[str, tuple[int, str]]":
+    """
+    Resolve many UniProt accessions with one UniProtKB search request.
+
+    Returns ``{accession: (taxid, protein_name)}`` keyed by the primary
+    accession; accessions that are not found (e.g. secondary accessions)
+    are simply absent and left to the single-entry fallback.
+    """
+    query = " OR ".join(f"accession:{a}" for a in accessions)
+    url = (f"{UNIPROT_BASE}/search?format=json&size={max(len(accessions), 1)}"
+           f"&fields=accession,organism_id,protein_name"
+           f"&query={urllib.parse.quote(query)}")
+    _rate_limit("uniprot")
+    try:
+        data = json.loads(_http_get(url, timeout=60))
+    except Exception as exc:
+        _log.debug("UniProt batch of %d failed: %s", len(accessions), exc)
+        return {}
+
+    wanted = set(accessions)
+    found: dict[str, tuple[int, str]] = {}
+    for entry in data.get("results", []):
+        acc   = entry.get("primaryAccession", "")
+        taxid = entry.get("organism", {}).get("taxonId")
+        if acc in wanted and taxid is not None:
+            found[acc] = (int(taxid), _uniprot_protein_name(entry))
+    return found
+
+
+def _taxids_from_ncbi_protein_batch(
+    accessions: list[str],
+    api_key: str | None = None,
+) -> "dict[str, tuple[int, str]]":
+    """
+    Resolve many GenBank/RefSeq protein accessions with one ESummary call.
+
+    Document summaries carry the taxon ID and title directly, so no ELink
+    round-trip is needed.  Summaries are matched back to the requested
+    accession by versioned or unversioned accession.
+    """
+    data = {"db": "protein", "id": ",".join(accessions), "retmode": "json"}
+    if api_key:
+        data["api_key"] = api_key
+    _ncbi_delay(api_key)
+    try:
+        result = json.loads(_http_post(f"{NCBI_BASE}/esummary.fcgi", data))["result"]
+    except Exception as exc:
+        _log.debug("NCBI ESummary batch of %d failed: %s", len(accessions), exc)
+        return {}
+
+    by_key: dict[str, tuple[int, str]] = {}
+    for uid in result.get("uids", []):
+        doc   = result.get(uid, {})
+        taxid = doc.get("taxid")
+        if not taxid:
+            continue
+        hit = (int(taxid), _strip_organism(doc.get("title", "")))
+        for key in (doc.get("accessionversion"), doc.get("caption"), uid):
+            if key:
+                by_key[str(key)] = hit
+
+    found: dict[str, tuple[int, str]] = {}
+    for acc in accessions:
+        hit = by_key.get(acc) or by_key.get(acc.split(".")[0])
+        if hit:
+            found[acc] = hit
+    return found
+
+
+def _taxonomy_from_ncbi_batch(
+    taxids: list[int],
+    api_key: str | None = None,
+) -> dict[int, TaxInfo]:
+    """
+    Fetch many lineages with one NCBI Taxonomy EFetch call.
+
+    The ``<TaxaSet>`` response holds one ``<Taxon>`` per ID; merged IDs are
+    matched through ``<AkaTaxIds>`` so the result is keyed by the requested
+    taxon ID, exactly as :func:`_taxonomy_from_ncbi` would return it.
+    """
+    from xml.etree import ElementTree as ET
+    data = {"db": "taxonomy", "id": ",".join(map(str, taxids)), "retmode": "xml"}
+    if api_key:
+        data["api_key"] = api_key
+    _ncbi_delay(api_key)
+    try:
+        root = ET.fromstring(_http_post(f"{NCBI_BASE}/efetch.fcgi", data))
+    except Exception as exc:
+        _log.debug("NCBI Taxonomy batch of %d failed: %s", len(taxids), exc)
+        return {}
+
+    wanted = set(taxids)
+    found: dict[int, TaxInfo] = {}
+    for taxon_el in root.findall("Taxon"):
+        ids = {taxon_el.findtext("TaxId", "")}
+        ids.update(el.text or "" for el in taxon_el.findall("AkaTaxIds/TaxId"))
+        for tid in ids:
+            if tid.strip().isdigit() and int(tid) in wanted:
+                found[int(tid)] = _parse_taxon(taxon_el, int(tid))
+    return found
+
+
+def resolve_taxonomies_batched(
+    records: list[tuple[str, str, str]],
+    api_key: str | None = None,
+    cache: "TaxCache | None" = None,
+    batch_size: int = _TAX_BATCH_SIZE,
+    workers: int = _TAX_WORKERS,
+) -> "dict[str, tuple[TaxInfo | None, bool, str]]":
+    """
+    Resolve taxonomy for all *records* with batched, concurrent requests.
+
+    Accession → taxon ID lookups are grouped into UniProt search and NCBI
+    ESummary requests of up to *batch_size* IDs, then the distinct taxon
+    IDs are fetched from NCBI Taxonomy in batches of the same size.  Up to
+    *workers* requests run at once; each host has its own token bucket, so
+    UniProt and NCBI proceed in parallel while NCBI stays within its
+    3 (or, with an API key, 10) requests/second limit.  IDs a batch does
+    not return fall back to the single-ID helpers.
+
+    Returns ``{accession: (TaxInfo | None, from_cache, protein_name)}``
+    with the same semantics as :func:`fetch_taxonomy`.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    batch_size = max(1, batch_size)
+    db_of: dict[str, str] = {}
+    for acc, db, *_rest in records:
+        db_of.setdefault(acc, db)
+
+    # ── Step 1: accession → taxon ID ──────────────────────────────────────
+    taxids: dict[str, int] = {}
+    names:  dict[str, str] = {}
+    cached_acc: set[str]   = set()
+    need: dict[str, list[str]] = {"uniprot": [], "ncbi": []}
+    for acc, db in db_of.items():
+        taxid = cache.get_taxid(acc) if cache else None
+        if taxid is not None:
+            taxids[acc] = taxid
+            names[acc]  = cache.get_protein_name(acc)
+            cached_acc.add(acc)
+        else:
+            need["uniprot" if db == "uniprot" else "ncbi"].append(acc)
+
+    def _lookup_batch(job: "tuple[str, list[str]]") -> "dict[str, tuple[int, str]]":
+        kind, chunk = job
+        if kind == "uniprot":
+            return _taxids_from_uniprot_batch(chunk)
+        return _taxids_from_ncbi_protein_batch(chunk, api_key)
+
+    def _lookup_one(acc: str) -> "tuple[str, int | None, str]":
+        try:
+            if db_of[acc] == "uniprot":
+                return (acc, *_taxid_from_uniprot(acc))
+            return (acc, *_taxid_from_ncbi_protein(acc, api_key))
+        except Exception as exc:
+            _log.debug("taxid lookup %s failed: %s", acc, exc)
+            return acc, None, ""
+
+    def _lineage_one(taxid: int) -> "tuple[int, TaxInfo | None]":
+        return taxid, _taxonomy_from_ncbi(taxid, api_key)
+
+    jobs = [(kind, chunk) for kind in ("uniprot", "ncbi")
+            for chunk in _chunked(need[kind], batch_size)]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        if jobs:
+            n_need = len(need["uniprot"]) + len(need["ncbi"])
+            print(f"  Resolving {n_need} accession(s) in {len(jobs)} "
+                  f"batch request(s)…", flush=True)
+        for found in pool.map(_lookup_batch, jobs):
+            for acc, (taxid, prot_name) in found.items():
+                taxids[acc], names[acc] = taxid, prot_name
+
+        missed = [a for kind in ("uniprot", "ncbi") for a in need[kind]
+                  if a not in taxids]
+        if missed:
+            _log.info("Falling back to single lookups for %d accession(s)",
+                      len(missed))
+        for acc, taxid, prot_name in pool.map(_lookup_one, missed):
+            if taxid is not None:
+                taxids[acc], names[acc] = taxid, prot_name
+
+        for acc in db_of:
+            if cache and acc not in cached_acc and acc in taxids:
+                cache.set_taxid(acc, taxids[acc])
+                if names.get(acc):
+                    cache.set_protein_name(acc, names[acc])
+
+        # ── Step 2: taxon ID → full lineage ───────────────────────────────
+        infos: dict[int, TaxInfo] = {}
+        cached_tax: set[int] = set()
+        todo: list[int] = []
+        for taxid in dict.fromkeys(taxids.values()):
+            info = cache.get_taxonomy(taxid) if cache else None
+            if info is not None:
+                infos[taxid] = info
+                cached_tax.add(taxid)
+            else:
+                todo.append(taxid)
+
+        for found in pool.map(lambda chunk: _taxonomy_from_ncbi_batch(chunk, api_key),
+                              _chunked(todo, batch_size)):
+            infos.update(found)
+        for taxid, info in pool.map(_lineage_one, [t for t in todo if t not in infos]):
+            if info is not None:
+                infos[taxid] = info
+        if cache:
+            for taxid in todo:
+                if taxid in infos:
+                    cache.set_taxonomy(taxid, infos[taxid])
+
+    results: dict[str, tuple[TaxInfo | None, bool, str]] = {}
+    for acc in db_of:
+        info = infos.get(taxids[acc]) if acc in taxids else None
+        if info is None:
+            results[acc] = (None, False, "")
+        else:
+            from_cache = acc in cached_acc and taxids[acc] in cached_tax
+            results[acc] = (info, from_cache, names.get(acc, ""))
+    return results
+
+
 def fetch_all_taxonomies(
     records: list[tuple[str, str, str]],
     api_key: str | None = None,
     cache: "TaxCache | None" = None,
+    batch_size: int = _TAX_BATCH_SIZE,
 ) -> "tuple[dict[str, TaxInfo], dict[str, str]]":
     """
     Fetch taxonomy for every record in *records*, printing progress.
 
+    With *batch_size* > 1 (the default) lookups go through
+    :func:`resolve_taxonomies_batched`; ``batch_size=1`` resolves each
+    accession with its own requests via :func:`fetch_taxonomy`.
+
     Cache hits are served instantly without any network call and are
     labelled ``[cached]`` in the progress output.  After all records are
     processed the cache is flushed to disk (if it is dirty).
@@ -725,13 +1627,19 @@ def fetch_all_taxonomies(
             print(f"  Cache: {n_acc} accession(s), {n_tax} taxon record(s) "
                   f"loaded from {cache._path}")
 
+    resolved = (resolve_taxonomies_batched(records, api_key, cache, batch_size)
+                if batch_size > 1 else None)
+
     tax_map: dict[str, TaxInfo] = {}
     prot_names: dict[str, str] = {}
     n = len(records)
     n_hits = 0
     for idx, (acc, db, *_rest) in enumerate(records, 1):
         print(f"  [{idx}/{n}] {acc} ({db})… ", end="", flush=True)
-        info, from_cache, prot_name = fetch_taxonomy(acc, db, api_key, cache)
+        if resolved is not None:
+            info, from_cache, prot_name = resolved[acc]
+        else:
+            info, from_cache, prot_name = fetch_taxonomy(acc, db, api_key, cache)
         if prot_name:
             prot_names[acc] = prot_name
         if info is None:
@@ -784,10 +1692,15 @@ def rank_conservation(
     tax_map: dict[str, TaxInfo],
     rank: str,
     n_bootstrap: int = 0,
+    seed: "int | None" = None,
+    engine: str = "auto",
 ) -> dict:
     """
     Compute median pairwise similarity within and between taxa at *rank*.
 
+    With *n_bootstrap* > 0, 95% bootstrap CIs of both medians are added
+    (see ``bootstrap_ci``; *seed* and *engine* are passed through).
+
     Returns a dict with keys:
       'rank'          – the requested rank string
       'groups'        – {taxon_name: {'members': [accessions],
@@ -796,8 +1709,18 @@ def rank_conservation(
       'inter_pairs'   – [(sim, taxon_a, taxon_b, id1, id2)]
       'intra_median'  – overall median across all within-group pairs
       'inter_median'  – overall median across all between-group pairs
+
+    For a memory-mapped *sim_mat* the statistics are streamed instead (see
+    ``_rank_conservation_blocked``): no per-pair lists are built, groups
+    carry ``'n_pairs'`` and the result holds ``'pair_stats'``.  Use
+    ``intra_pair_count`` / ``inter_pair_stats`` to read either form.
     """
     groups = group_by_rank(ids, tax_map, rank)
+    if _is_array(sim_mat):
+        if n_bootstrap > 0:
+            print("  Note: bootstrap CIs are not available for the "
+                  "memory-mapped matrix – skipped.", file=sys.stderr)
+        return _rank_conservation_blocked(ids, sim_mat, groups, rank)
 
     group_data: dict[str, dict] = {}
     for taxon, indices in groups.items():
@@ -835,33 +1758,133 @@ def rank_conservation(
 
     if n_bootstrap > 0:
         if all_intra:
-            result["intra_ci"] = bootstrap_ci(all_intra, n_bootstrap)
+            result["intra_ci"] = bootstrap_ci(all_intra, n_bootstrap,
+                                              seed=seed, engine=engine)
         if all_inter:
-            result["inter_ci"] = bootstrap_ci(all_inter, n_bootstrap)
+            result["inter_ci"] = bootstrap_ci(all_inter, n_bootstrap,
+                                              seed=seed, engine=engine)
 
     return result
 
 
+def _rank_conservation_blocked(
+    ids: list[str],
+    sim,
+    groups: dict[str, list[int]],
+    rank: str,
+) -> dict:
+    """
+    ``rank_conservation`` for a memory-mapped matrix, streamed in row blocks.
+
+    Every within-group and between-group-pair median (plus the two overall
+    medians) is computed exactly by ``BlockedMedians`` from the upper
+    triangle, read four times block by block.
+    """
+    import numpy as np
+    names = list(groups.keys())
+    G     = len(names)
+    lab   = np.full(len(ids), -1, dtype=np.int64)
+    for g, name in enumerate(names):
+        lab[groups[name]] = g
+
+    n_pairs   = G * (G + 1) // 2          # (a, b), a <= b, row-major
+    all_intra = n_pairs
+    all_inter = n_pairs + 1
+
+    med = BlockedMedians(n_pairs + 2)
+    while med.next_pass():
+        for r0, r1, block, keep in _upper_blocks(sim):
+            la   = lab[r0:r1][:, None]
+            lb   = lab[None, r0:]
+            keep = keep & (la >= 0) & (lb >= 0)
+            a    = np.minimum(la, lb)[keep]
+            b    = np.maximum(la, lb)[keep]
+            vals = block[keep]
+            med.add(vals, a * G - a * (a - 1) // 2 + (b - a))
+            med.add(vals, np.where(a == b, all_intra, all_inter))
+    medians = med.medians()
+    counts  = med.counts.tolist()
+
+    def _bucket(a: int, b: int) -> int:
+        return a * G - a * (a - 1) // 2 + (b - a)
+
+    group_data: dict[str, dict] = {}
+    for g, name in enumerate(names):
+        k = _bucket(g, g)
+        group_data[name] = {
+            "members":      [ids[i] for i in groups[name]],
+            "intra_pairs":  [],
+            "n_pairs":      counts[k],
+            "intra_median": medians[k],
+        }
+    pair_stats = {
+        (names[a], names[b]): (counts[_bucket(a, b)], medians[_bucket(a, b)])
+        for a, b in combinations(range(G), 2)
+        if counts[_bucket(a, b)]
+    }
+    return {
+        "rank":         rank,
+        "groups":       group_data,
+        "inter_pairs":  [],
+        "pair_stats":   pair_stats,
+        "intra_median": medians[all_intra],
+        "inter_median": medians[all_inter],
+        "all_intra":    [],
+        "all_inter":    [],
+        "intra_ci":     None,
+        "inter_ci":     None,
+        "streamed":     True,
+    }
+
+
+def intra_pair_count(gdata: dict) -> int:
+    """Number of within-group pairs of one ``rank_conservation`` group."""
+    return gdata.get("n_pairs", len(gdata["intra_pairs"]))
+
+
+def inter_pair_stats(result: dict) -> "dict[tuple[str, str], tuple[int, float]]":
+    """
+    ``{(taxon_a, taxon_b): (n_pairs, median)}`` for every between-group pair
+    of a ``rank_conservation`` result, in first-seen order.
+    """
+    if "pair_stats" in result:
+        return result["pair_stats"]
+    by_pair: dict[tuple[str, str], list[float]] = defaultdict(list)
+    for sim, ta, tb, *_ in result["inter_pairs"]:
+        by_pair[(ta, tb)].append(sim)
+    return {key: (len(sims), statistics.median(sims))
+            for key, sims in by_pair.items()}
+
+
 def bootstrap_ci(
     values: list[float],
     n_bootstrap: int = 1000,
     ci: float = 0.95,
     seed: "int | None" = None,
+    engine: str = "auto",
 ) -> "tuple[float, float]":
     """
     Percentile bootstrap 95% confidence interval for the median.
 
+    The NumPy engine draws all resample indices from one seeded
+    ``numpy.random.Generator``; the pure-Python engine uses
+    ``random.Random(seed)``.  Each is reproducible for a given *seed*,
+    but the two draw different resamples.
+
     Returns ``(lower, upper)``.
     """
     import random
     if not values or n_bootstrap < 1:
         return (float("nan"), float("nan"))
-    rng = random.Random(seed)
-    n = len(values)
-    medians: list[float] = []
-    for _ in range(n_bootstrap):
-        sample = [values[rng.randint(0, n - 1)] for _ in range(n)]
-        medians.append(statistics.median(sample))
+    if _use_numpy(engine):
+        medians = _bootstrap_medians_np(values, n_bootstrap, seed)
+    else:
+        rng = random.Random(seed)
+        n = len(values)
+        medians = []
+        for _ in range(n_bootstrap):
+            sample = [values[rng.randint(0, n - 1)] for _ in range(n)]
+            medians.append(statistics.median(sample))
     medians.sort()
     alpha = (1.0 - ci) / 2.0
     lo_idx = max(0, int(math.floor(alpha * len(medians))))
@@ -869,6 +1892,23 @@ def bootstrap_ci(
     return (medians[lo_idx], medians[hi_idx])
 
 
+def _bootstrap_medians_np(values: list[float], n_bootstrap: int,
+                          seed: "int | None") -> list[float]:
+    """Medians of *n_bootstrap* resamples of *values*, drawn with NumPy."""
+    import numpy as np
+    v   = np.asarray(values, dtype=np.float64)
+    n   = v.size
+    rng = np.random.default_rng(seed)
+    # The resample matrix is drawn in row blocks to bound memory
+    rows = max(1, _NP_BLOCK_CELLS // n)
+    medians: list[float] = []
+    for start in range(0, n_bootstrap, rows):
+        b   = min(rows, n_bootstrap - start)
+        idx = rng.integers(0, n, size=(b, n))
+        medians.extend(np.median(v[idx], axis=1).tolist())
+    return medians
+
+
 def group_sim_matrix(rank_result: dict):
     """Build a group-level similarity matrix from a rank_conservation result.
 
@@ -880,20 +1920,11 @@ def group_sim_matrix(rank_result: dict):
     passing directly to ``plot_dendrogram`` or ``export_phyloxml``.
     """
     groups      = rank_result["groups"]
-    inter_pairs = rank_result["inter_pairs"]   # (sim, ta, tb, id1, id2)
 
     group_names = sorted(groups.keys())
     n    = len(group_names)
     gidx = {name: i for i, name in enumerate(group_names)}
 
-    # Collect inter-group pairwise sims grouped by taxon pair
-    pair_sims: dict = {}
-    for sim, ta, tb, _id1, _id2 in inter_pairs:
-        key = (ta, tb) if ta <= tb else (tb, ta)
-        if key not in pair_sims:
-            pair_sims[key] = []
-        pair_sims[key].append(sim)
-
     mat = [[0.0] * n for _ in range(n)]
 
     # Diagonal: intra-group median (1.0 for singletons)
@@ -903,9 +1934,8 @@ def group_sim_matrix(rank_result: dict):
         mat[i][i] = med if med is not None else 1.0
 
     # Off-diagonal: per-pair inter-group median
-    for (ta, tb), sims in pair_sims.items():
+    for (ta, tb), (_n, med) in inter_pair_stats(rank_result).items():
         i, j = gidx[ta], gidx[tb]
-        med  = statistics.median(sims) if sims else 0.0
         mat[i][j] = med
         mat[j][i] = med
 
@@ -919,13 +1949,17 @@ def permutation_test_rank(
     rank: str,
     n_permutations: int = 1000,
     seed: "int | None" = None,
+    engine: str = "auto",
 ) -> dict:
     """
     Permutation test for rank-based conservation significance.
 
     Observed test statistic: T = intra_median − inter_median.
     Null distribution: shuffle group labels (preserving group sizes) and
-    recompute T for each permutation.
+    recompute T for each permutation.  The NumPy engine evaluates the
+    permutations in vectorised batches (see ``_permutation_stats_np``);
+    like the Python engine it is reproducible for a given *seed*, but the
+    two draw different permutations.
 
     Returns a dict with keys:
       'observed_stat'  – observed T value (float | None)
@@ -937,6 +1971,13 @@ def permutation_test_rank(
     """
     import random
 
+    if _is_array(sim_mat):
+        return {
+            "observed_stat": None, "p_value": None,
+            "n_permutations": 0, "perm_mean": None, "perm_stdev": None,
+            "reason": "not available for the memory-mapped similarity matrix",
+        }
+
     result = rank_conservation(ids, [], sim_mat, tax_map, rank)
     obs_intra = result["intra_median"]
     obs_inter = result["inter_median"]
@@ -972,38 +2013,46 @@ def permutation_test_rank(
     group_sizes = [len(gdata["members"]) for gdata in groups.values()]
     group_labels = list(groups.keys())
 
-    rng = random.Random(seed)
     perm_stats: list[float] = []
+    if _use_numpy(engine):
+        label_code = {taxon: k for k, taxon in enumerate(group_labels)}
+        perm_stats = _permutation_stats_np(
+            sim_mat, valid_indices,
+            [label_code[label_vector[i]] for i in valid_indices],
+            n_permutations, seed,
+        )
+    else:
+        rng = random.Random(seed)
+
+        for _ in range(n_permutations):
+            # Shuffle valid_indices, then re-assign group labels by size
+            shuffled = valid_indices[:]
+            rng.shuffle(shuffled)
+            perm_assignment: dict[int, str] = {}
+            pos = 0
+            for taxon, size in zip(group_labels, group_sizes):
+                for idx in shuffled[pos:pos + size]:
+                    perm_assignment[idx] = taxon
+                pos += size
+
+            # Compute intra and inter medians for this permutation
+            intra_sims: list[float] = []
+            inter_sims: list[float] = []
+            for ii, jj in combinations(valid_indices, 2):
+                ta = perm_assignment.get(ii, "")
+                tb = perm_assignment.get(jj, "")
+                if not ta or not tb:
+                    continue
+                if ta == tb:
+                    intra_sims.append(sim_mat[ii][jj])
+                else:
+                    inter_sims.append(sim_mat[ii][jj])
 
-    for _ in range(n_permutations):
-        # Shuffle valid_indices, then re-assign group labels by size
-        shuffled = valid_indices[:]
-        rng.shuffle(shuffled)
-        perm_assignment: dict[int, str] = {}
-        pos = 0
-        for taxon, size in zip(group_labels, group_sizes):
-            for idx in shuffled[pos:pos + size]:
-                perm_assignment[idx] = taxon
-            pos += size
-
-        # Compute intra and inter medians for this permutation
-        intra_sims: list[float] = []
-        inter_sims: list[float] = []
-        for ii, jj in combinations(valid_indices, 2):
-            ta = perm_assignment.get(ii, "")
-            tb = perm_assignment.get(jj, "")
-            if not ta or not tb:
+            if not intra_sims or not inter_sims:
                 continue
-            if ta == tb:
-                intra_sims.append(sim_mat[ii][jj])
-            else:
-                inter_sims.append(sim_mat[ii][jj])
-
-        if not intra_sims or not inter_sims:
-            continue
-        perm_stats.append(
-            statistics.median(intra_sims) - statistics.median(inter_sims)
-        )
+            perm_stats.append(
+                statistics.median(intra_sims) - statistics.median(inter_sims)
+            )
 
     if not perm_stats:
         return {
@@ -1026,6 +2075,63 @@ def permutation_test_rank(
     }
 
 
+def _permutation_stats_np(
+    sim_mat: list[list[float]],
+    indices: list[int],
+    labels: list[int],
+    n_permutations: int,
+    seed: "int | None",
+) -> list[float]:
+    """
+    Permuted T = intra_median − inter_median values, computed with NumPy.
+
+    The similarities of all pairs among *indices* are gathered once into a
+    condensed vector and sorted.  Shuffling labels preserves group sizes,
+    so every permutation has the same number of intra- and inter-group
+    pairs; each median is then the k-th selected element of the sorted
+    vector, found with a cumulative count over a batch of permuted label
+    arrays.  Returns an empty list when either pair class is empty.
+    """
+    import numpy as np
+    idx = np.asarray(indices, dtype=np.intp)
+    m   = idx.size
+    pi, pj = np.triu_indices(m, k=1)
+    sims  = np.asarray(sim_mat, dtype=np.float64)[idx[pi], idx[pj]]
+    order = np.argsort(sims, kind="stable")
+    sims, pi, pj = sims[order], pi[order], pj[order]
+
+    sizes   = np.bincount(np.asarray(labels, dtype=np.intp))
+    base    = np.asarray(labels,
+                         dtype=np.uint8 if sizes.size <= 256 else np.int32)
+    n_intra = int((sizes * (sizes - 1) // 2).sum())
+    n_inter = sims.size - n_intra
+    if not n_intra or not n_inter:
+        return []
+
+    def _median(cum: "np.ndarray", count: int) -> "np.ndarray":
+        # k-th selected element ⇔ first position where the running count > k
+        k  = count // 2
+        hi = sims[np.argmax(cum > k, axis=1)]
+        if count % 2:
+            return hi
+        return (sims[np.argmax(cum > k - 1, axis=1)] + hi) / 2
+
+    rng   = np.random.default_rng(seed)
+    batch = max(1, _NP_BLOCK_CELLS // sims.size)
+    ranks = np.arange(1, sims.size + 1, dtype=np.int32)
+    stats: list[float] = []
+    for start in range(0, n_permutations, batch):
+        b    = min(batch, n_permutations - start)
+        lab  = rng.permuted(np.broadcast_to(base, (b, m)), axis=1)
+        same = lab[:, pi] == lab[:, pj]
+        # A flat cumsum is much faster than cumsum(axis=1); rebase each row
+        cum  = np.cumsum(same.ravel(), dtype=np.int32).reshape(b, -1)
+        cum[1:] -= cum[:-1, -1:]
+        t    = _median(cum, n_intra) - _median(ranks - cum, n_inter)
+        stats.extend(t.tolist())
+    return stats
+
+
 def print_rank_conservation(result: dict, ids: list[str],
                              tax_map: dict[str, TaxInfo],
                              perm_result: "dict | None" = None,
@@ -1056,24 +2162,19 @@ def print_rank_conservation(result: dict, ids: list[str],
     print(f"  {'-'*30} {'-'*7} {'-'*6} {'-'*8}")
     for taxon, gdata in sorted(groups.items()):
         n_mem   = len(gdata["members"])
-        n_pairs = len(gdata["intra_pairs"])
+        n_pairs = intra_pair_count(gdata)
         med     = gdata["intra_median"]
         med_str = f"{med:.4f}" if med is not None else "  n/a"
         print(f"  {taxon:<30} {n_mem:>7} {n_pairs:>6} {med_str:>8}")
 
     # Between-group summary
-    inter_pairs = result["inter_pairs"]
-    if inter_pairs:
+    pair_stats = inter_pair_stats(result)
+    if pair_stats:
         print(f"\n  Between-{rank} median similarity")
         print(f"  {'Taxon A':<25} {'Taxon B':<25} {'Pairs':>6} {'Median':>8}")
         print(f"  {'-'*25} {'-'*25} {'-'*6} {'-'*8}")
-        # Collect per-(ta,tb) medians
-        inter_by_pair: dict[tuple, list[float]] = defaultdict(list)
-        for sim, ta, tb, _id1, _id2 in inter_pairs:
-            inter_by_pair[(ta, tb)].append(sim)
-        for (ta, tb), sims in sorted(inter_by_pair.items()):
-            med = statistics.median(sims)
-            print(f"  {ta:<25} {tb:<25} {len(sims):>6} {med:>8.4f}")
+        for (ta, tb), (n_pairs, med) in sorted(pair_stats.items()):
+            print(f"  {ta:<25} {tb:<25} {n_pairs:>6} {med:>8.4f}")
 
     # Overall summary
     print(f"\n  Overall summary")
@@ -1135,25 +2236,32 @@ def _build_heatmap_matrix(
         if gdata["intra_median"] is not None:
             mat[i][i] = gdata["intra_median"]
 
-    inter_sims: dict[tuple[int, int], list[float]] = defaultdict(list)
-    for sim, ta, tb, *_ in result["inter_pairs"]:
+    for (ta, tb), (_n, med) in inter_pair_stats(result).items():
         i, j = idx[ta], idx[tb]
-        inter_sims[(i, j)].append(sim)
-
-    for (i, j), sims in inter_sims.items():
-        med = statistics.median(sims)
         mat[i][j] = mat[j][i] = med
 
     return names, mat
 
 
-def plot_rank_heatmap(result: dict, path: str) -> None:
+def _png_b64(dpi: int = 150) -> str:
+    """Encode the current matplotlib figure as a base64 PNG string."""
+    import base64
+    import matplotlib.pyplot as plt
+    buf = io.BytesIO()
+    plt.savefig(buf, format="png", dpi=dpi, bbox_inches="tight")
+    return base64.b64encode(buf.getvalue()).decode()
+
+
+def plot_rank_heatmap(result: dict, path: "str | None" = None,
+                      png: bool = False) -> "str | None":
     """
     Save a colour-coded N×N heatmap of median pairwise similarity
     between (and within) taxon groups at the selected rank.
 
     Requires matplotlib (``pip install matplotlib``).  The output format
-    is inferred from the file extension (.png, .pdf, .svg, …).
+    is inferred from the file extension (.png, .pdf, .svg, …).  With
+    *png* the same figure is also returned as a base64 PNG for the HTML
+    report, so it is only drawn once; *path* may then be None.
 
     Layout
     ------
@@ -1173,12 +2281,13 @@ def plot_rank_heatmap(result: dict, path: str) -> None:
         import matplotlib.patches as mpatches
         import numpy as np
     except ImportError:
-        print(
-            "  Warning: matplotlib is not installed – heatmap skipped.\n"
-            "  Install it with:  pip install matplotlib",
-            file=sys.stderr,
-        )
-        return
+        if path:
+            print(
+                "  Warning: matplotlib is not installed – heatmap skipped.\n"
+                "  Install it with:  pip install matplotlib",
+                file=sys.stderr,
+            )
+        return None
 
     rank  = result["rank"]
     names, mat_lists = _build_heatmap_matrix(result)
@@ -1263,23 +2372,133 @@ def plot_rank_heatmap(result: dict, path: str) -> None:
     )
 
     plt.tight_layout()
+    b64 = None
     try:
-        plt.savefig(path, dpi=150, bbox_inches="tight")
+        if path:
+            with _atomic_path(path) as tmp:
+                plt.savefig(tmp, dpi=150, bbox_inches="tight")
+        if png:
+            b64 = _png_b64()
     except ValueError as exc:
         print(f"  Error saving heatmap: {exc}", file=sys.stderr)
         plt.close(fig)
-        return
+        return None
     plt.close(fig)
-    print(f"  Heatmap written to: {path}")
+    if path:
+        print(f"  Heatmap written to: {path}")
+    return b64
+
+
+# ---------------------------------------------------------------------------
+# Hierarchical clustering
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ClusteringResult:
+    """
+    One hierarchical clustering, shared by every tree output.
+
+    *Z* is the scipy linkage matrix for the leaves *ids*; row ``i`` merges
+    clusters ``Z[i, 0]`` and ``Z[i, 1]`` at height ``Z[i, 2]`` into cluster
+    ``len(ids) + i``.
+    """
+    ids: list[str]
+    Z: "object"             # numpy.ndarray, shape (n − 1, 4)
+    method: str = "average"
+
+    @property
+    def n(self) -> int:
+        return len(self.ids)
+
+    @property
+    def root_height(self) -> float:
+        return float(self.Z[-1][2])
+
+    def height(self, node_id: int) -> float:
+        """Clustering height of *node_id* (0 for leaves)."""
+        return 0.0 if node_id < self.n else float(self.Z[node_id - self.n][2])
+
+    def children(self, node_id: int) -> tuple[int, int]:
+        row = self.Z[node_id - self.n]
+        return int(row[0]), int(row[1])
+
+
+def condensed_distances(sim_mat) -> "object":
+    """
+    Condensed float64 distance vector (1 − similarity) of a square matrix.
+
+    Only the upper triangle is read, row-major, exactly as
+    ``scipy.spatial.distance.squareform`` lays it out; floating-point
+    negatives are clipped to 0.
+    """
+    import numpy as np
+    sim = np.asarray(sim_mat, dtype=np.float64)
+    iu  = np.triu_indices(sim.shape[0], k=1)
+    return np.clip(1.0 - sim[iu], 0.0, None)
+
+
+def cluster_similarity(
+    ids: list[str],
+    sim_mat: list[list[float]],
+    method: str = "average",
+) -> "ClusteringResult | None":
+    """
+    Cluster *ids* on distance = 1 − similarity with the given linkage method.
+
+    Returns ``None`` for fewer than 2 leaves or when scipy is not installed;
+    the tree exporters report those cases themselves.
+    """
+    if len(ids) < 2:
+        return None
+    try:
+        from scipy.cluster.hierarchy import linkage
+    except ImportError:
+        return None
+    Z = linkage(condensed_distances(sim_mat), method=method)
+    return ClusteringResult(ids=list(ids), Z=Z, method=method)
+
+
+def _tree_tokens(cl: ClusteringResult, leaf, open_, sep, close):
+    """
+    Walk the tree of *cl* depth-first without recursion.
+
+    Yields the strings produced by the callbacks in document order:
+    ``leaf(node_id, branch_length, depth)`` for leaves,
+    ``open_(branch_length, depth)`` / ``close(branch_length, depth)`` around
+    internal nodes and ``sep(depth)`` between the two children.  Branch
+    lengths are the height difference to the parent (0 at the root).
+    """
+    stack: list = [(cl.n + len(cl.Z) - 1, cl.root_height, 0)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            yield item
+            continue
+        node_id, parent_height, depth = item
+        bl = parent_height - cl.height(node_id)
+        if node_id < cl.n:
+            yield leaf(node_id, bl, depth)
+            continue
+        left, right = cl.children(node_id)
+        height = cl.height(node_id)
+        yield open_(bl, depth)
+        stack.append(close(bl, depth))
+        stack.append((right, height, depth + 1))
+        between = sep(depth)
+        if between:
+            stack.append(between)
+        stack.append((left, height, depth + 1))
 
 
 def plot_dendrogram(
     ids: list[str],
     sim_mat: list[list[float]],
-    path: str,
+    path: "str | None",
     method: str = "average",
     title: "str | None" = None,
-) -> None:
+    clustering: "ClusteringResult | None" = None,
+    png: bool = False,
+) -> "str | None":
     """
     Save a hierarchical-clustering dendrogram.
 
@@ -1287,48 +2506,44 @@ def plot_dendrogram(
     the matrix has been pre-aggregated by ``group_sim_matrix()``.
     Distance = 1 − similarity.  Linkage method is *average* (UPGMA) by
     default; any method accepted by ``scipy.cluster.hierarchy.linkage``
-    is valid (single, complete, ward, …).
+    is valid (single, complete, ward, …).  A precomputed *clustering*
+    (see ``cluster_similarity``) is used as-is instead of re-clustering.
 
     Requires matplotlib and scipy (``pip install matplotlib scipy``).
-    The output format is inferred from the file extension.
+    The output format is inferred from the file extension.  *png* returns
+    a base64 PNG as well, as in ``plot_rank_heatmap``.
     """
     try:
         import matplotlib
         matplotlib.use("Agg")
         import matplotlib.pyplot as plt
     except ImportError:
-        print(
-            "  Warning: matplotlib is not installed – dendrogram skipped.\n"
-            "  Install it with:  pip install matplotlib scipy",
-            file=sys.stderr,
-        )
-        return
+        if path:
+            print(
+                "  Warning: matplotlib is not installed – dendrogram skipped.\n"
+                "  Install it with:  pip install matplotlib scipy",
+                file=sys.stderr,
+            )
+        return None
     try:
-        from scipy.spatial.distance import squareform
-        from scipy.cluster.hierarchy import linkage, dendrogram
+        from scipy.cluster.hierarchy import dendrogram
     except ImportError:
-        print(
-            "  Warning: scipy is not installed – dendrogram skipped.\n"
-            "  Install it with:  pip install scipy",
-            file=sys.stderr,
-        )
-        return
+        if path:
+            print(
+                "  Warning: scipy is not installed – dendrogram skipped.\n"
+                "  Install it with:  pip install scipy",
+                file=sys.stderr,
+            )
+        return None
 
+    if clustering is None:
+        clustering = cluster_similarity(ids, sim_mat, method)
+    if clustering is None:
+        if path:
+            print("  Note: dendrogram requires at least 2 sequences – skipped.")
+        return None
+    ids, Z, method = clustering.ids, clustering.Z, clustering.method
     n = len(ids)
-    if n < 2:
-        print("  Note: dendrogram requires at least 2 sequences – skipped.")
-        return
-
-    # Build condensed distance matrix (upper triangle, row-major)
-    import numpy as np
-    dist_sq = np.array([[1.0 - sim_mat[i][j] for j in range(n)]
-                        for i in range(n)], dtype=float)
-    np.fill_diagonal(dist_sq, 0.0)
-    # clip any floating-point negatives
-    dist_sq = np.clip(dist_sq, 0.0, None)
-    condensed = squareform(dist_sq, checks=False)
-
-    Z = linkage(condensed, method=method)
 
     fig_h = max(4.0, 1.8 + n * 0.35)
     fig, ax = plt.subplots(figsize=(8, fig_h))
@@ -1351,14 +2566,47 @@ def plot_dendrogram(
     ax.spines[["top", "right"]].set_visible(False)
 
     plt.tight_layout()
+    b64 = None
     try:
-        plt.savefig(path, dpi=150, bbox_inches="tight")
+        if path:
+            with _atomic_path(path) as tmp:
+                plt.savefig(tmp, dpi=150, bbox_inches="tight")
+        if png:
+            b64 = _png_b64()
     except ValueError as exc:
         print(f"  Error saving dendrogram: {exc}", file=sys.stderr)
         plt.close(fig)
-        return
+        return None
     plt.close(fig)
-    print(f"  Dendrogram written to: {path}")
+    if path:
+        print(f"  Dendrogram written to: {path}")
+    return b64
+
+
+def _linkage_to_phyloxml_clades(cl: ClusteringResult, depth: int) -> list[str]:
+    """Indented ``<clade>`` lines for the tree of *cl*, built iteratively."""
+    from xml.sax.saxutils import escape
+
+    def _pad(d: int) -> str:
+        return "  " * (depth + d)
+
+    def _bl(bl: float, d: int) -> str:
+        return (f"{_pad(d + 1)}<branch_length>{bl:.8f}</branch_length>\n"
+                if bl > 1e-10 else "")
+
+    # PhyloXML schema order within <clade>: name?, branch_length?, …, clade*
+    def _leaf(node_id: int, bl: float, d: int) -> str:
+        return (f"{_pad(d)}<clade>\n"
+                f"{_pad(d + 1)}<name>{escape(cl.ids[node_id])}</name>\n"
+                f"{_bl(bl, d)}{_pad(d)}</clade>\n")
+
+    return list(_tree_tokens(
+        cl,
+        leaf=_leaf,
+        open_=lambda bl, d: f"{_pad(d)}<clade>\n{_bl(bl, d)}",
+        sep=lambda d: "",
+        close=lambda bl, d: f"{_pad(d)}</clade>\n",
+    ))
 
 
 def export_phyloxml(
@@ -1366,23 +2614,22 @@ def export_phyloxml(
     sim_mat: list[list[float]],
     path: str,
     method: str = "average",
+    clustering: "ClusteringResult | None" = None,
 ) -> None:
     """
     Export the hierarchical clustering tree as a PhyloXML file.
 
     Uses the same distance matrix (1 − similarity) and linkage method as
-    ``plot_dendrogram``.  Branch lengths represent the difference in
-    clustering height between a node and its parent (i.e. the additional
-    distance accumulated at each merge).
+    ``plot_dendrogram``, or the precomputed *clustering*.  Branch lengths
+    represent the difference in clustering height between a node and its
+    parent (i.e. the additional distance accumulated at each merge).
 
     Requires scipy (``pip install scipy``).  The output is a valid
     PhyloXML 1.10 document readable by tools such as Archaeopteryx,
     FigTree, Biopython, and iTOL.
     """
     try:
-        from scipy.spatial.distance import squareform
-        from scipy.cluster.hierarchy import linkage
-        import numpy as np
+        import scipy.cluster.hierarchy  # noqa: F401
     except ImportError:
         print(
             "  Warning: scipy is not installed – PhyloXML export skipped.\n"
@@ -1391,72 +2638,33 @@ def export_phyloxml(
         )
         return
 
-    n = len(ids)
-    if n < 2:
+    if clustering is None:
+        clustering = cluster_similarity(ids, sim_mat, method)
+    if clustering is None:
         print("  Note: PhyloXML export requires at least 2 sequences – skipped.")
         return
 
-    dist_sq = np.array([[1.0 - sim_mat[i][j] for j in range(n)]
-                        for i in range(n)], dtype=float)
-    np.fill_diagonal(dist_sq, 0.0)
-    dist_sq = np.clip(dist_sq, 0.0, None)
-    Z = linkage(squareform(dist_sq, checks=False), method=method)
-
-    # ── recursively build <clade> elements ──────────────────────────────────
-    def _clade(node_id: int, parent_height: float) -> ET.Element:
-        # PhyloXML schema order within <clade>: name?, branch_length?, …, clade*
-        elem = ET.Element("clade")
-        if node_id < n:
-            # Leaf: name then branch_length (no children)
-            ET.SubElement(elem, "name").text = ids[node_id]
-            bl = parent_height      # leaf height is 0
-            if bl > 1e-10:
-                ET.SubElement(elem, "branch_length").text = f"{bl:.8f}"
-        else:
-            # Internal node: branch_length first, then child clades
-            row    = Z[node_id - n]
-            height = float(row[2])
-            bl     = parent_height - height
-            if bl > 1e-10:
-                ET.SubElement(elem, "branch_length").text = f"{bl:.8f}"
-            elem.append(_clade(int(row[0]), height))
-            elem.append(_clade(int(row[1]), height))
-        return elem
-
-    root_id     = n + len(Z) - 1
-    root_height = float(Z[-1][2])
-
     # ── assemble PhyloXML document ───────────────────────────────────────────
-    phyloxml = ET.Element("phyloxml")
-    phyloxml.set("xmlns",              "http://www.phyloxml.org")
-    phyloxml.set("xmlns:xsi",          "http://www.w3.org/2001/XMLSchema-instance")
-    phyloxml.set("xsi:schemaLocation", (
-        "http://www.phyloxml.org "
-        "http://www.phyloxml.org/1.10/phyloxml.xsd"
-    ))
-
-    phylogeny = ET.SubElement(phyloxml, "phylogeny")
-    phylogeny.set("rooted", "true")
-    ET.SubElement(phylogeny, "name").text = (
-        f"Hierarchical clustering ({method} linkage)"
-    )
-    ET.SubElement(phylogeny, "description").text = (
-        "Branch lengths are clustering-height differences (distance = 1 − similarity)."
-    )
-    phylogeny.append(_clade(root_id, root_height))
-
-    # indent if Python ≥ 3.9, otherwise write flat
-    try:
-        ET.indent(phyloxml, space="  ")
-    except AttributeError:
-        pass
-
+    # Written line by line (not via ElementTree, whose indent/serialise
+    # steps recurse) so that deep trees with >10k leaves work.
+    from xml.sax.saxutils import escape
     out = pathlib.Path(path)
     out.parent.mkdir(parents=True, exist_ok=True)
-    with open(out, "w", encoding="utf-8") as fh:
+    with _atomic_path(out) as tmp, open(tmp, "w", encoding="utf-8") as fh:
         fh.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-        fh.write(ET.tostring(phyloxml, encoding="unicode"))
-        fh.write("\n")
+        fh.write(
+            '<phyloxml xmlns="http://www.phyloxml.org" '
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+            'xsi:schemaLocation="http://www.phyloxml.org '
+            'http://www.phyloxml.org/1.10/phyloxml.xsd">\n'
+        )
+        fh.write('  <phylogeny rooted="true">\n')
+        fh.write(f"    <name>Hierarchical clustering "
+                 f"({escape(clustering.method)} linkage)</name>\n")
+        fh.write("    <description>Branch lengths are clustering-height "
+                 "differences (distance = 1 − similarity).</description>\n")
+        fh.writelines(_linkage_to_phyloxml_clades(clustering, depth=2))
+        fh.write("  </phylogeny>\n</phyloxml>\n")
     print(f"  PhyloXML written to: {path}")
 
 
@@ -1465,28 +2673,21 @@ def export_phyloxml(
 # ---------------------------------------------------------------------------
 
 def _linkage_to_newick(Z, ids: list[str]) -> str:
-    """Convert a scipy linkage matrix *Z* to a Newick string."""
-    n = len(ids)
-
+    """Convert a scipy linkage matrix *Z* to a Newick string (iteratively)."""
     # Characters illegal in Newick leaf labels → replaced with _
     _BAD = str.maketrans("(),:;[] ", "________")
 
-    def _node(node_id: int, parent_height: float) -> str:
-        if node_id < n:
-            bl = parent_height
-            name = ids[node_id].translate(_BAD)
-            return f"{name}:{bl:.8f}" if bl > 1e-10 else name
-        row = Z[node_id - n]
-        height = float(row[2])
-        bl = parent_height - height
-        left  = _node(int(row[0]), height)
-        right = _node(int(row[1]), height)
-        bl_str = f":{bl:.8f}" if bl > 1e-10 else ""
-        return f"({left},{right}){bl_str}"
+    def _bl(bl: float) -> str:
+        return f":{bl:.8f}" if bl > 1e-10 else ""
 
-    root_id = n + len(Z) - 1
-    root_height = float(Z[-1][2])
-    return _node(root_id, root_height) + ";"
+    cl = ClusteringResult(ids=ids, Z=Z)
+    return "".join(_tree_tokens(
+        cl,
+        leaf=lambda node_id, bl, d: cl.ids[node_id].translate(_BAD) + _bl(bl),
+        open_=lambda bl, d: "(",
+        sep=lambda d: ",",
+        close=lambda bl, d: ")" + _bl(bl),
+    )) + ";"
 
 
 def export_newick(
@@ -1494,18 +2695,17 @@ def export_newick(
     sim_mat: list[list[float]],
     path: str,
     method: str = "average",
+    clustering: "ClusteringResult | None" = None,
 ) -> None:
     """
     Export the hierarchical clustering tree as a Newick string.
 
     Uses the same distance matrix (1 − similarity) and linkage method as
-    ``plot_dendrogram`` and ``export_phyloxml``.
-    Requires scipy (``pip install scipy``).
+    ``plot_dendrogram`` and ``export_phyloxml``, or the precomputed
+    *clustering*.  Requires scipy (``pip install scipy``).
     """
     try:
-        from scipy.spatial.distance import squareform
-        from scipy.cluster.hierarchy import linkage
-        import numpy as np
+        import scipy.cluster.hierarchy  # noqa: F401
     except ImportError:
         print(
             "  Warning: scipy is not installed – Newick export skipped.\n"
@@ -1514,20 +2714,15 @@ def export_newick(
         )
         return
 
-    n = len(ids)
-    if n < 2:
+    if clustering is None:
+        clustering = cluster_similarity(ids, sim_mat, method)
+    if clustering is None:
         print("  Note: Newick export requires at least 2 sequences – skipped.")
         return
 
-    dist_sq = np.array([[1.0 - sim_mat[i][j] for j in range(n)]
-                        for i in range(n)], dtype=float)
-    np.fill_diagonal(dist_sq, 0.0)
-    dist_sq = np.clip(dist_sq, 0.0, None)
-    Z = linkage(squareform(dist_sq, checks=False), method=method)
-
-    nwk = _linkage_to_newick(Z, ids)
+    nwk = _linkage_to_newick(clustering.Z, clustering.ids)
     pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w") as fh:
+    with _atomic_path(path) as tmp, open(tmp, "w") as fh:
         fh.write(nwk + "\n")
     print(f"  Newick tree written to: {path}")
 
@@ -1674,6 +2869,148 @@ def _norm_score(a: str, b: str,
     return max(0.0, (s - mat_min) / denom)
 
 
+class CompiledMatrix:
+    """
+    A substitution matrix compiled for fast repeated scoring.
+
+    Residues are mapped to dense indices ``0 … k-1`` (upper- and lower-case
+    letters share an index); every other character, gaps included, maps to
+    the sentinel index ``k``.  Normalized scores (the ``_norm_score``
+    values) are precomputed for every index pair, so scoring a residue
+    pair is a single table lookup instead of nested dict lookups.
+
+    Scalar API      ``score(a, b)``, ``norm_score(a, b)``
+    Vectorized API  ``encode(seq)``, ``score_pairs(ia, ib)``,
+                    ``norm_pairs(ia, ib)`` (require NumPy)
+
+    ``scores`` is the raw int16 (k+1)×(k+1) table, ``norm`` / ``valid``
+    the flattened normalized-score and availability tables used by the
+    NumPy engine; all three are None when NumPy is not installed.
+    """
+
+    def __init__(self, matrix: dict[str, dict[str, int]],
+                 mat_min: "int | None" = None) -> None:
+        alpha = [a for a in matrix if len(a) == 1 and a not in GAP]
+        k     = len(alpha)
+        width = k + 1
+
+        self.alphabet: list[str] = alpha
+        self.k     = k
+        self.width = width
+        self.min   = _matrix_min(matrix) if mat_min is None else mat_min
+        self.max   = max(v for row in matrix.values() for v in row.values())
+        self.self_scores: list[int] = [
+            matrix[a].get(a, self.min) for a in alpha
+        ]
+
+        self.index: dict[str, int] = {}
+        for i, a in enumerate(alpha):
+            self.index[a] = i
+            self.index.setdefault(a.lower(), i)   # _score_window upper-cases
+
+        raw:  list[int]            = [0] * (width * width)
+        norm: list["float | None"] = [None] * (width * width)
+        for i, a in enumerate(alpha):
+            row = matrix[a]
+            for j, b in enumerate(alpha):
+                s = row.get(b)
+                if s is None:
+                    continue
+                raw[i * width + j]  = s
+                norm[i * width + j] = _norm_score(a, b, matrix, self.min)
+        self._raw  = raw
+        self._norm = norm
+
+        self.lut = self.scores = self.norm = self.valid = None
+        try:
+            import numpy as np
+        except ImportError:
+            return
+        lut = np.full(256, k, dtype=np.uint8)
+        for ch, i in self.index.items():
+            if ch.isascii():
+                lut[ord(ch)] = i
+        self.lut    = lut
+        self.scores = np.array(raw, dtype=np.int16).reshape(width, width)
+        self.valid  = np.array([v is not None for v in norm], dtype=bool)
+        self.norm   = np.array([0.0 if v is None else v for v in norm],
+                               dtype=np.float64)
+
+    @classmethod
+    def from_arrays(cls, k: int, norm, valid) -> "CompiledMatrix":
+        """Rebuild a vectorized-only matrix from flat ``norm`` / ``valid``."""
+        self = cls.__new__(cls)
+        self.k, self.width = k, k + 1
+        self.lut = self.scores = None
+        self.norm, self.valid = norm, valid
+        return self
+
+    # ── scalar API ─────────────────────────────────────────────────────────
+
+    def score(self, a: str, b: str) -> "int | None":
+        """Raw substitution score for (a, b), or None if either is unknown."""
+        ia = self.index.get(a)
+        ib = self.index.get(b)
+        if ia is None or ib is None or self._norm[ia * self.width + ib] is None:
+            return None
+        return self._raw[ia * self.width + ib]
+
+    def norm_score(self, a: str, b: str) -> "float | None":
+        """Same value as ``_norm_score(a, b, matrix, mat_min)``."""
+        ia = self.index.get(a)
+        ib = self.index.get(b)
+        if ia is None or ib is None:
+            return None
+        return self._norm[ia * self.width + ib]
+
+    # ── vectorized API (NumPy) ─────────────────────────────────────────────
+
+    def encode(self, seq: str):
+        """Encode *seq* as a uint8 array of dense residue indices."""
+        import numpy as np
+        raw = np.frombuffer(seq.encode("ascii", "replace"), dtype=np.uint8)
+        return self.lut[raw]
+
+    def score_pairs(self, ia, ib):
+        """Raw int16 scores for index arrays *ia*, *ib* (broadcastable)."""
+        return self.scores[ia, ib]
+
+    def norm_pairs(self, ia, ib):
+        """
+        Normalized scores and availability mask for index arrays *ia*, *ib*.
+
+        Unavailable pairs (unknown residues, gaps) score 0.0 and are False
+        in the returned mask.
+        """
+        import numpy as np
+        pair = np.asarray(ia, dtype=np.intp) * self.width + ib
+        return self.norm[pair], self.valid[pair]
+
+
+# Compiled forms of dict matrices passed to the public scoring functions
+_COMPILED_CACHE: dict[tuple[int, int], tuple[dict, CompiledMatrix]] = {}
+
+
+def compile_matrix(
+    matrix: "dict[str, dict[str, int]] | CompiledMatrix | None",
+    mat_min: "int | None" = None,
+) -> "CompiledMatrix | None":
+    """
+    Return *matrix* as a ``CompiledMatrix`` (None stays None for Hamming).
+
+    Dict matrices are compiled once and memoised, so callers that still
+    pass the ``load_matrix`` dict pay the compilation cost only once.
+    """
+    if matrix is None or isinstance(matrix, CompiledMatrix):
+        return matrix
+    key = (id(matrix), mat_min if mat_min is not None else _matrix_min(matrix))
+    hit = _COMPILED_CACHE.get(key)
+    if hit is None or hit[0] is not matrix:
+        hit = (matrix, CompiledMatrix(matrix, key[1]))
+        _COMPILED_CACHE[key] = hit
+    return hit[1]
+
+
 # ---------------------------------------------------------------------------
 # Similarity metric
 # ---------------------------------------------------------------------------
@@ -1706,7 +3043,7 @@ def _hamming_sim_window(seq1: str, seq2: str) -> float:
 
 
 def _score_window(seq1: str, seq2: str,
-                  matrix: "dict | None" = None,
+                  matrix: "CompiledMatrix | dict | None" = None,
                   mat_min: int = 0) -> float:
     """
     Score a same-length window using the chosen scoring scheme.
@@ -1719,18 +3056,24 @@ def _score_window(seq1: str, seq2: str,
     if matrix is None:
         return _hamming_sim_window(seq1, seq2)
 
+    cm    = compile_matrix(matrix, mat_min)
+    index = cm.index
+    norm  = cm._norm
+    width = cm.width
     scores: list[float] = []
-    for a, b in zip(seq1.upper(), seq2.upper()):
-        if a in GAP or b in GAP:
+    for a, b in zip(seq1, seq2):
+        ia = index.get(a)
+        ib = index.get(b)
+        if ia is None or ib is None:        # gaps and unknown residues
             continue
-        ns = _norm_score(a, b, matrix, mat_min)
+        ns = norm[ia * width + ib]
         if ns is not None:
             scores.append(ns)
     return sum(scores) / len(scores) if scores else 0.0
 
 
 def sliding_best_similarity(seq1: str, seq2: str,
-                             matrix: "dict | None" = None,
+                             matrix: "CompiledMatrix | dict | None" = None,
                              mat_min: int = 0) -> tuple[float, int]:
     """
     Slide the shorter sequence along the longer and return the best similarity.
@@ -1754,10 +3097,11 @@ def sliding_best_similarity(seq1: str, seq2: str,
     if S == 0:
         return 0.0, 0
 
+    cm = compile_matrix(matrix, mat_min)
     best_sim = -1.0
     best_off = 0
     for off in range(L - S + 1):
-        sim = _score_window(short, long_[off: off + S], matrix, mat_min)
+        sim = _score_window(short, long_[off: off + S], cm)
         if sim > best_sim:
             best_sim = sim
             best_off = off
@@ -1771,16 +3115,247 @@ def hamming_similarity(seq1: str, seq2: str) -> float:
     return sim
 
 
+# ---------------------------------------------------------------------------
+# Similarity metric – NumPy engine
+# ---------------------------------------------------------------------------
+#
+# The functions above are the pure-Python reference implementation.  The
+# engine below produces the same (similarity, offset) results but encodes
+# every sequence once as a uint8 array and scores all offsets of a pair in
+# a handful of vectorized operations.
+
+ENGINE_CHOICES = ["auto", "numpy", "python"]
+
+# Upper bound on offsets × window cells scored in one vectorized block
+_NP_BLOCK_CELLS = 1 << 22
+
+# Code reserved for gap characters in Hamming-mode encodings
+_NP_GAP_CODE = 0
+
+
+def _use_numpy(engine: str) -> bool:
+    """
+    Decide whether the NumPy engine should be used for *engine*.
+
+    'auto' uses NumPy when it is importable, 'python' never does, and
+    'numpy' raises ValueError with an install hint when it is missing.
+    """
+    if engine == "python":
+        return False
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        if engine == "numpy":
+            raise ValueError(
+                "--engine numpy requires NumPy.\n"
+                "  pip install numpy          (or use --engine python)"
+            )
+        return False
+    return True
+
+
+def encode_sequence(seq: str, cm: "CompiledMatrix | None" = None):
+    """
+    Encode *seq* as a NumPy array for the vectorized engine.
+
+    Hamming (cm is None): one code per character, with the gap characters
+    (- .) mapped to 0.  Substitution matrix: dense residue indices from
+    ``CompiledMatrix.encode``.
+    """
+    import numpy as np
+
+    if cm is not None:
+        return cm.encode(seq)
+    if seq.isascii():
+        codes = np.frombuffer(seq.encode("ascii"), dtype=np.uint8).copy()
+    else:
+        codes = np.fromiter(map(ord, seq), dtype=np.uint32, count=len(seq))
+    codes[(codes == ord("-")) | (codes == ord("."))] = _NP_GAP_CODE
+    return codes
+
+
+def _window_scores_np(short, windows, cm: "CompiledMatrix | None"):
+    """
+    Score *short* against every row of *windows* (offsets × len(short)).
+
+    Mirrors ``_score_window``: per-position normalized scores are summed
+    left to right (``cumsum``) so the result matches the reference sum.
+    """
+    import numpy as np
+
+    if cm is None:
+        ok   = (windows != _NP_GAP_CODE) & (short != _NP_GAP_CODE)
+        comp = np.count_nonzero(ok, axis=1)
+        mism = np.count_nonzero(ok & (windows != short), axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sims = 1.0 - mism / comp
+    else:
+        vals, ok = cm.norm_pairs(short, windows)
+        comp  = np.count_nonzero(ok, axis=1)
+        total = np.cumsum(vals, axis=1)[:, -1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sims = total / comp
+    return np.where(comp > 0, sims, 0.0)
+
+
+def sliding_best_encoded(enc1, enc2,
+                         cm: "CompiledMatrix | None" = None) -> tuple[float, int]:
+    """
+    NumPy counterpart of ``sliding_best_similarity`` for encoded sequences.
+
+    All offsets are scored at once through a strided view of the longer
+    sequence, in blocks of at most ``_NP_BLOCK_CELLS`` cells.  Returns the
+    same ``(best_similarity, best_offset)`` as the reference, including
+    the first-offset tie-break.
+    """
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    if len(enc1) >= len(enc2):
+        long_, short = enc1, enc2
+    else:
+        long_, short = enc2, enc1
+
+    L, S = len(long_), len(short)
+    if S == 0:
+        return 0.0, 0
+
+    windows  = sliding_window_view(long_, S)
+    n_off    = L - S + 1
+    step     = max(1, _NP_BLOCK_CELLS // S)
+    best_sim = -1.0
+    best_off = 0
+    for start in range(0, n_off, step):
+        sims = _window_scores_np(short, windows[start:start + step], cm)
+        k    = int(sims.argmax())
+        if sims[k] > best_sim:
+            best_sim = float(sims[k])
+            best_off = start + k
+    return best_sim, best_off
+
+
+def sliding_best_similarity_np(seq1: str, seq2: str,
+                               matrix: "CompiledMatrix | dict | None" = None,
+                               mat_min: int = 0) -> tuple[float, int]:
+    """Drop-in NumPy version of ``sliding_best_similarity`` for one pair."""
+    cm = compile_matrix(matrix, mat_min)
+    return sliding_best_encoded(encode_sequence(seq1, cm),
+                                encode_sequence(seq2, cm), cm)
+
+
+# ---------------------------------------------------------------------------
+# Aligned Hamming kernel (all pairs at once)
+# ---------------------------------------------------------------------------
+#
+# Equal-length sequences under Hamming scoring have a single offset, so a
+# pair reduces to two counts: columns where neither residue is a gap, and
+# columns where both carry the same residue.  Each sequence is expanded
+# into 0/1 indicators – one per non-gap column, and one per (column,
+# residue) class occurring in at least two sequences – and the counts of
+# all pairs are dot products of those bitsets, accumulated by BLAS in
+# blocks of columns.  The counts are small integers and exact in float32,
+# so the scores equal ``_hamming_sim_window`` bit for bit.
+
+
+def _use_aligned_kernel(enc: list, cm: "CompiledMatrix | None") -> bool:
+    """True when *enc* can be scored by ``aligned_hamming_matrix``."""
+    return cm is None and len(enc) > 1 and len({len(e) for e in enc}) == 1
+
+
+def _residue_classes(codes) -> "tuple[object, object]":
+    """
+    ``(columns, residues)`` of every non-gap residue class of the n×L
+    *codes* that occurs in at least two rows; singletons cannot match.
+    """
+    import numpy as np
+
+    cols: list = []
+    res:  list = []
+    for code in np.unique(codes):
+        if code == _NP_GAP_CODE:
+            continue
+        hit = np.flatnonzero(np.count_nonzero(codes == code, axis=0) > 1)
+        cols.append(hit)
+        res.append(np.full(len(hit), code, dtype=codes.dtype))
+    if not cols:
+        return np.zeros(0, np.int64), np.zeros(0, codes.dtype)
+    return np.concatenate(cols), np.concatenate(res)
+
+
+def aligned_hamming_matrix(codes, out=None):
+    """
+    Hamming similarity of every pair of rows of the n×L array *codes*.
+
+    *codes* holds equal-length sequences from ``encode_sequence`` (gaps
+    are 0).  Comparable-column and identical-column counts come from
+    indicator dot products (see above), in blocks of at most
+    ``_NP_BLOCK_CELLS`` indicator cells; the score is
+    ``1 - (comparable - identical) / comparable``, 0.0 without comparable
+    columns, and the diagonal is 1.
+
+    Returns an n×n float64 array.  With *out* (an n×n memmap) the rows are
+    computed and written in blocks instead, and *out* is returned, so the
+    count accumulators stay at a few MB however large n is.
+    """
+    import numpy as np
+
+    n, L  = codes.shape
+    cols, res = _residue_classes(codes)
+    width = max(64, _NP_BLOCK_CELLS // max(1, n))
+    step  = n if out is None else max(1, _NP_BLOCK_CELLS // max(1, n))
+    sim_all = np.empty((n, n), dtype=np.float64) if out is None else out
+    for r0 in range(0, n, step):
+        r1   = min(n, r0 + step)
+        comp = np.zeros((r1 - r0, n), dtype=np.float32)
+        same = np.zeros((r1 - r0, n), dtype=np.float32)
+        for c0 in range(0, L, width):
+            g = (codes[:, c0:c0 + width] != _NP_GAP_CODE).astype(np.float32)
+            comp += g[r0:r1] @ g.T
+        for k0 in range(0, len(cols), width):
+            x = (codes[:, cols[k0:k0 + width]]
+                 == res[k0:k0 + width]).astype(np.float32)
+            same += x[r0:r1] @ x.T
+        comp = comp.astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sim = np.where(comp > 0, 1.0 - (comp - same) / comp, 0.0)
+        sim[np.arange(r1 - r0), np.arange(r0, r1)] = 1.0
+        sim_all[r0:r1] = sim
+    return sim_all
+
+
 # ---------------------------------------------------------------------------
 # Conservation calculations
 # ---------------------------------------------------------------------------
 
 def pairwise_matrix(seqs: list[str],
-                    matrix: "dict | None" = None,
-                    mat_min: int = 0) -> tuple[list[list[float]], list[list[int]]]:
+                    matrix: "CompiledMatrix | dict | None" = None,
+                    mat_min: int = 0,
+                    engine: str = "auto",
+                    jobs: int = 1,
+                    scratch_dir: "str | None" = None,
+                    store: "PairScoreStore | None" = None,
+                    context: str = "",
+                    ) -> tuple[list[list[float]], list[list[int]]]:
     """
     Compute all pairwise sliding-best similarities.
 
+    *engine* selects the implementation (see ``ENGINE_CHOICES``): the
+    NumPy engine encodes every sequence once up front; 'python' uses the
+    reference ``sliding_best_similarity`` for every pair.  Equal-length
+    sequences under Hamming scoring (aligned mode) are scored all at once
+    by ``aligned_hamming_matrix``; their offsets are all 0.
+
+    With *jobs* > 1 (NumPy engine only) the pairs are scored by a process
+    pool reading from shared memory; see ``_pairwise_matrix_parallel``.
+    Results are identical to the serial path.
+
+    With *scratch_dir* set (NumPy engine only) the matrices are returned as
+    float32 / int32 ``numpy.memmap`` arrays backed by files in that
+    directory instead of lists of lists; see ``_pairwise_matrix_memmap``.
+
+    With a *store* (in-memory matrices only) pairs already scored under the
+    same *context* are read back and only the remaining pairs are
+    computed; see ``_pairwise_matrix_cached``.
+
     Returns
     -------
     sim_mat : n×n float matrix  – similarity scores (Hamming or substitution)
@@ -1789,10 +3364,35 @@ def pairwise_matrix(seqs: list[str],
                                   longer.  Diagonal entries are 0.
     """
     n = len(seqs)
+    if scratch_dir is not None:
+        if not _use_numpy(engine):
+            raise ValueError("the memory-mapped similarity matrix requires "
+                             "the NumPy engine")
+        cm = compile_matrix(matrix, mat_min)
+        return _pairwise_matrix_memmap(
+            [encode_sequence(s, cm) for s in seqs], cm, jobs, scratch_dir)
+    if store is not None:
+        return _pairwise_matrix_cached(seqs, matrix, mat_min, engine, jobs,
+                                       store, context)
     sim_mat = [[0.0] * n for _ in range(n)]
     off_mat = [[0]   * n for _ in range(n)]
     for i in range(n):
         sim_mat[i][i] = 1.0
+    if _use_numpy(engine):
+        cm  = compile_matrix(matrix, mat_min)
+        enc = [encode_sequence(s, cm) for s in seqs]
+        if _use_aligned_kernel(enc, cm):
+            import numpy as np
+            return (aligned_hamming_matrix(np.stack(enc)).tolist(), off_mat)
+        if jobs > 1 and n > 2:
+            return _pairwise_matrix_parallel(enc, cm, jobs)
+        for i, j in combinations(range(n), 2):
+            sim, off = sliding_best_encoded(enc[i], enc[j], cm)
+            sim_mat[i][j] = sim_mat[j][i] = sim
+            off_mat[i][j] = off_mat[j][i] = off
+        return sim_mat, off_mat
+    if jobs > 1:
+        _log.warning("--jobs requires the NumPy engine; computing serially.")
     for i, j in combinations(range(n), 2):
         sim, off = sliding_best_similarity(seqs[i], seqs[j], matrix, mat_min)
         sim_mat[i][j] = sim_mat[j][i] = sim
@@ -1800,9 +3400,631 @@ def pairwise_matrix(seqs: list[str],
     return sim_mat, off_mat
 
 
+# ---------------------------------------------------------------------------
+# Parallel pairwise scoring (multiprocessing + shared memory)
+# ---------------------------------------------------------------------------
+
+# Blocks handed out per worker; >1 lets the pool even out uneven block costs
+_BLOCKS_PER_JOB = 8
+
+# Per-process views onto the shared arrays, set up by _pairwise_worker_init
+_WORKER_STATE: dict = {}
+
+
+def _pairwise_blocks(n: int, n_blocks: int) -> list[tuple[int, int]]:
+    """
+    Split the upper triangle of an n×n matrix into row blocks of roughly
+    equal pair counts.
+
+    Row *i* owns the pairs (i, i+1 … n-1).  Returns ``(row_start, row_end)``
+    half-open ranges covering rows 0 … n-2.
+    """
+    total  = n * (n - 1) // 2
+    target = max(1, -(-total // max(1, n_blocks)))
+    blocks: list[tuple[int, int]] = []
+    start = acc = 0
+    for i in range(n - 1):
+        acc += n - 1 - i
+        if acc >= target:
+            blocks.append((start, i + 1))
+            start, acc = i + 1, 0
+    if start < n - 1:
+        blocks.append((start, n - 1))
+    return blocks
+
+
+def _share_array(arr) -> "tuple[object, tuple]":
+    """
+    Copy *arr* into a new shared-memory segment.
+
+    Returns ``(shm, spec)`` where *spec* = ``(name, shape, dtype_str)`` is
+    enough for another process to attach via ``_attach_array``.
+    """
+    import numpy as np
+    from multiprocessing import shared_memory
+
+    shm  = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+    view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+    view[...] = arr
+    return shm, (shm.name, arr.shape, arr.dtype.str)
+
+
+def _attach_array(spec: tuple) -> "tuple[object, object]":
+    """Attach to a segment created by ``_share_array``; returns (shm, view)."""
+    import numpy as np
+    from multiprocessing import shared_memory
+
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _pairwise_worker_init(specs: dict, k: "int | None",
+                          files: "dict | None" = None) -> None:
+    """
+    Pool initializer: attach every shared array once per worker.
+
+    *files* maps output names to ``(path, shape, dtype_str)`` of
+    ``numpy.memmap`` files; those outputs are written upper triangle only.
+    """
+    import numpy as np
+    segments = {}
+    views    = {}
+    for key, spec in specs.items():
+        segments[key], views[key] = _attach_array(spec)
+    for key, (path, shape, dtype) in (files or {}).items():
+        views[key] = np.memmap(path, dtype=np.dtype(dtype), mode="r+",
+                               shape=tuple(shape))
+    _WORKER_STATE.clear()
+    _WORKER_STATE.update(views)
+    _WORKER_STATE["_segments"] = segments
+    _WORKER_STATE["mirror"]    = not files
+    _WORKER_STATE["cm"] = (
+        CompiledMatrix.from_arrays(k, views["norm"], views["valid"])
+        if k is not None else None
+    )
+
+
+def _pairwise_worker_block(block: tuple[int, int]) -> int:
+    """Score every pair (i, j>i) for rows in *block*; returns the pair count."""
+    st     = _WORKER_STATE
+    buf    = st["buf"]
+    starts = st["starts"]
+    sim    = st["sim"]
+    off    = st["off"]
+    cm     = st["cm"]
+    mirror = st["mirror"]
+    n      = sim.shape[0]
+    done   = 0
+    for i in range(*block):
+        enc_i = buf[starts[i]:starts[i + 1]]
+        for j in range(i + 1, n):
+            s, o = sliding_best_encoded(enc_i, buf[starts[j]:starts[j + 1]], cm)
+            sim[i, j] = s
+            off[i, j] = o
+            if mirror:
+                sim[j, i] = s
+                off[j, i] = o
+            done += 1
+    return done
+
+
+def _pairwise_matrix_parallel(
+    enc: list,
+    cm: "CompiledMatrix | None",
+    jobs: int,
+    out: "tuple | None" = None,
+) -> tuple[list[list[float]], list[list[int]]]:
+    """
+    Score all pairs of encoded sequences *enc* with a pool of *jobs* workers.
+
+    The encoded sequences (one concatenated buffer plus row offsets) and
+    the scoring tables are placed in ``multiprocessing.shared_memory``
+    once; each task only carries a ``(row_start, row_end)`` block.
+    Workers write straight into shared n×n similarity (float64, so the
+    values match the serial path bit for bit) and offset arrays.
+
+    With *out* = ``(sim, off)`` memmap arrays, workers instead open those
+    files and fill only their upper triangles, and *out* is returned.
+    """
+    import numpy as np
+    import multiprocessing
+
+    n      = len(enc)
+    starts = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in enc], out=starts[1:])
+    arrays = {
+        "buf":    np.concatenate(enc) if starts[-1] else np.zeros(1, np.uint8),
+        "starts": starts,
+    }
+    files: dict = {}
+    if out is None:
+        arrays["sim"] = np.eye(n, dtype=np.float64)
+        arrays["off"] = np.zeros((n, n), dtype=np.int64)
+    else:
+        for key, arr in zip(("sim", "off"), out):
+            files[key] = (arr.filename, arr.shape, arr.dtype.str)
+    if cm is not None:
+        arrays["norm"]  = cm.norm
+        arrays["valid"] = cm.valid
+
+    segments: dict = {}
+    specs:    dict = {}
+    try:
+        for key, arr in arrays.items():
+            segments[key], specs[key] = _share_array(arr)
+        blocks = _pairwise_blocks(n, jobs * _BLOCKS_PER_JOB)
+        _log.info("Scoring %d pairs in %d block(s) on %d worker(s)",
+                  n * (n - 1) // 2, len(blocks), jobs)
+        with multiprocessing.Pool(
+            processes=jobs,
+            initializer=_pairwise_worker_init,
+            initargs=(specs, cm.k if cm is not None else None, files),
+        ) as pool:
+            for _ in pool.imap_unordered(_pairwise_worker_block, blocks):
+                pass
+        if out is not None:
+            return out
+        sim = np.ndarray((n, n), dtype=np.float64, buffer=segments["sim"].buf)
+        off = np.ndarray((n, n), dtype=np.int64, buffer=segments["off"].buf)
+        result = sim.tolist(), off.tolist()
+        del sim, off                 # release the buffers before close()
+        return result
+    finally:
+        for shm in segments.values():
+            shm.close()
+            shm.unlink()
+
+
+# ---------------------------------------------------------------------------
+# Persistent pair-score store (content-addressed)
+# ---------------------------------------------------------------------------
+
+_DEFAULT_PAIR_CACHE = "~/.prot_ction_pairs.sqlite"
+_PAIR_STORE_VERSION = 1
+
+
+def sequence_digest(seq: str) -> bytes:
+    """16-byte BLAKE2b digest of *seq*, the content address of a sequence."""
+    return hashlib.blake2b(seq.encode("utf-8"), digest_size=16).digest()
+
+
+def pair_context(scoring: str, aligned: bool, mat_min: int = 0) -> str:
+    """
+    Key of the scoring settings a stored pair score is valid for.
+
+    Covers the matrix name, the comparison mode and the matrix minimum
+    used for normalisation.  The sliding window itself has no tunable
+    parameters; the trailing kernel tag changes if its semantics ever do.
+    """
+    mode = "aligned" if aligned else "sliding"
+    return f"{scoring}|{mode}|min={mat_min}|sliding-best-v1"
+
+
+class PairScoreStore:
+    """
+    SQLite store of pairwise ``(similarity, offset)`` results.
+
+    Pairs are keyed by the context string (see ``pair_context``) and the
+    digests of both sequences, in byte order – scores are symmetric – so
+    a result is reused whatever file, accession or row position the
+    sequences appear under.  ``hits`` / ``misses`` count matrix pairs
+    (i < j) served from the store and pairs that had to be scored, over the
+    store's lifetime; a matrix of n sequences adds n(n−1)/2 between them,
+    whether or not some sequences are identical.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key   TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS contexts (
+            ctx  INTEGER PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS pairs (
+            ctx INTEGER NOT NULL,
+            a   BLOB NOT NULL,
+            b   BLOB NOT NULL,
+            sim REAL NOT NULL,
+            off INTEGER NOT NULL,
+            PRIMARY KEY (ctx, a, b)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = pathlib.Path(path).expanduser()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self._path), timeout=30.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self._SCHEMA)
+        row = self._db.execute(
+            "SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None:
+            self._db.execute("INSERT OR IGNORE INTO meta VALUES ('version', ?)",
+                             (str(_PAIR_STORE_VERSION),))
+        elif int(row[0]) != _PAIR_STORE_VERSION:
+            raise ValueError(f"pair cache {self._path} has unsupported schema "
+                             f"version {row[0]}")
+        self._db.commit()
+        self._contexts: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def path(self) -> pathlib.Path:
+        return self._path
+
+    def _context_id(self, context: str) -> int:
+        ctx = self._contexts.get(context)
+        if ctx is None:
+            with self._db:
+                self._db.execute("INSERT OR IGNORE INTO contexts (name) "
+                                 "VALUES (?)", (context,))
+            ctx = self._db.execute("SELECT ctx FROM contexts WHERE name = ?",
+                                   (context,)).fetchone()[0]
+            self._contexts[context] = ctx
+        return ctx
+
+    def lookup(self, context: str, digests: list[bytes],
+               ) -> dict[tuple[bytes, bytes], tuple[float, int]]:
+        """All stored pairs among *digests* for *context*, keyed ``(a, b)``, a ≤ b."""
+        ctx = self._context_id(context)
+        self._db.execute("CREATE TEMP TABLE IF NOT EXISTS want "
+                         "(d BLOB PRIMARY KEY) WITHOUT ROWID")
+        self._db.execute("DELETE FROM want")
+        self._db.executemany("INSERT OR IGNORE INTO want VALUES (?)",
+                             ((d,) for d in digests))
+        rows = self._db.execute(
+            "SELECT p.a, p.b, p.sim, p.off FROM want wa "
+            "JOIN pairs p ON p.ctx = ? AND p.a = wa.d "
+            "JOIN want wb ON wb.d = p.b", (ctx,))
+        found = {(a, b): (sim, off) for a, b, sim, off in rows}
+        self._db.execute("DELETE FROM want")
+        self._db.commit()
+        return found
+
+    def store(self, context: str,
+              results: "dict[tuple[bytes, bytes], tuple[float, int]]") -> None:
+        """Insert newly scored pairs (keys as returned by ``lookup``)."""
+        if not results:
+            return
+        ctx = self._context_id(context)
+        try:
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO pairs VALUES (?, ?, ?, ?, ?)",
+                    ((ctx, a, b, float(sim), int(off))
+                     for (a, b), (sim, off) in results.items()))
+        except sqlite3.Error as exc:
+            print(f"  Warning: could not write pair cache {self._path}: {exc}",
+                  file=sys.stderr)
+
+    def stats(self) -> dict:
+        """``{'hits', 'misses', 'stored'}`` – *stored* counts every context."""
+        stored = self._db.execute("SELECT COUNT(*) FROM pairs").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "stored": stored}
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def _pair_key(da: bytes, db: bytes) -> tuple[bytes, bytes]:
+    return (da, db) if da <= db else (db, da)
+
+
+def _pairwise_matrix_cached(
+    seqs: list[str],
+    matrix: "CompiledMatrix | dict | None",
+    mat_min: int,
+    engine: str,
+    jobs: int,
+    store: PairScoreStore,
+    context: str,
+) -> tuple[list[list[float]], list[list[int]]]:
+    """
+    ``pairwise_matrix`` through *store*: only pairs of sequences never
+    scored under *context* are computed, each distinct pair once.
+
+    When most pairs are new and *jobs* > 1, or the input is equal-length
+    Hamming, the whole matrix is scored by the process pool or the
+    aligned kernel instead, which is faster than scoring the misses one
+    by one.
+    """
+    n   = len(seqs)
+    dig = [sequence_digest(s) for s in seqs]
+    known = store.lookup(context, dig)
+
+    sim_mat = [[0.0] * n for _ in range(n)]
+    off_mat = [[0]   * n for _ in range(n)]
+    for i in range(n):
+        sim_mat[i][i] = 1.0
+    todo: dict[tuple[bytes, bytes], list[tuple[int, int]]] = defaultdict(list)
+    hits = 0
+    for i, j in combinations(range(n), 2):
+        key = _pair_key(dig[i], dig[j])
+        hit = known.get(key)
+        if hit is None:
+            todo[key].append((i, j))
+        else:
+            sim_mat[i][j] = sim_mat[j][i] = hit[0]
+            off_mat[i][j] = off_mat[j][i] = hit[1]
+            hits += 1
+
+    new: dict[tuple[bytes, bytes], tuple[float, int]] = {}
+    if (todo and _use_numpy(engine) and 2 * len(todo) > n * (n - 1) // 2
+            and (jobs > 1 or (compile_matrix(matrix, mat_min) is None
+                              and len({len(s) for s in seqs}) == 1))):
+        sim_mat, off_mat = pairwise_matrix(seqs, matrix, mat_min,
+                                           engine=engine, jobs=jobs)
+        for key, pairs in todo.items():
+            i, j = pairs[0]
+            new[key] = (sim_mat[i][j], off_mat[i][j])
+    elif todo:
+        if _use_numpy(engine):
+            cm  = compile_matrix(matrix, mat_min)
+            enc: dict[int, object] = {}
+
+            def score(i: int, j: int) -> tuple[float, int]:
+                for k in (i, j):
+                    if k not in enc:
+                        enc[k] = encode_sequence(seqs[k], cm)
+                return sliding_best_encoded(enc[i], enc[j], cm)
+        else:
+            def score(i: int, j: int) -> tuple[float, int]:
+                return sliding_best_similarity(seqs[i], seqs[j], matrix, mat_min)
+
+        for key, pairs in todo.items():
+            sim, off = new[key] = score(*pairs[0])
+            for i, j in pairs:
+                sim_mat[i][j] = sim_mat[j][i] = sim
+                off_mat[i][j] = off_mat[j][i] = off
+
+    store.store(context, new)
+    scored = sum(len(pairs) for pairs in todo.values())
+    store.hits   += hits
+    store.misses += scored
+    _log.info("Pair-score cache: %d pair(s) reused, %d scored (%d distinct)",
+              hits, scored, len(new))
+    return sim_mat, off_mat
+
+
+# ---------------------------------------------------------------------------
+# Out-of-core similarity matrices (numpy.memmap)
+# ---------------------------------------------------------------------------
+
+# Above this many sequences _analyse_fasta switches to memmap matrices
+_MEMMAP_THRESHOLD = 5000
+
+
+def _is_array(mat) -> bool:
+    """True for NumPy (memmap) matrices, False for lists of lists."""
+    return hasattr(mat, "shape")
+
+
+def _row_blocks(n_rows: int, n_cols: int) -> list[tuple[int, int]]:
+    """Half-open row ranges of about ``_NP_BLOCK_CELLS`` cells each."""
+    step = max(1, _NP_BLOCK_CELLS // max(1, n_cols))
+    return [(r, min(n_rows, r + step)) for r in range(0, n_rows, step)]
+
+
+def _mirror_upper(mat, tile: int = 1024) -> None:
+    """
+    Copy the strict upper triangle of square *mat* onto its lower triangle.
+
+    Works tile by tile so that a memmap is read and written in contiguous
+    row segments rather than one page per element.
+    """
+    import numpy as np
+    n = mat.shape[0]
+    for r0 in range(0, n, tile):
+        r1 = min(n, r0 + tile)
+        for c0 in range(r0, n, tile):
+            c1  = min(n, c0 + tile)
+            blk = np.array(mat[r0:r1, c0:c1])
+            if c0 == r0:
+                low = np.tril_indices(r1 - r0, -1)
+                blk[low] = blk.T[low]
+                mat[r0:r1, r0:r1] = blk
+            else:
+                mat[c0:c1, r0:r1] = blk.T
+
+
+def _new_memmap(scratch_dir: str, prefix: str, dtype, n: int):
+    import numpy as np
+    fd, path = tempfile.mkstemp(prefix=prefix, suffix=".bin", dir=scratch_dir)
+    os.close(fd)
+    return np.memmap(path, dtype=dtype, mode="w+", shape=(n, n))
+
+
+def _pairwise_matrix_memmap(
+    enc: list,
+    cm: "CompiledMatrix | None",
+    jobs: int,
+    scratch_dir: str,
+):
+    """
+    Score all pairs into float32 similarity / int32 offset memmaps.
+
+    Rows are scored into the upper triangle (by a process pool when
+    *jobs* > 1), which is then mirrored tile by tile; the diagonal is set
+    to 1.  Equal-length Hamming input is written whole by
+    ``aligned_hamming_matrix`` instead.  Resident memory stays at a few row blocks however large n is.
+    The backing files are unlinked once filled (on POSIX the mapping stays
+    valid until the arrays are garbage-collected).
+    """
+    import numpy as np
+    n   = len(enc)
+    sim = _new_memmap(scratch_dir, "prot_ction_sim_", np.float32, n)
+    off = _new_memmap(scratch_dir, "prot_ction_off_", np.int32, n)
+    _log.info("Scoring %d pairs into memory-mapped matrices in %s",
+              n * (n - 1) // 2, scratch_dir)
+    try:
+        if _use_aligned_kernel(enc, cm):
+            aligned_hamming_matrix(np.stack(enc), out=sim)
+        elif jobs > 1 and n > 2:
+            _pairwise_matrix_parallel(enc, cm, jobs, out=(sim, off))
+        else:
+            for i in range(n - 1):
+                row_s = np.empty(n - 1 - i, dtype=np.float32)
+                row_o = np.empty(n - 1 - i, dtype=np.int32)
+                for k, j in enumerate(range(i + 1, n)):
+                    row_s[k], row_o[k] = sliding_best_encoded(enc[i], enc[j], cm)
+                sim[i, i + 1:] = row_s
+                off[i, i + 1:] = row_o
+        if not _use_aligned_kernel(enc, cm):
+            _mirror_upper(sim)
+            _mirror_upper(off)
+            sim[np.arange(n), np.arange(n)] = 1.0
+        sim.flush()
+        off.flush()
+    finally:
+        for arr in (sim, off):
+            try:
+                os.unlink(arr.filename)
+            except OSError as exc:      # e.g. Windows while still mapped
+                _log.debug("could not remove %s: %s", arr.filename, exc)
+    return sim, off
+
+
+def _sortable_keys(values):
+    """Order-preserving uint32 image of float32 *values*."""
+    import numpy as np
+    u = np.ascontiguousarray(values, dtype=np.float32).view(np.uint32)
+    return np.where(u & np.uint32(0x80000000), ~u, u | np.uint32(0x80000000))
+
+
+def _keys_to_float(keys):
+    import numpy as np
+    keys = np.asarray(keys, dtype=np.uint32)
+    u = np.where(keys & np.uint32(0x80000000), keys ^ np.uint32(0x80000000), ~keys)
+    return u.view(np.float32)
+
+
+class BlockedMedians:
+    """
+    Exact medians of several float32 value streams read block by block.
+
+    Radix selection on the order-preserving uint32 image of each value:
+    every pass histograms the next 8 bits of the keys that still match the
+    prefix chosen by earlier passes, so memory is O(buckets × 256) however
+    many values stream past.  The caller replays the same stream once per
+    pass::
+
+        med = BlockedMedians(n_buckets)
+        while med.next_pass():
+            for values, buckets in stream():
+                med.add(values, buckets)
+        med.medians()
+    """
+
+    _BITS   = 8
+    _PASSES = 4
+
+    def __init__(self, n_buckets: int) -> None:
+        import numpy as np
+        self.n_buckets = n_buckets
+        self.counts    = np.zeros(n_buckets, dtype=np.int64)
+        self._pass     = -1
+        self._hist     = None
+        # slot 0 selects the lower-middle rank, slot 1 the upper-middle rank
+        self._rank     = np.zeros((2, n_buckets), dtype=np.int64)
+        self._prefix   = np.zeros((2, n_buckets), dtype=np.uint32)
+
+    def next_pass(self) -> bool:
+        """Close the current pass; return False once all passes are done."""
+        import numpy as np
+        if self._pass >= 0:
+            self._finish_pass()
+        self._pass += 1
+        if self._pass >= self._PASSES:
+            return False
+        self._hist = np.zeros((2, self.n_buckets, 1 << self._BITS), np.int64)
+        return True
+
+    def add(self, values, buckets) -> None:
+        import numpy as np
+        if not len(values):
+            return
+        keys    = _sortable_keys(values)
+        buckets = np.asarray(buckets, dtype=np.int64)
+        width   = 1 << self._BITS
+        shift   = 32 - self._BITS * (self._pass + 1)
+        digit   = (keys >> np.uint32(shift)) & np.uint32(width - 1)
+        size    = self.n_buckets * width
+        if self._pass == 0:
+            self._hist[0] += np.bincount(buckets * width + digit,
+                                         minlength=size).reshape(-1, width)
+            return
+        pshift = np.uint32(32 - self._BITS * self._pass)
+        for slot in (0, 1):
+            hit = (keys >> pshift) == self._prefix[slot][buckets]
+            self._hist[slot] += np.bincount(
+                buckets[hit] * width + digit[hit], minlength=size,
+            ).reshape(-1, width)
+
+    def _finish_pass(self) -> None:
+        import numpy as np
+        if self._pass == 0:
+            self.counts   = self._hist[0].sum(axis=1)
+            self._hist[1] = self._hist[0]
+            self._rank[0] = np.maximum(self.counts - 1, 0) // 2
+            self._rank[1] = self.counts // 2
+        for slot in (0, 1):
+            cum   = np.cumsum(self._hist[slot], axis=1)
+            digit = (cum <= self._rank[slot][:, None]).sum(axis=1)
+            digit = np.minimum(digit, cum.shape[1] - 1)
+            below = np.where(digit > 0,
+                             cum[np.arange(self.n_buckets), digit - 1], 0)
+            self._rank[slot]  -= below
+            self._prefix[slot] = ((self._prefix[slot] << np.uint32(self._BITS))
+                                  | digit.astype(np.uint32))
+
+    def medians(self) -> "list[float | None]":
+        """Per-bucket medians (``None`` for empty buckets)."""
+        lo = _keys_to_float(self._prefix[0]).tolist()
+        hi = _keys_to_float(self._prefix[1]).tolist()
+        out: list = []
+        for c, a, b in zip(self.counts.tolist(), lo, hi):
+            if c == 0:
+                out.append(None)
+            else:
+                out.append(b if c % 2 else (a + b) / 2)
+        return out
+
+
+def _upper_blocks(mat):
+    """Yield ``(r0, r1, block, keep)``: row blocks of *mat* right of column r0
+    with *keep* masking the strict upper triangle."""
+    import numpy as np
+    n = mat.shape[0]
+    for r0, r1 in _row_blocks(n, n):
+        block = np.asarray(mat[r0:r1, r0:])
+        keep  = (np.arange(r0, n)[None, :] > np.arange(r0, r1)[:, None])
+        yield r0, r1, block, keep
+
+
+def matrix_median(sim_mat) -> "float | None":
+    """Median of the strict upper triangle of *sim_mat* (list or memmap)."""
+    n = len(sim_mat)
+    if not _is_array(sim_mat):
+        vals = [sim_mat[i][j] for i, j in combinations(range(n), 2)]
+        return statistics.median(vals) if vals else None
+    import numpy as np
+    med = BlockedMedians(1)
+    while med.next_pass():
+        for _r0, _r1, block, keep in _upper_blocks(sim_mat):
+            vals = block[keep]
+            med.add(vals, np.zeros(vals.size, dtype=np.int64))
+    return med.medians()[0]
+
+
 def best_offsets_vs_reference(seqs: list[str], ref_idx: int,
                                matrix: "dict | None" = None,
-                               mat_min: int = 0) -> list[int]:
+                               mat_min: int = 0,
+                               engine: str = "auto") -> list[int]:
     """
     For each sequence find its best offset relative to the reference sequence.
 
@@ -1815,6 +4037,17 @@ def best_offsets_vs_reference(seqs: list[str], ref_idx: int,
     """
     ref = seqs[ref_idx]
     offsets: list[int] = []
+    if _use_numpy(engine):
+        cm      = compile_matrix(matrix, mat_min)
+        ref_enc = encode_sequence(ref, cm)
+        for i, seq in enumerate(seqs):
+            if i == ref_idx:
+                offsets.append(0)
+            else:
+                _, off = sliding_best_encoded(
+                    ref_enc, encode_sequence(seq, cm), cm)
+                offsets.append(off)
+        return offsets
     for i, seq in enumerate(seqs):
         if i == ref_idx:
             offsets.append(0)
@@ -1844,7 +4077,7 @@ def build_virtual_alignment(seqs: list[str], ref_idx: int,
     return aligned
 
 
-def henikoff_weights(seqs: list[str]) -> list[float]:
+def henikoff_weights(seqs: list[str], engine: str = "auto") -> list[float]:
     """
     Position-based sequence weights (Henikoff & Henikoff, 1994).
 
@@ -1858,6 +4091,11 @@ def henikoff_weights(seqs: list[str]) -> list[float]:
     average weight equals 1.0 — values above 1 flag under-represented
     sequences, values below 1 flag over-represented ones.
     """
+    if _use_numpy(engine):
+        codes = encode_alignment(seqs)
+        if codes is not None:
+            return _henikoff_weights_np(codes)
+
     n   = len(seqs)
     raw = [0.0] * n
 
@@ -1883,9 +4121,10 @@ def henikoff_weights(seqs: list[str]) -> list[float]:
 
 
 def per_position_conservation(seqs: list[str],
-                               matrix: "dict | None" = None,
+                               matrix: "CompiledMatrix | dict | None" = None,
                                mat_min: int = 0,
-                               weights: "list[float] | None" = None) -> list[float]:
+                               weights: "list[float] | None" = None,
+                               engine: str = "auto") -> list[float]:
     """
     Per-column conservation for an aligned (equal-length) set of sequences.
 
@@ -1898,6 +4137,12 @@ def per_position_conservation(seqs: list[str],
     (i, j) is weighted by ``weights[i] × weights[j]``; otherwise all pairs
     are weighted equally.
     """
+    cm = compile_matrix(matrix, mat_min)
+    if _use_numpy(engine):
+        codes = encode_alignment(seqs)
+        if codes is not None:
+            return _per_position_conservation_np(codes, cm, weights)
+
     length = len(seqs[0])
     w      = weights if weights is not None else [1.0] * len(seqs)
     scores: list[float] = []
@@ -1908,7 +4153,7 @@ def per_position_conservation(seqs: list[str],
             scores.append(1.0 if len(idx) == 1 else 0.0)
             continue
 
-        if matrix is None:
+        if cm is None:
             num = den = 0.0
             for i, j in combinations(idx, 2):
                 a, b  = seqs[i][pos].upper(), seqs[j][pos].upper()
@@ -1920,64 +4165,374 @@ def per_position_conservation(seqs: list[str],
             num = den = 0.0
             for i, j in combinations(idx, 2):
                 a, b = seqs[i][pos].upper(), seqs[j][pos].upper()
-                ns   = _norm_score(a, b, matrix, mat_min)
+                ns   = cm.norm_score(a, b)
                 if ns is not None:
                     ww   = w[i] * w[j]
                     num += ww * ns
                     den += ww
             scores.append(num / den if den else float("nan"))
 
-    return scores
+    return scores
+
+
+# ---------------------------------------------------------------------------
+# Shannon entropy / information content per position
+# ---------------------------------------------------------------------------
+
+_MAX_PROTEIN_ENTROPY = math.log2(20)  # ~4.322 bits
+
+
+def per_position_entropy(seqs: list[str],
+                         engine: str = "auto") -> list[tuple[float, float]]:
+    """
+    Shannon entropy and information content per alignment column.
+
+    Returns a list of ``(entropy_bits, information_content)`` tuples.
+    IC = log₂(20) − H  for protein sequences.  All-gap columns yield
+    (0.0, log₂(20)).  Single-residue columns yield (0.0, log₂(20)).
+    """
+    if _use_numpy(engine):
+        codes = encode_alignment(seqs)
+        if codes is not None:
+            return _per_position_entropy_np(codes)
+
+    results: list[tuple[float, float]] = []
+    for pos in range(len(seqs[0])):
+        residues = [seqs[i][pos].upper()
+                    for i in range(len(seqs))
+                    if seqs[i][pos] not in _GAP]
+        if len(residues) < 2:
+            results.append((0.0, _MAX_PROTEIN_ENTROPY))
+            continue
+        counts: dict[str, int] = {}
+        for aa in residues:
+            counts[aa] = counts.get(aa, 0) + 1
+        n = len(residues)
+        entropy = -sum((c / n) * math.log2(c / n) for c in counts.values())
+        ic = _MAX_PROTEIN_ENTROPY - entropy
+        results.append((entropy, ic))
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Conservation calculations – NumPy engine
+# ---------------------------------------------------------------------------
+#
+# Column statistics are computed from per-column residue histograms of an
+# n×L uint8 alignment array instead of per-column Counters and pair loops.
+# Weighted pair sums follow from the histograms algebraically:
+#
+#     Σ_{i<j} w_i·w_j·S[a_i, a_j] = ½ (Σ_ab C_a·C_b·S[a, b] − Σ_a D_a·S[a, a])
+#
+# with C_a = Σ w_i and D_a = Σ w_i² over the sequences holding residue a,
+# so a column costs O(K²) for K residue types rather than O(n²).  Results
+# agree with the pure-Python functions to floating-point rounding.
+
+def encode_alignment(seqs: list[str]):
+    """
+    Encode equal-length *seqs* as an n×L uint8 array of upper-cased
+    character codes, with the gap characters (- .) mapped to 0.
+
+    Returns None when a sequence contains non-ASCII characters; callers
+    then fall back to the pure-Python implementation.
+    """
+    import numpy as np
+
+    if not all(s.isascii() for s in seqs):
+        return None
+    n = len(seqs)
+    L = len(seqs[0]) if seqs else 0
+    codes = np.frombuffer("".join(seqs).upper().encode("ascii"),
+                          dtype=np.uint8).reshape(n, L).copy()
+    codes[(codes == ord("-")) | (codes == ord("."))] = _NP_GAP_CODE
+    return codes
+
+
+def _column_histogram(labels, n_labels: int, weights=None):
+    """
+    Per-column label histogram of an n×L *labels* array → L×n_labels.
+
+    Each row *i* contributes ``weights[i]`` (1 when omitted).
+    """
+    import numpy as np
+
+    n, L = labels.shape
+    flat = (np.arange(L, dtype=np.intp)[None, :] * n_labels + labels).ravel()
+    w    = None if weights is None else np.repeat(weights, L)
+    hist = np.bincount(flat, weights=w, minlength=L * n_labels)
+    return hist.reshape(L, n_labels)
+
+
+def _dense_residues(codes):
+    """
+    Relabel the non-gap character codes in *codes* as 1 … K−1 (0 = gap).
+
+    Returns ``(labels, K)``.
+    """
+    import numpy as np
+
+    present = np.zeros(256, dtype=bool)
+    present[codes.ravel()] = True
+    present[_NP_GAP_CODE] = True
+    lut = (np.cumsum(present) - 1).astype(np.intp)
+    return lut[codes], int(present.sum())
+
+
+def _per_position_conservation_np(codes, cm: "CompiledMatrix | None",
+                                  weights: "list[float] | None") -> list[float]:
+    """Vectorized ``per_position_conservation`` on an encoded alignment."""
+    import numpy as np
+
+    n, L   = codes.shape
+    nongap = codes != _NP_GAP_CODE
+    n_res  = np.count_nonzero(nongap, axis=0)
+    w      = (np.ones(n) if weights is None
+              else np.asarray(weights, dtype=np.float64))
+
+    if cm is None:
+        labels, K = _dense_residues(codes)
+        C = _column_histogram(labels, K, w)[:, 1:]          # drop gap label
+        D = _column_histogram(labels, K, w * w)[:, 1:]
+        num = ((C * C).sum(axis=1) - D.sum(axis=1)) / 2.0
+        W   = C.sum(axis=1)
+        den = (W * W - D.sum(axis=1)) / 2.0
+    else:
+        labels = cm.lut[codes]                  # gaps/unknown → sentinel k
+        K      = cm.width
+        S      = cm.norm.reshape(K, K)
+        V      = cm.valid.reshape(K, K).astype(np.float64)
+        C = _column_histogram(labels, K, w)
+        D = _column_histogram(labels, K, w * w)
+        num = (((C @ S) * C).sum(axis=1) - D @ np.diag(S)) / 2.0
+        den = (((C @ V) * C).sum(axis=1) - D @ np.diag(V)) / 2.0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(den != 0.0, num / np.where(den != 0.0, den, 1.0),
+                          np.nan)
+    scores = np.where(n_res >= 2, scores, np.where(n_res == 1, 1.0, 0.0))
+    return scores.tolist()
+
+
+def _per_position_entropy_np(codes) -> list[tuple[float, float]]:
+    """Vectorized ``per_position_entropy`` on an encoded alignment."""
+    import numpy as np
+
+    labels, K = _dense_residues(codes)
+    counts = _column_histogram(labels, K)[:, 1:]
+    n_res  = counts.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = counts / n_res[:, None]
+        terms = np.where(counts > 0, p * np.log2(np.where(counts > 0, p, 1.0)),
+                         0.0)
+    entropy = -terms.sum(axis=1)
+    return [
+        (h, _MAX_PROTEIN_ENTROPY - h) if n >= 2 else (0.0, _MAX_PROTEIN_ENTROPY)
+        for h, n in zip(entropy.tolist(), n_res.tolist())
+    ]
+
+
+def _henikoff_weights_np(codes) -> list[float]:
+    """Vectorized ``henikoff_weights`` on an encoded alignment."""
+    import numpy as np
+
+    n, L      = codes.shape
+    labels, K = _dense_residues(codes)
+    counts    = _column_histogram(labels, K)
+    counts[:, 0] = 0                                        # ignore gaps
+    n_res = counts.sum(axis=1)
+    r     = np.count_nonzero(counts, axis=1)
+    use   = (n_res >= 2) & (r > 1)
+
+    cnt = counts[np.arange(L)[None, :], labels]             # n×L
+    keep = (labels != 0) & use[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        contrib = np.where(keep, 1.0 / (r[None, :] * cnt), 0.0)
+    raw   = contrib.sum(axis=1).tolist()
+    total = sum(raw)
+    if total == 0.0:
+        return [1.0] * n
+    return [w * n / total for w in raw]
+
+
+# ---------------------------------------------------------------------------
+# Near-duplicate detection
+# ---------------------------------------------------------------------------
+
+# MinHash/LSH prefilter defaults: k-mer length, sketch size, LSH bands.
+# 32 bands of 4 rows find a pair with k-mer Jaccard 0.7 (≈ 95 % identity
+# at k = 4) with > 99.9 % probability; unrelated pairs almost never collide.
+_MINHASH_K      = 4
+_MINHASH_HASHES = 128
+_MINHASH_BANDS  = 32
 
+# 5 bits per residue; k-mer codes must fit in a uint64
+_MINHASH_MAX_K = 12
+_MASK64 = (1 << 64) - 1
 
-# ---------------------------------------------------------------------------
-# Shannon entropy / information content per position
-# ---------------------------------------------------------------------------
 
-_MAX_PROTEIN_ENTROPY = math.log2(20)  # ~4.322 bits
+def _minhash_params(n_hashes: int) -> "tuple[list[int], list[int]]":
+    """Fixed multiply-shift coefficients (odd *a*, any *b*) for each hash."""
+    import random
+    rng = random.Random(0x6D696E68)
+    a = [rng.getrandbits(64) | 1 for _ in range(n_hashes)]
+    b = [rng.getrandbits(64) for _ in range(n_hashes)]
+    return a, b
+
+
+def _kmer_codes(seq: str, k: int) -> set[int]:
+    """Distinct 5-bit-per-residue integer codes of the k-mers of *seq*."""
+    s = "".join(c for c in seq.upper() if c not in _GAP)
+    codes: set[int] = set()
+    for i in range(len(s) - k + 1):
+        x = 0
+        for c in s[i:i + k]:
+            x = (x << 5) | (ord(c) & 31)
+        codes.add(x)
+    return codes
 
 
-def per_position_entropy(seqs: list[str]) -> list[tuple[float, float]]:
+def minhash_signatures(
+    seqs: list[str],
+    k: int = _MINHASH_K,
+    n_hashes: int = _MINHASH_HASHES,
+    engine: str = "auto",
+) -> list:
     """
-    Shannon entropy and information content per alignment column.
+    MinHash sketch of the amino-acid k-mer set of every sequence.
 
-    Returns a list of ``(entropy_bits, information_content)`` tuples.
-    IC = log₂(20) − H  for protein sequences.  All-gap columns yield
-    (0.0, log₂(20)).  Single-residue columns yield (0.0, log₂(20)).
+    Gap characters are removed first.  Each of the *n_hashes* hash
+    functions is ``(a·x + b) mod 2**64 >> 32`` over the integer k-mer code
+    *x*, so both engines give identical signatures.  Returns one tuple of
+    *n_hashes* ints per sequence, or None for a sequence shorter than *k*.
     """
-    results: list[tuple[float, float]] = []
-    for pos in range(len(seqs[0])):
-        residues = [seqs[i][pos].upper()
-                    for i in range(len(seqs))
-                    if seqs[i][pos] not in _GAP]
-        if len(residues) < 2:
-            results.append((0.0, _MAX_PROTEIN_ENTROPY))
+    if not 1 <= k <= _MINHASH_MAX_K:
+        raise ValueError(f"MinHash k-mer length must be 1–{_MINHASH_MAX_K}")
+    a, b = _minhash_params(n_hashes)
+    sigs: list = []
+    if _use_numpy(engine):
+        import numpy as np
+        lut = np.arange(256, dtype=np.uint64) & np.uint64(31)
+        gap = np.zeros(256, dtype=bool)
+        gap[[ord(c) for c in _GAP]] = True
+        av  = np.array(a, dtype=np.uint64)[:, None]
+        bv  = np.array(b, dtype=np.uint64)[:, None]
+        for seq in seqs:
+            raw = np.frombuffer(seq.upper().encode("ascii", "replace"),
+                                dtype=np.uint8)
+            res = lut[raw[~gap[raw]]]
+            m   = res.size - k + 1
+            if m < 1:
+                sigs.append(None)
+                continue
+            codes = np.zeros(m, dtype=np.uint64)
+            for t in range(k):
+                codes = (codes << np.uint64(5)) | res[t:t + m]
+            codes = np.unique(codes)
+            sig = np.full(n_hashes, np.uint64(_MASK64), dtype=np.uint64)
+            # Hash in column blocks to bound the n_hashes × m temporary
+            step = max(1, _NP_BLOCK_CELLS // n_hashes)
+            for c0 in range(0, codes.size, step):
+                h = (av * codes[None, c0:c0 + step] + bv) >> np.uint64(32)
+                np.minimum(sig, h.min(axis=1), out=sig)
+            sigs.append(tuple(sig.tolist()))
+        return sigs
+    for seq in seqs:
+        codes = _kmer_codes(seq, k)
+        if not codes:
+            sigs.append(None)
             continue
-        counts: dict[str, int] = {}
-        for aa in residues:
-            counts[aa] = counts.get(aa, 0) + 1
-        n = len(residues)
-        entropy = -sum((c / n) * math.log2(c / n) for c in counts.values())
-        ic = _MAX_PROTEIN_ENTROPY - entropy
-        results.append((entropy, ic))
-    return results
+        sigs.append(tuple(
+            min(((ah * x + bh) & _MASK64) >> 32 for x in codes)
+            for ah, bh in zip(a, b)
+        ))
+    return sigs
 
 
-# ---------------------------------------------------------------------------
-# Near-duplicate detection
-# ---------------------------------------------------------------------------
+def minhash_candidates(
+    seqs: list[str],
+    k: int = _MINHASH_K,
+    n_hashes: int = _MINHASH_HASHES,
+    bands: int = _MINHASH_BANDS,
+    engine: str = "auto",
+) -> set[tuple[int, int]]:
+    """
+    Candidate near-duplicate pairs ``(i, j)``, i < j, by MinHash/LSH.
+
+    The signatures are cut into *bands* bands of ``n_hashes // bands``
+    rows; two sequences become candidates when any band matches exactly.
+    A pair with k-mer Jaccard similarity J is found with probability
+    ``1 − (1 − J**rows)**bands``.  Sketching is linear in the total
+    sequence length; the banding pass is linear in n plus the number of
+    colliding pairs.
+    """
+    if not 1 <= bands <= n_hashes or n_hashes % bands:
+        raise ValueError(
+            f"MinHash bands ({bands}) must divide the number of hashes "
+            f"({n_hashes})")
+    rows = n_hashes // bands
+    sigs = minhash_signatures(seqs, k, n_hashes, engine)
+    cand: set[tuple[int, int]] = set()
+    for band in range(bands):
+        lo = band * rows
+        buckets: dict[tuple, list[int]] = defaultdict(list)
+        for i, sig in enumerate(sigs):
+            if sig is not None:
+                buckets[sig[lo:lo + rows]].append(i)
+        for members in buckets.values():
+            if len(members) > 1:
+                cand.update(combinations(members, 2))
+    return cand
+
 
 def detect_near_duplicates(
     ids: list[str],
     sim_mat: list[list[float]],
     threshold: float = 0.98,
+    seqs: "list[str] | None" = None,
+    k: int = _MINHASH_K,
+    n_hashes: int = _MINHASH_HASHES,
+    bands: int = _MINHASH_BANDS,
+    engine: str = "auto",
 ) -> list[tuple[str, str, float]]:
     """
     Return pairs of sequences whose pairwise similarity ≥ *threshold*.
 
     Returns a list of ``(id_a, id_b, similarity)`` sorted descending.
+
+    Without *seqs* every pair is checked (exhaustive, the default in the
+    CLI; a memory-mapped *sim_mat* is scanned in row blocks).  Since
+    *sim_mat* is already fully scored this is a single vectorised pass and
+    is normally faster than the prefilter.  With *seqs* only the candidate
+    pairs from ``minhash_candidates`` are looked up in *sim_mat*, so the
+    result is a subset of the exhaustive one: pairs whose k-mer sets
+    overlap poorly – e.g. a short fragment of a longer sequence – can be
+    missed.
     """
     dupes: list[tuple[str, str, float]] = []
+    if seqs is not None:
+        cand = sorted(minhash_candidates(seqs, k, n_hashes, bands, engine))
+        _log.info("MinHash prefilter: %d candidate pair(s) of %d",
+                  len(cand), len(ids) * (len(ids) - 1) // 2)
+        if _is_array(sim_mat) and cand:
+            import numpy as np
+            ii, jj = np.array(cand, dtype=np.int64).T
+            sims   = sim_mat[ii, jj].tolist()
+        else:
+            sims = [sim_mat[i][j] for i, j in cand]
+        for (i, j), v in zip(cand, sims):
+            if v >= threshold:
+                dupes.append((ids[i], ids[j], v))
+        dupes.sort(key=lambda x: x[2], reverse=True)
+        return dupes
+    if _is_array(sim_mat):
+        import numpy as np
+        for r0, _r1, block, keep in _upper_blocks(sim_mat):
+            rows, cols = np.nonzero(keep & (block >= threshold))
+            for i, j, v in zip((rows + r0).tolist(), (cols + r0).tolist(),
+                               block[rows, cols].tolist()):
+                dupes.append((ids[i], ids[j], v))
+        dupes.sort(key=lambda x: x[2], reverse=True)
+        return dupes
     for i, j in combinations(range(len(ids)), 2):
         if sim_mat[i][j] >= threshold:
             dupes.append((ids[i], ids[j], sim_mat[i][j]))
@@ -1989,15 +4544,201 @@ def detect_near_duplicates(
 # Pre-flight QC
 # ---------------------------------------------------------------------------
 
-def preflight_qc(records: list) -> dict:
-    """Compute quality-control statistics for a set of parsed records."""
+# Character classes counted by preflight_qc: the 20 standard amino acids
+# (columns 0–19), then ambiguous codes, gaps and anything else
+_QC_RESIDUES  = "ACDEFGHIKLMNPQRSTVWY"
+_QC_AMBIG_COL = 20
+_QC_GAP_COL   = 21
+_QC_OTHER_COL = 22
+_QC_N_COLS    = 23
+_QC_CLASS: dict[str, int] = {
+    **{c: i for i, c in enumerate(_QC_RESIDUES)},
+    **{c: _QC_AMBIG_COL for c in "XBZJ"},
+    **{c: _QC_GAP_COL for c in _GAP},
+}
+
+# |robust z| above which a sequence is flagged (Iglewicz & Hoaglin)
+_QC_OUTLIER_Z = 3.5
+
+
+def _qc_class_counts(seqs: list[str], engine: str = "auto"):
+    """
+    Per-sequence counts of the ``_QC_CLASS`` character classes (n × 23).
+
+    NumPy engine: the sequences are concatenated into a uint8 buffer,
+    each byte is mapped to its class through a lookup table, and one
+    ``bincount`` over (sequence, class) keys – the sequence index comes
+    from the per-sequence offsets – yields every count in a single pass.
+    The buffer is built for runs of sequences of about ``_NP_BLOCK_CELLS``
+    characters at a time to bound memory.  The Python engine counts each
+    sequence with a ``Counter``.  Non-ASCII characters fall in the 'other'
+    class either way.
+    """
+    if _use_numpy(engine):
+        import numpy as np
+
+        n       = len(seqs)
+        lengths = np.fromiter(map(len, seqs), dtype=np.int64, count=n)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        lut = np.full(256, _QC_OTHER_COL, dtype=np.intp)
+        for ch, col in _QC_CLASS.items():
+            lut[ord(ch)] = lut[ord(ch.lower())] = col
+        counts = np.zeros((n, _QC_N_COLS), dtype=np.int64)
+        start  = 0
+        while start < n:
+            stop = max(start + 1, int(np.searchsorted(
+                offsets, offsets[start] + _NP_BLOCK_CELLS, side="right")) - 1)
+            raw = "".join(seqs[start:stop]).encode("ascii", "replace")
+            buf = np.frombuffer(raw, dtype=np.uint8)
+            seq_of = np.repeat(np.arange(stop - start, dtype=np.intp),
+                               lengths[start:stop])
+            counts[start:stop] = np.bincount(
+                seq_of * _QC_N_COLS + lut[buf],
+                minlength=(stop - start) * _QC_N_COLS,
+            ).reshape(-1, _QC_N_COLS)
+            start = stop
+        return counts
+    rows = []
+    for seq in seqs:
+        row = [0] * _QC_N_COLS
+        for ch, k in Counter(seq).items():
+            row[_QC_CLASS.get(ch.upper(), _QC_OTHER_COL)] += k
+        rows.append(row)
+    return rows
+
+
+def _robust_z(values):
+    """
+    Robust z-scores 0.6745·(x − median) / MAD of a 1-D array.
+
+    When the MAD is 0 the mean absolute deviation (× 1.2533) is used
+    instead; when that is 0 as well every score is 0.
+    """
+    import numpy as np
+
+    values = np.asarray(values, dtype=np.float64)
+    if not values.size:
+        return values
+    dev = values - np.median(values)
+    mad = np.median(np.abs(dev))
+    if mad > 0:
+        return 0.6745 * dev / mad
+    mean_ad = np.mean(np.abs(dev))
+    if mean_ad > 0:
+        return dev / (1.253314 * mean_ad)
+    return np.zeros_like(values)
+
+
+def _robust_z_py(values: list[float]) -> list[float]:
+    """Pure-Python ``_robust_z``."""
+    if not values:
+        return []
+    med = statistics.median(values)
+    dev = [v - med for v in values]
+    mad = statistics.median(abs(d) for d in dev)
+    if mad > 0:
+        return [0.6745 * d / mad for d in dev]
+    mean_ad = sum(abs(d) for d in dev) / len(dev)
+    if mean_ad > 0:
+        return [d / (1.253314 * mean_ad) for d in dev]
+    return [0.0] * len(dev)
+
+
+def _qc_per_sequence(counts, engine: str = "auto") -> dict:
+    """
+    Per-sequence QC columns from ``_qc_class_counts``.
+
+    *composition_distance* is the total-variation distance between a
+    sequence's standard-residue frequencies and the column-wise median
+    frequencies (renormalised), 1.0 for a sequence without standard
+    residues.  Lengths are scored without gaps so aligned input is
+    judged on its residues.
+    """
+    k = len(_QC_RESIDUES)
+    if _use_numpy(engine):
+        import numpy as np
+
+        counts  = np.asarray(counts, dtype=np.int64).reshape(-1, _QC_N_COLS)
+        length  = counts.sum(axis=1)
+        gaps    = counts[:, _QC_GAP_COL]
+        ambig   = counts[:, _QC_AMBIG_COL]
+        std     = counts[:, :k]
+        n_std   = std.sum(axis=1)
+        has     = n_std > 0
+        freq    = std[has] / n_std[has, None]
+        dist    = np.ones(len(counts))
+        if has.any():
+            ref = np.median(freq, axis=0)
+            ref = ref / ref.sum() if ref.sum() > 0 else ref
+            dist[has] = 0.5 * np.abs(freq - ref).sum(axis=1)
+        safe = np.maximum(length, 1)
+        return {
+            "length":               length.tolist(),
+            "residues":             (length - gaps).tolist(),
+            "gap_fraction":         (gaps / safe).tolist(),
+            "ambiguous_fraction":   (ambig / safe).tolist(),
+            "composition_distance": dist.tolist(),
+            "length_z":             _robust_z(length - gaps).tolist(),
+            "composition_z":        _robust_z(dist).tolist(),
+        }
+    length   = [sum(row) for row in counts]
+    residues = [n - row[_QC_GAP_COL] for n, row in zip(length, counts)]
+    freqs    = [[c / sum(row[:k]) for c in row[:k]] if sum(row[:k]) else None
+                for row in counts]
+    present  = [f for f in freqs if f is not None]
+    dist     = [1.0] * len(counts)
+    if present:
+        ref   = [statistics.median(col) for col in zip(*present)]
+        total = sum(ref)
+        ref   = [r / total for r in ref] if total > 0 else ref
+        dist  = [0.5 * sum(abs(a - b) for a, b in zip(f, ref))
+                 if f is not None else 1.0 for f in freqs]
+    return {
+        "length":               length,
+        "residues":             residues,
+        "gap_fraction":         [row[_QC_GAP_COL] / max(n, 1)
+                                 for n, row in zip(length, counts)],
+        "ambiguous_fraction":   [row[_QC_AMBIG_COL] / max(n, 1)
+                                 for n, row in zip(length, counts)],
+        "composition_distance": dist,
+        "length_z":             _robust_z_py([float(r) for r in residues]),
+        "composition_z":        _robust_z_py(dist),
+    }
+
+
+def preflight_qc(records: list, engine: str = "auto") -> dict:
+    """
+    Compute quality-control statistics for a set of parsed records.
+
+    All character counts come from one pass over the sequences (see
+    ``_qc_class_counts``).  Besides the summary figures the result holds
+    ``sequences`` – one dict of per-sequence metrics per record – and the
+    accessions of ``outliers``: sequences whose robust z-score of ungapped
+    length, or of compositional distance to the median composition,
+    exceeds ``_QC_OUTLIER_Z`` (composition only counts when unusually
+    far).
+    """
     seqs    = [r[2] for r in records]
     lengths = [len(s) for s in seqs]
-    _AMBIG  = set("XBZJ")
+    counts  = _qc_class_counts(seqs, engine)
+    cols    = _qc_per_sequence(counts, engine)
 
+    totals      = (counts.sum(axis=0).tolist() if hasattr(counts, "sum")
+                   else [sum(col) for col in zip(*counts)])
     total_chars = sum(lengths)
-    total_gaps  = sum(1 for s in seqs for c in s if c in _GAP)
-    total_ambig = sum(1 for s in seqs for c in s.upper() if c in _AMBIG)
+    total_gaps  = totals[_QC_GAP_COL] if totals else 0
+    total_ambig = totals[_QC_AMBIG_COL] if totals else 0
+
+    per_seq: list[dict] = []
+    outliers: list[str] = []
+    for i, r in enumerate(records):
+        row = {"accession": r[0], **{key: col[i] for key, col in cols.items()}}
+        row["outlier"] = (abs(row["length_z"]) > _QC_OUTLIER_Z
+                          or row["composition_z"] > _QC_OUTLIER_Z)
+        if row["outlier"]:
+            outliers.append(r[0])
+        per_seq.append(row)
 
     return {
         "n_sequences":       len(records),
@@ -2010,6 +4751,9 @@ def preflight_qc(records: list) -> dict:
         "gap_fraction":      total_gaps / total_chars if total_chars else 0.0,
         "ambiguous_count":   total_ambig,
         "ambiguous_fraction": total_ambig / total_chars if total_chars else 0.0,
+        "outlier_z":         _QC_OUTLIER_Z,
+        "outliers":          outliers,
+        "sequences":         per_seq,
     }
 
 
@@ -2026,6 +4770,63 @@ def print_preflight_qc(qc: dict) -> None:
           f"({qc['gap_fraction']:.1%})")
     print(f"  Ambiguous (X/B/Z/J): {qc['ambiguous_count']:,} "
           f"({qc['ambiguous_fraction']:.1%})")
+    outliers = qc.get("outliers", [])
+    print(f"  Outliers (|z|>{qc.get('outlier_z', _QC_OUTLIER_Z):g}):  "
+          f"{len(outliers)}")
+    by_acc = {row["accession"]: row for row in qc.get("sequences", [])}
+    for acc in outliers[:10]:
+        row = by_acc[acc]
+        print(f"    {acc:<24} length z {row['length_z']:+6.1f}   "
+              f"composition z {row['composition_z']:+6.1f}")
+    if len(outliers) > 10:
+        print(f"    … and {len(outliers) - 10} more")
+
+
+_QC_TSV_COLUMNS = (
+    "accession", "length", "residues", "gap_fraction", "ambiguous_fraction",
+    "composition_distance", "length_z", "composition_z", "outlier",
+)
+
+
+def qc_summary(qc: dict) -> dict:
+    """Compact, JSON-ready form of ``preflight_qc`` without per-sequence rows."""
+    by_acc = {row["accession"]: row for row in qc.get("sequences", [])}
+    out = {k: v for k, v in qc.items() if k not in ("sequences", "outliers")}
+    out["n_outliers"] = len(qc.get("outliers", []))
+    out["outliers"] = [
+        {"accession": acc,
+         "length_z": round(by_acc[acc]["length_z"], 3),
+         "composition_z": round(by_acc[acc]["composition_z"], 3)}
+        for acc in qc.get("outliers", [])
+    ]
+    return out
+
+
+def write_qc_tsv(path: pathlib.Path, qc: dict) -> None:
+    """Write the per-sequence QC metrics, one row per sequence."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _atomic_path(path) as tmp, open(tmp, "w", newline="") as fh:
+        writer = csv.writer(fh, delimiter="\t")
+        writer.writerow(_QC_TSV_COLUMNS)
+        for row in qc["sequences"]:
+            writer.writerow([
+                row["accession"], row["length"], row["residues"],
+                f"{row['gap_fraction']:.6f}",
+                f"{row['ambiguous_fraction']:.6f}",
+                f"{row['composition_distance']:.6f}",
+                f"{row['length_z']:.3f}", f"{row['composition_z']:.3f}",
+                "yes" if row["outlier"] else "no",
+            ])
+    print(f"  QC table written to: {path}")
+
+
+def write_qc_json(path: pathlib.Path, qc: dict, source: str) -> None:
+    """Write ``qc_summary(qc)`` as JSON, tagged with the *source* file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _atomic_path(path) as tmp, open(tmp, "w") as fh:
+        json.dump({"file": source, **qc_summary(qc)}, fh, indent=2)
+        fh.write("\n")
+    print(f"  QC summary written to: {path}")
 
 
 # ---------------------------------------------------------------------------
@@ -2073,23 +4874,60 @@ def print_pairwise_matrix(ids: list[str], sim_mat: list[list[float]],
             print(row)
 
 
+def _extreme_pairs_blocked(ids: list[str], seqs: list[str], sim_mat, off_mat,
+                           keep_n: int = 3) -> "tuple[int, float, float, float, list]":
+    """
+    Pair count, mean, min, max and the *keep_n* most and least similar pairs
+    of a memory-mapped matrix, scanned in row blocks.
+    """
+    import numpy as np
+    count, total = 0, 0.0
+    lo, hi = float("inf"), float("-inf")
+    cand: list[tuple] = []
+    for r0, _r1, block, keep in _upper_blocks(sim_mat):
+        vals = block[keep]
+        if not vals.size:
+            continue
+        count += vals.size
+        total += float(vals.sum(dtype=np.float64))
+        lo, hi = min(lo, float(vals.min())), max(hi, float(vals.max()))
+        k     = min(keep_n, vals.size)
+        low   = np.where(keep, block, np.inf).ravel()
+        high  = np.where(keep, block, -np.inf).ravel()
+        picks = np.concatenate((np.argpartition(low, k - 1)[:k],
+                                np.argpartition(high, high.size - k)[-k:]))
+        width = block.shape[1]
+        for p in np.unique(picks).tolist():
+            i, j = p // width + r0, p % width + r0
+            cand.append((float(block[i - r0, j - r0]), int(off_mat[i, j]),
+                         ids[i], ids[j], len(seqs[i]), len(seqs[j])))
+        cand.sort(reverse=True)
+        cand = cand[:keep_n] + cand[-keep_n:] if len(cand) > 2 * keep_n else cand
+    return count, total / max(1, count), lo, hi, cand
+
+
 def print_pairwise_summary(ids: list[str], seqs: list[str],
                            sim_mat: list[list[float]],
                            off_mat: list[list[int]]) -> None:
-    pairs = [
-        (sim_mat[i][j], off_mat[i][j], ids[i], ids[j], len(seqs[i]), len(seqs[j]))
-        for i, j in combinations(range(len(ids)), 2)
-    ]
-    sims = [s for s, *_ in pairs]
+    if _is_array(sim_mat):
+        n_pairs, mean, lo, hi, pairs_sorted = _extreme_pairs_blocked(
+            ids, seqs, sim_mat, off_mat)
+    else:
+        pairs = [
+            (sim_mat[i][j], off_mat[i][j], ids[i], ids[j], len(seqs[i]), len(seqs[j]))
+            for i, j in combinations(range(len(ids)), 2)
+        ]
+        sims = [s for s, *_ in pairs]
+        n_pairs, mean, lo, hi = len(sims), sum(sims) / len(sims), min(sims), max(sims)
+        pairs_sorted = sorted(pairs, reverse=True)
 
     print("\nPairwise similarity summary")
     print("=" * 50)
-    print(f"  Pairs:    {len(sims)}")
-    print(f"  Mean:     {sum(sims)/len(sims):.4f}")
-    print(f"  Min:      {min(sims):.4f}")
-    print(f"  Max:      {max(sims):.4f}")
+    print(f"  Pairs:    {n_pairs}")
+    print(f"  Mean:     {mean:.4f}")
+    print(f"  Min:      {lo:.4f}")
+    print(f"  Max:      {hi:.4f}")
 
-    pairs_sorted = sorted(pairs, reverse=True)
     show = min(3, len(pairs_sorted))
 
     def _offset_note(off: int, la: int, lb: int) -> str:
@@ -2150,6 +4988,23 @@ def _guard(path: "str | pathlib.Path", overwrite: bool) -> None:
         )
 
 
+@contextmanager
+def _atomic_path(path: "str | pathlib.Path"):
+    """
+    Yield a temporary sibling of *path* to write to; it replaces *path* in
+    one rename once the block succeeds and is removed if it fails, so
+    readers – and concurrent runs – never see a half-written output.
+    The suffix is kept so matplotlib still infers the figure format.
+    """
+    path = pathlib.Path(path)
+    tmp  = path.with_name(f".{path.stem}.{os.getpid()}.tmp{path.suffix}")
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
 def _metadata_comment_lines(metadata: "dict | None") -> str:
     """Format *metadata* as ``# key: value`` comment lines for CSV/TSV files."""
     if not metadata:
@@ -2159,20 +5014,26 @@ def _metadata_comment_lines(metadata: "dict | None") -> str:
 
 def write_matrix_csv(path: str, ids: list[str], mat: list[list[float]],
                      metadata: "dict | None" = None) -> None:
-    with open(path, "w", newline="") as fh:
+    """Write the similarity matrix as CSV; memmap matrices are read in row blocks."""
+    with _atomic_path(path) as tmp, open(tmp, "w", newline="") as fh:
         if metadata:
             fh.write(_metadata_comment_lines(metadata))
         writer = csv.writer(fh)
         writer.writerow([""] + ids)
-        for i, row_id in enumerate(ids):
-            writer.writerow([row_id] + [f"{mat[i][j]:.6f}" for j in range(len(ids))])
+        if _is_array(mat):
+            for r0, r1 in _row_blocks(len(ids), len(ids)):
+                for row_id, row in zip(ids[r0:r1], mat[r0:r1].tolist()):
+                    writer.writerow([row_id] + [f"{v:.6f}" for v in row])
+        else:
+            for i, row_id in enumerate(ids):
+                writer.writerow([row_id] + [f"{mat[i][j]:.6f}" for j in range(len(ids))])
     print(f"  Matrix written to: {path}")
 
 
 def write_conservation_csv(path: str, scores: list[float],
                            entropy: "list[tuple[float, float]] | None" = None,
                            metadata: "dict | None" = None) -> None:
-    with open(path, "w", newline="") as fh:
+    with _atomic_path(path) as tmp, open(tmp, "w", newline="") as fh:
         if metadata:
             fh.write(_metadata_comment_lines(metadata))
         writer = csv.writer(fh)
@@ -2201,6 +5062,14 @@ _INPUT_EXTS = frozenset(
 )
 
 
+def input_stem(path: "str | pathlib.Path") -> str:
+    """File stem of *path* without a compression suffix (x.fa.gz → x)."""
+    p = pathlib.Path(path)
+    if p.suffix.lower() in _COMPRESSION_EXTS:
+        p = p.with_suffix("")
+    return p.stem
+
+
 def expand_input_paths(
     paths: list[str], recursive: bool = False
 ) -> list[pathlib.Path]:
@@ -2208,7 +5077,8 @@ def expand_input_paths(
     Expand a mixed list of file paths and directory paths to a deduplicated,
     sorted list of FASTA file Paths.
 
-    Directories are scanned for files whose extension is in _INPUT_EXTS.
+    Directories are scanned for files whose extension is in _INPUT_EXTS,
+    optionally followed by a compression suffix (.gz, .bz2, .xz).
     With *recursive=True* the scan descends into sub-directories.
     Unrecognised paths are skipped with a warning.
     """
@@ -2219,7 +5089,8 @@ def expand_input_paths(
             pat = "**/*" if recursive else "*"
             hits = sorted(
                 h for ext in _INPUT_EXTS
-                for h in p.glob(f"{pat}{ext}")
+                for comp in ("", *_COMPRESSION_EXTS)
+                for h in p.glob(f"{pat}{ext}{comp}")
                 if h.is_file()
             )
             if not hits:
@@ -2392,32 +5263,106 @@ def setup_logging(
     return logger
 
 
+def _peak_rss_mb() -> "float | None":
+    """Peak resident set size of this process in MiB (None if unknown)."""
+    try:
+        import resource
+    except ImportError:              # not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    mb = peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+    return round(mb, 1)
+
+
 class PhaseTimer:
-    """Simple wall-clock timer for tracking named analysis phases."""
+    """
+    Instrumentation for named analysis phases.
+
+    Each phase records wall-clock and CPU time, the peak RSS of the process
+    when it ended, and any work counters added with ``count`` (e.g. the
+    number of pairs scored).  CPU time is that of this process only, so
+    work done by --jobs worker processes shows up as wall time.  With
+    *profile_dir* every phase also runs
+    under cProfile and its stats are dumped to
+    ``<profile_dir>/<label>.<phase>.prof`` (open with ``pstats`` or
+    snakeviz).  ``as_dict`` returns the same data for JSON output.
+    """
 
-    def __init__(self) -> None:
-        self._phases: list[tuple[str, float]] = []
+    def __init__(self, profile_dir: "str | None" = None,
+                 label: str = "run") -> None:
+        self._phases: list[dict] = []
         self._start: float = time.time()
-        self._current: "tuple[str, float] | None" = None
+        self._cpu0:  float = time.process_time()
+        self._current: "dict | None" = None
+        self._profile_dir = pathlib.Path(profile_dir) if profile_dir else None
+        self._label   = label
+        self._profile = None
 
     def start(self, name: str) -> None:
         self.end()
-        self._current = (name, time.time())
+        self._current = {"name": name, "t0": time.time(),
+                         "c0": time.process_time(), "counts": {}}
+        if self._profile_dir is not None:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def count(self, key: str, n: int = 1) -> None:
+        """Add *n* to counter *key* of the running phase."""
+        if self._current is not None:
+            counts = self._current["counts"]
+            counts[key] = counts.get(key, 0) + n
 
     def end(self) -> None:
-        if self._current:
-            name, t0 = self._current
-            self._phases.append((name, time.time() - t0))
-            self._current = None
+        cur = self._current
+        if cur is None:
+            return
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile_dir.mkdir(parents=True, exist_ok=True)
+            out = self._profile_dir / f"{self._label}.{cur['name']}.prof"
+            self._profile.dump_stats(str(out))
+            self._profile = None
+            _log.debug("cProfile stats for phase %s written to %s",
+                       cur["name"], out)
+        self._phases.append({
+            "name":        cur["name"],
+            "wall_s":      time.time() - cur["t0"],
+            "cpu_s":       time.process_time() - cur["c0"],
+            "peak_rss_mb": _peak_rss_mb(),
+            "counts":      cur["counts"],
+        })
+        self._current = None
+
+    def as_dict(self) -> dict:
+        """Phase records plus run totals, ready for ``json.dump``."""
+        self.end()
+        return {
+            "label":       self._label,
+            "wall_s":      round(time.time() - self._start, 4),
+            "cpu_s":       round(time.process_time() - self._cpu0, 4),
+            "peak_rss_mb": _peak_rss_mb(),
+            "phases": [
+                {**ph, "wall_s": round(ph["wall_s"], 4),
+                 "cpu_s": round(ph["cpu_s"], 4)}
+                for ph in self._phases
+            ],
+        }
 
     def summary(self) -> str:
         self.end()
         total = time.time() - self._start
-        lines = [f"  {'Phase':<25} {'Time':>8}"]
-        lines.append(f"  {'-' * 25} {'-' * 8}")
-        for name, dt in self._phases:
-            lines.append(f"  {name:<25} {dt:>7.2f}s")
-        lines.append(f"  {'TOTAL':<25} {total:>7.2f}s")
+        cpu   = time.process_time() - self._cpu0
+        lines = [f"  {'Phase':<25} {'Time':>8} {'CPU':>8} {'Peak RSS':>10}  Counts"]
+        lines.append(f"  {'-' * 25} {'-' * 8} {'-' * 8} {'-' * 10}  {'-' * 6}")
+        for ph in self._phases:
+            rss = ph["peak_rss_mb"]
+            rss = f"{rss:>7.1f} MB" if rss is not None else f"{'–':>10}"
+            counts = ", ".join(f"{k}={v:,}" for k, v in ph["counts"].items())
+            lines.append(f"  {ph['name']:<25} {ph['wall_s']:>7.2f}s "
+                         f"{ph['cpu_s']:>7.2f}s {rss}  {counts}")
+        lines.append(f"  {'TOTAL':<25} {total:>7.2f}s {cpu:>7.2f}s")
         return "\n".join(lines)
 
 
@@ -2481,6 +5426,165 @@ def _write_example_fasta() -> str:
     return path
 
 
+# ---------------------------------------------------------------------------
+# Synthetic benchmark
+# ---------------------------------------------------------------------------
+
+_BENCH_RESIDUES = "ACDEFGHIKLMNPQRSTVWY"
+_BENCH_RANK     = "genus"
+
+
+def synthetic_family(
+    n: int,
+    length: int,
+    identity: float,
+    n_groups: int = 4,
+    seed: int = 0,
+) -> tuple[list[str], list[str], dict[str, TaxInfo]]:
+    """
+    Generate a synthetic protein family for benchmarking.
+
+    A random root sequence of *length* residues is mutated once per group
+    and again per member, with the per-level substitution rate chosen so
+    that every member shares about *identity* with the root.  Members are
+    dealt round-robin into *n_groups* genera, and up to 10% of each end is
+    trimmed to give the unaligned set realistic length variation.
+
+    Returns ``(ids, aligned, tax_map)``: the aligned sequences carry '-'
+    where the ends were trimmed (strip them for the unaligned set) and
+    *tax_map* places each id in its genus for the rank statistics.
+    """
+    import random
+
+    if not 0.0 < identity <= 1.0:
+        raise ValueError(f"identity must be in (0, 1], got {identity}")
+    rng  = random.Random(seed)
+    rate = 1.0 - math.sqrt(identity)
+
+    def mutate(seq: list[str]) -> list[str]:
+        out = list(seq)
+        for i, aa in enumerate(out):
+            if rng.random() < rate:
+                out[i] = rng.choice(_BENCH_RESIDUES.replace(aa, ""))
+        return out
+
+    root = [rng.choice(_BENCH_RESIDUES) for _ in range(length)]
+    ancestors = [mutate(root) for _ in range(n_groups)]
+    ids: list[str] = []
+    aligned: list[str] = []
+    tax_map: dict[str, TaxInfo] = {}
+    trim_max = length // 10
+    for i in range(n):
+        g   = i % n_groups
+        seq = mutate(ancestors[g])
+        lead, trail = rng.randint(0, trim_max), rng.randint(0, trim_max)
+        seq[:lead] = "-" * lead
+        if trail:
+            seq[-trail:] = "-" * trail
+        acc = f"B{i:05d}"
+        ids.append(acc)
+        aligned.append("".join(seq))
+        tax_map[acc] = TaxInfo(
+            taxon_id=100_000 + i,
+            scientific_name=f"Synthetica g{g} sp{i}",
+            lineage=[TaxNode(1_000 + g, f"Synthetica g{g}", _BENCH_RANK),
+                     TaxNode(100_000 + i, f"Synthetica g{g} sp{i}", "species")],
+        )
+    return ids, aligned, tax_map
+
+
+def _write_synthetic_fasta(path: str, ids: list[str], seqs: list[str]) -> None:
+    """Write *seqs* as UniProt-style FASTA with 60-column sequence lines."""
+    with open(path, "w") as fh:
+        for i, (acc, seq) in enumerate(zip(ids, seqs)):
+            fh.write(f">sp|{acc}|SYN{i}_BENCH Synthetic protein "
+                     f"OS=Synthetica sp{i} OX={100_000 + i}\n")
+            for j in range(0, len(seq), 60):
+                fh.write(seq[j:j + 60] + "\n")
+
+
+def run_benchmark(
+    n: int,
+    length: int,
+    identity: float,
+    repeat: int = 3,
+    engine: str = "auto",
+    jobs: int = 1,
+    profile_dir: "str | None" = None,
+) -> dict:
+    """
+    Time the main analysis phases on a synthetic family.
+
+    Phases: ``parse`` (FASTA with label hints), ``pairwise_aligned``
+    (Hamming on the aligned set), ``pairwise_unaligned`` (BLOSUM62 sliding
+    best on the trimmed set), ``conservation`` (per-position conservation
+    and entropy), ``rank_stats`` (rank conservation with 100 bootstrap
+    resamples plus a 200-permutation test) and ``clustering`` (average
+    linkage; skipped without scipy).  Every repeat uses a fresh
+    ``PhaseTimer``; the returned dict holds all of them plus the
+    parameters, for tracking regressions across versions.
+    """
+    ids, aligned, tax_map = synthetic_family(n, length, identity)
+    unaligned = [s.replace("-", "") for s in aligned]
+    blosum    = compile_matrix(load_matrix("blosum62"))
+    fd, fasta = tempfile.mkstemp(suffix=".fasta", prefix="prot_ction_bench_")
+    os.close(fd)
+    runs: list[dict] = []
+    try:
+        _write_synthetic_fasta(fasta, ids, unaligned)
+        n_pairs = n * (n - 1) // 2
+        for r in range(1, repeat + 1):
+            t = PhaseTimer(profile_dir, label=f"bench{r}")
+            t.start("parse")
+            hints = LabelHints()
+            t.count("records", len(parse_fasta(fasta, hints=hints)))
+            _infer_protein_label(fasta, hints=hints)
+
+            t.start("pairwise_aligned")
+            sim_mat, _ = pairwise_matrix(aligned, None, engine=engine, jobs=jobs)
+            t.count("pairs", n_pairs)
+
+            t.start("pairwise_unaligned")
+            pairwise_matrix(unaligned, blosum, blosum.min,
+                            engine=engine, jobs=jobs)
+            t.count("pairs", n_pairs)
+
+            t.start("conservation")
+            per_position_conservation(aligned, blosum, blosum.min,
+                                      engine=engine)
+            per_position_entropy(aligned, engine=engine)
+            t.count("columns", length)
+
+            t.start("rank_stats")
+            rank_conservation(ids, aligned, sim_mat, tax_map, _BENCH_RANK,
+                              n_bootstrap=100, seed=1, engine=engine)
+            permutation_test_rank(ids, sim_mat, tax_map, _BENCH_RANK,
+                                  n_permutations=200, seed=1, engine=engine)
+            t.count("permutations", 200)
+
+            t.start("clustering")
+            if cluster_similarity(ids, sim_mat) is None:
+                t.count("skipped")
+            runs.append(t.as_dict())
+            print(f"\nRun {r}/{repeat}:\n{t.summary()}")
+    finally:
+        os.unlink(fasta)
+    return {
+        "version":  VERSION,
+        "python":   sys.version.split()[0],
+        "engine":   engine if engine != "auto" else
+                    ("numpy" if _use_numpy(engine) else "python"),
+        "jobs":     jobs,
+        "params":   {"n": n, "length": length, "identity": identity,
+                     "repeat": repeat},
+        "best_wall_s": {
+            ph["name"]: min(run["phases"][i]["wall_s"] for run in runs)
+            for i, ph in enumerate(runs[0]["phases"])
+        } if runs else {},
+        "runs":     runs,
+    }
+
+
 # ---------------------------------------------------------------------------
 # Violin / box plot for intra vs inter similarity distributions
 # ---------------------------------------------------------------------------
@@ -2496,7 +5600,6 @@ def plot_violin(
     string (or None when matplotlib is not available).
     """
     try:
-        import base64, io
         import matplotlib
         matplotlib.use("Agg")
         import matplotlib.pyplot as plt
@@ -2506,26 +5609,34 @@ def plot_violin(
                   file=sys.stderr)
         return None
 
-    groups    = rank_result["groups"]
-    all_intra = rank_result.get("all_intra") or [
-        s for g in groups.values() for s, *_ in g["intra_pairs"]
-    ]
-    all_inter = rank_result.get("all_inter") or [
-        s for s, *_ in rank_result["inter_pairs"]
-    ]
+    if rank_result.get("streamed"):
+        if path:
+            print("  Note: the violin plot needs every pairwise value and is "
+                  "not drawn for the memory-mapped matrix – skipped.",
+                  file=sys.stderr)
+        return None
 
-    if not all_intra and not all_inter:
+    # The distributions may be NumPy arrays (see ``_figure_rank_result``)
+    groups    = rank_result["groups"]
+    all_intra = rank_result.get("all_intra")
+    if all_intra is None or not len(all_intra):
+        all_intra = [s for g in groups.values() for s, *_ in g["intra_pairs"]]
+    all_inter = rank_result.get("all_inter")
+    if all_inter is None or not len(all_inter):
+        all_inter = [s for s, *_ in rank_result["inter_pairs"]]
+
+    if not len(all_intra) and not len(all_inter):
         return None
 
     rank   = rank_result.get("rank", "group")
     fig, ax = plt.subplots(figsize=(6, 4.5))
 
     data, labels, colors = [], [], []
-    if all_intra:
+    if len(all_intra):
         data.append(all_intra)
         labels.append(f"Within-{rank}\n(n={len(all_intra)})")
         colors.append("#2ecc71")
-    if all_inter:
+    if len(all_inter):
         data.append(all_inter)
         labels.append(f"Between-{rank}\n(n={len(all_inter)})")
         colors.append("#e74c3c")
@@ -2583,14 +5694,180 @@ def plot_violin(
     plt.tight_layout()
 
     if path:
-        plt.savefig(path, dpi=150, bbox_inches="tight")
+        with _atomic_path(path) as tmp:
+            plt.savefig(tmp, dpi=150, bbox_inches="tight")
         print(f"  Violin plot written to: {path}")
 
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png", dpi=120, bbox_inches="tight")
+    b64 = _png_b64(dpi=120)
     plt.close(fig)
-    buf.seek(0)
-    return base64.b64encode(buf.read()).decode()
+    return b64
+
+
+# ---------------------------------------------------------------------------
+# Figure rendering
+# ---------------------------------------------------------------------------
+
+# Functions a FigureJob may name; resolved in the process that draws it
+_FIGURE_FUNCS = frozenset({
+    "plot_rank_heatmap", "plot_violin", "plot_dendrogram",
+    "_conservation_plot_b64", "_plot_focus_heatmap", "_plot_focus_violin",
+})
+
+
+@dataclass
+class FigureJob:
+    """
+    One figure to draw: ``func(*args, **kwargs)``, its return value (a
+    base64 PNG for the plotting functions that make one) stored under *key*.
+    """
+    key: str
+    func: str
+    args: tuple = ()
+    kwargs: dict = field(default_factory=dict)
+
+
+class _SharedRef(NamedTuple):
+    """Placeholder for a NumPy array handed to a figure worker by name."""
+    spec: tuple
+
+
+def _figure_rank_result(rank_result: dict) -> dict:
+    """
+    The part of a ``rank_conservation`` result the figures need.
+
+    Per-pair tuples are reduced to what ``plot_rank_heatmap`` and
+    ``plot_violin`` read (group medians, ``pair_stats``, the two
+    distributions), and the distributions become float arrays so
+    ``render_figures`` can pass them through shared memory.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    fig = {
+        "rank":       rank_result["rank"],
+        "groups":     {
+            name: {"members":      g["members"],
+                   "intra_pairs":  [],
+                   "n_pairs":      intra_pair_count(g),
+                   "intra_median": g["intra_median"]}
+            for name, g in rank_result["groups"].items()
+        },
+        "inter_pairs": [],
+        "pair_stats":  inter_pair_stats(rank_result),
+        "streamed":    rank_result.get("streamed", False),
+    }
+    for key in ("all_intra", "all_inter"):
+        vals = rank_result.get(key) or []
+        fig[key] = np.asarray(vals, dtype=np.float64) if np is not None else vals
+    return fig
+
+
+def _share_value(value, segments: list):
+    """Replace NumPy arrays in *value* (top level or dict values) by refs."""
+    if type(value).__name__ == "ndarray":
+        shm, spec = _share_array(value)
+        segments.append(shm)
+        return _SharedRef(spec)
+    if isinstance(value, dict):
+        return {k: _share_value(v, segments) for k, v in value.items()}
+    return value
+
+
+def _resolve_value(value):
+    """Inverse of ``_share_value``: copy shared arrays into this process."""
+    if isinstance(value, _SharedRef):
+        shm, view = _attach_array(value.spec)
+        arr = view.copy()
+        del view                     # release the buffer before close()
+        shm.close()
+        return arr
+    if isinstance(value, dict):
+        return {k: _resolve_value(v) for k, v in value.items()}
+    return value
+
+
+def _figure_worker_init() -> None:
+    """Pool initializer: select the Agg backend before anything is drawn."""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+    except ImportError:
+        pass
+
+
+def _draw_figure(job: FigureJob) -> tuple[str, object, str, str]:
+    """
+    Draw one figure; returns ``(key, result, stdout, stderr)``.
+
+    Console output is captured so ``render_figures`` can print it in job
+    order, and a failing figure is reported instead of aborting the rest.
+    """
+    if job.func not in _FIGURE_FUNCS:
+        raise ValueError(f"not a figure function: {job.func}")
+    out, err = io.StringIO(), io.StringIO()
+    result = None
+    with redirect_stdout(out), redirect_stderr(err):
+        try:
+            args   = tuple(_resolve_value(a) for a in job.args)
+            kwargs = {k: _resolve_value(v) for k, v in job.kwargs.items()}
+            result = globals()[job.func](*args, **kwargs)
+        except Exception as exc:      # noqa: BLE001 – one figure only
+            print(f"  Warning: {job.key} figure failed: {exc}",
+                  file=sys.stderr)
+            _log.exception("Figure %s failed", job.key)
+    return job.key, result, out.getvalue(), err.getvalue()
+
+
+def render_figures(jobs: list[FigureJob], workers: int = 1) -> dict:
+    """
+    Draw independent figures and return ``{job.key: result}``.
+
+    With *workers* > 1 the figures are drawn in a process pool on the Agg
+    backend; NumPy arrays in the job arguments (such as the intra/inter
+    similarity distributions) are handed over through shared memory
+    rather than pickled.  Each figure's console output is printed in job
+    order either way.  Without matplotlib every figure only prints its
+    warning, so no pool is started.
+    """
+    import importlib.util
+
+    if not jobs:
+        return {}
+    workers = min(workers, len(jobs))
+    if workers > 1 and importlib.util.find_spec("matplotlib") is None:
+        workers = 1
+    if workers <= 1:
+        done = [_draw_figure(job) for job in jobs]
+    else:
+        import multiprocessing
+        # Import matplotlib here once; forked workers inherit it
+        _figure_worker_init()
+        segments: list = []
+        try:
+            shared = [
+                FigureJob(job.key, job.func,
+                          tuple(_share_value(a, segments) for a in job.args),
+                          {k: _share_value(v, segments)
+                           for k, v in job.kwargs.items()})
+                for job in jobs
+            ]
+            _log.info("Drawing %d figure(s) on %d worker(s)",
+                      len(jobs), workers)
+            with multiprocessing.Pool(
+                processes=workers, initializer=_figure_worker_init,
+            ) as pool:
+                done = pool.map(_draw_figure, shared, chunksize=1)
+        finally:
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+    figures = {}
+    for key, result, out_text, err_text in done:
+        sys.stdout.write(out_text)
+        sys.stderr.write(err_text)
+        figures[key] = result
+    return figures
 
 
 # ---------------------------------------------------------------------------
@@ -2665,10 +5942,63 @@ Examples:
             "alpha and beta subunits) for demo/testing purposes."
         ),
     )
+    p.add_argument(
+        "--benchmark", action="store_true",
+        help=(
+            "Time parsing, pairwise scoring (aligned and unaligned), "
+            "conservation, rank statistics and clustering on a synthetic "
+            "protein family and exit.  Size it with --bench-n, "
+            "--bench-length and --bench-identity; combine with "
+            "--timing-json to keep the results for later comparison."
+        ),
+    )
+    p.add_argument(
+        "--bench-n", type=int, default=200, metavar="N",
+        help="Number of sequences in the --benchmark family.  Default: 200.",
+    )
+    p.add_argument(
+        "--bench-length", type=int, default=300, metavar="L",
+        help="Root sequence length for --benchmark.  Default: 300.",
+    )
+    p.add_argument(
+        "--bench-identity", type=float, default=0.7, metavar="F",
+        help=(
+            "Expected identity of each --benchmark sequence to the family "
+            "root, in (0, 1].  Default: 0.7."
+        ),
+    )
+    p.add_argument(
+        "--bench-repeat", type=int, default=3, metavar="R",
+        help=(
+            "Repeat the --benchmark R times; the best wall time per phase "
+            "is reported.  Default: 3."
+        ),
+    )
     p.add_argument(
         "--recursive", action="store_true",
         help="Scan directories recursively for input files.",
     )
+    p.add_argument(
+        "--parallel-files", type=int, default=1, metavar="N",
+        help=(
+            "Analyse up to N input files at once in separate worker processes "
+            "(default: 1; 0 = one per CPU).  Workers share the SQLite taxonomy "
+            "and pair-score caches, log lines are tagged with the file name, "
+            "each file's console output is printed as one block when it "
+            "finishes, and a failing file does not stop the others.  A run "
+            f"summary is written to {_DEFAULT_RUN_SUMMARY} unless "
+            "--run-summary says otherwise.  Combine with --jobs with care: "
+            "each worker may start its own --jobs pool."
+        ),
+    )
+    p.add_argument(
+        "--run-summary", metavar="FILE", default=None,
+        help=(
+            "Write a JSON summary of the run (status, error, medians, outputs "
+            "and wall time per input file) to FILE, relative to --out-dir "
+            "when given.  Written by default with --parallel-files."
+        ),
+    )
     # ── analysis ───────────────────────────────────────────────────────────
     p.add_argument(
         "--matrix", action="store_true",
@@ -2699,6 +6029,43 @@ Examples:
             "Set to 1.01 to disable."
         ),
     )
+    dedupe = p.add_mutually_exclusive_group()
+    dedupe.add_argument(
+        "--dedupe-exact", action="store_true",
+        help=(
+            "Check every pair of the similarity matrix for near-duplicates "
+            "(the default; the matrix is already computed, so this is a "
+            "single scan)."
+        ),
+    )
+    dedupe.add_argument(
+        "--dedupe-minhash", action="store_true",
+        help=(
+            "Only check candidate pairs from a MinHash/LSH prefilter over "
+            "amino-acid k-mers.  Lossy: pairs with poor k-mer overlap (e.g. "
+            "short fragments of a longer sequence) can be missed, and with "
+            "the full matrix already scored it is rarely faster."
+        ),
+    )
+    p.add_argument(
+        "--minhash-k", type=int, default=_MINHASH_K, metavar="K",
+        help=(f"k-mer length for --dedupe-minhash "
+              f"(default: {_MINHASH_K}; 1–{_MINHASH_MAX_K})."),
+    )
+    p.add_argument(
+        "--minhash-hashes", type=int, default=_MINHASH_HASHES, metavar="N",
+        help=(f"MinHash sketch size for --dedupe-minhash "
+              f"(default: {_MINHASH_HASHES})."),
+    )
+    p.add_argument(
+        "--minhash-bands", type=int, default=_MINHASH_BANDS, metavar="B",
+        help=(
+            f"LSH bands for --dedupe-minhash (default: "
+            f"{_MINHASH_BANDS}); must divide --minhash-hashes.  More bands "
+            f"(fewer rows per band) raise recall at lower similarities and "
+            f"admit more candidates."
+        ),
+    )
     p.add_argument(
         "--scoring",
         choices=SCORING_CHOICES,
@@ -2718,6 +6085,44 @@ Examples:
             f"Choices: {', '.join(SCORING_CHOICES)}."
         ),
     )
+    p.add_argument(
+        "--engine", choices=ENGINE_CHOICES, default="auto",
+        help=(
+            "Implementation used for pairwise similarity and virtual-alignment "
+            "offsets.  'auto' (default): vectorized NumPy engine when NumPy is "
+            "installed, otherwise pure Python.  'numpy': require the NumPy "
+            "engine.  'python': always use the pure-Python reference "
+            "implementation (same results, slower)."
+        ),
+    )
+    p.add_argument(
+        "--jobs", type=int, default=1, metavar="N",
+        help=(
+            "Number of worker processes for pairwise similarity and for "
+            "drawing figures (default: 1).  0 uses every available CPU.  "
+            "Pairwise scoring in parallel requires the NumPy engine; results "
+            "are identical to a single-process run."
+        ),
+    )
+    p.add_argument(
+        "--memmap-threshold", type=int, default=_MEMMAP_THRESHOLD, metavar="N",
+        help=(
+            "Above N sequences, store the similarity and offset matrices as "
+            "memory-mapped float32/int32 files in --scratch-dir instead of "
+            f"nested lists (default: {_MEMMAP_THRESHOLD}; 0 = never).  Medians "
+            "and rank statistics are then computed blockwise; sequence-level "
+            "trees, violin plots and the permutation test are skipped.  "
+            "Requires NumPy."
+        ),
+    )
+    p.add_argument(
+        "--scratch-dir", metavar="DIR", default=None,
+        help=(
+            "Directory for the memory-mapped matrix files (default: the "
+            "system temporary directory).  Needs about 8·N² bytes free; the "
+            "files are unlinked as soon as the matrices are filled."
+        ),
+    )
     # ── output files ───────────────────────────────────────────────────────
     p.add_argument(
         "--out-dir", metavar="DIR",
@@ -2737,10 +6142,29 @@ Examples:
         ),
     )
     p.add_argument(
-        "--out-conservation", metavar="FILE", nargs="?", const="",
+        "--out-conservation", metavar="FILE", nargs="?", const="",
+        help=(
+            "Write per-position conservation scores to a CSV file.  "
+            "Omit FILE to auto-name as {stem}_conservation.csv."
+        ),
+    )
+    p.add_argument(
+        "--out-qc", metavar="FILE", nargs="?", const="",
+        help=(
+            "Write the pre-flight QC metrics of every sequence (length, gap "
+            "and ambiguous fractions, compositional distance, robust "
+            "z-scores, outlier flag) to a TSV file, plus a compact JSON "
+            "summary next to it with a .json suffix.  "
+            "Omit FILE to auto-name as {stem}_qc.tsv."
+        ),
+    )
+    p.add_argument(
+        "--fasta-index", action="store_true",
         help=(
-            "Write per-position conservation scores to a CSV file.  "
-            "Omit FILE to auto-name as {stem}_conservation.csv."
+            "Write a samtools-style index (FILE.fai) next to each "
+            "uncompressed FASTA input, collected while the file is parsed "
+            "(no extra pass).  Needs fixed-width sequence lines; compressed "
+            "and non-FASTA inputs are skipped."
         ),
     )
     # ── taxonomy options ───────────────────────────────────────────────────
@@ -2756,17 +6180,53 @@ Examples:
         "--ncbi-api-key", metavar="KEY",
         help="NCBI API key (raises rate limit from 3 to 10 requests/second).",
     )
+    p.add_argument(
+        "--tax-batch-size", metavar="N", type=int, default=_TAX_BATCH_SIZE,
+        help=(
+            f"Number of accessions / taxon IDs resolved per UniProt or NCBI "
+            f"request (default: {_TAX_BATCH_SIZE}).  Use 1 to look up each "
+            f"accession individually."
+        ),
+    )
     p.add_argument(
         "--cache-file", metavar="FILE", default=_DEFAULT_CACHE,
         help=(
-            f"JSON file used to cache taxonomy lookups between runs "
+            f"File used to cache taxonomy lookups between runs "
             f"(default: {_DEFAULT_CACHE}).  Pass an empty string to disable caching."
         ),
     )
+    p.add_argument(
+        "--cache-backend", choices=CACHE_BACKENDS, default="sqlite",
+        help=(
+            "Taxonomy cache storage (default: sqlite).  'sqlite' writes entries "
+            "incrementally and is safe for concurrent runs; an existing JSON "
+            "cache next to the SQLite file is imported on first use.  'json' "
+            "keeps the legacy single-file JSON cache."
+        ),
+    )
+    p.add_argument(
+        "--cache-ttl", metavar="DAYS", type=float, default=None,
+        help=(
+            "Treat cached taxonomy entries older than DAYS as missing and "
+            "fetch them again (SQLite backend only; default: never expire)."
+        ),
+    )
     p.add_argument(
         "--no-cache", action="store_true",
         help="Disable the taxonomy cache entirely (always fetch from network).",
     )
+    p.add_argument(
+        "--pair-cache", metavar="FILE", nargs="?", const=_DEFAULT_PAIR_CACHE,
+        default=None,
+        help=(
+            "Keep pairwise similarity results in a persistent SQLite store "
+            f"(default file when given without a value: {_DEFAULT_PAIR_CACHE}) "
+            "and only score sequence pairs not seen before.  Pairs are keyed "
+            "by sequence content, scoring matrix and mode, so re-running a "
+            "file that gained one sequence scores only the new pairs.  Not "
+            "used for memory-mapped matrices."
+        ),
+    )
     p.add_argument(
         "--clear-cache", action="store_true",
         help=(
@@ -2870,6 +6330,14 @@ Examples:
             "Default: 0 (disabled)."
         ),
     )
+    p.add_argument(
+        "--seed", type=int, default=None, metavar="N",
+        help=(
+            "Random seed for --permutations and --bootstrap, making their "
+            "results reproducible (for a given --engine).  "
+            "Default: unseeded."
+        ),
+    )
     p.add_argument(
         "--verbose", action="store_true",
         help="Enable verbose/debug logging output.",
@@ -2878,6 +6346,22 @@ Examples:
         "--log-file", metavar="FILE",
         help="Write structured log output (with timing) to FILE.",
     )
+    p.add_argument(
+        "--timing-json", metavar="FILE",
+        help=(
+            "Write per-phase instrumentation (wall and CPU time, peak RSS, "
+            "pair counts) for every input file to FILE as JSON, relative "
+            "to --out-dir when given.  With --benchmark, the benchmark "
+            "results are written there instead."
+        ),
+    )
+    p.add_argument(
+        "--profile-dir", metavar="DIR",
+        help=(
+            "Run every analysis phase under cProfile and dump the stats to "
+            "DIR/<input stem>.<phase>.prof (inspect with python -m pstats)."
+        ),
+    )
     p.add_argument(
         "--overwrite", action="store_true",
         help=(
@@ -2898,6 +6382,18 @@ Examples:
             "(e.g. 'Bacillus subtilis' when --rank species)."
         ),
     )
+    p.add_argument(
+        "--focus-file", metavar="FILE",
+        help=(
+            "Like --focus-group, but for many focus groups in one pass.  "
+            "FILE lists one group per line as NAME<TAB>TAXA, where TAXA are "
+            "taxon names at --rank separated by tabs or commas (a line with "
+            "only NAME stands for that taxon).  A group made of several taxa "
+            "is treated as one: its intra-group row covers all pairs among "
+            "its members.  Blank lines and lines starting with '#' are "
+            "ignored.  May be combined with --focus-group."
+        ),
+    )
     p.add_argument(
         "--organism-labels", action="store_true",
         help=(
@@ -2922,6 +6418,15 @@ Examples:
             "Respects --out-dir for relative paths."
         ),
     )
+    p.add_argument(
+        "--no-plots", action="store_true",
+        help=(
+            "Skip all figure generation: --heatmap, --dendrogram, --violin "
+            "and the focus-group plots are not written and the --report "
+            "contains tables only, so matplotlib is never imported.  "
+            "CSV/TSV and tree-file outputs are unaffected."
+        ),
+    )
     return p
 
 
@@ -2935,7 +6440,6 @@ def _write_rank_tsv(path: pathlib.Path, result: dict,
     pair sorted alphabetically so group_a <= group_b.
     """
     groups      = result["groups"]
-    inter_pairs = result["inter_pairs"]   # (sim, ta, tb, id1, id2)
 
     rows: list[dict] = []
 
@@ -2949,34 +6453,30 @@ def _write_rank_tsv(path: pathlib.Path, result: dict,
             "group_b":           taxon,
             "n_members_a":       n,
             "n_members_b":       n,
-            "n_pairs":           len(gdata["intra_pairs"]),
+            "n_pairs":           intra_pair_count(gdata),
             "median_similarity": f"{med:.6f}" if med is not None else "",
         })
 
     # ── between-group rows (grouped by taxon pair) ───────────────────────────
-    pair_sims: dict = {}
-    for sim, ta, tb, _id1, _id2 in inter_pairs:
-        key = (ta, tb) if ta <= tb else (tb, ta)
-        if key not in pair_sims:
-            pair_sims[key] = []
-        pair_sims[key].append(sim)
-
-    for (ta, tb), sims in sorted(pair_sims.items()):
-        med = statistics.median(sims) if sims else None
+    pair_stats: dict = {}
+    for (ta, tb), stats in inter_pair_stats(result).items():
+        pair_stats[(ta, tb) if ta <= tb else (tb, ta)] = stats
+
+    for (ta, tb), (n_pairs, med) in sorted(pair_stats.items()):
         rows.append({
             "comparison_type":   "inter",
             "group_a":           ta,
             "group_b":           tb,
             "n_members_a":       len(groups[ta]["members"]),
             "n_members_b":       len(groups[tb]["members"]),
-            "n_pairs":           len(sims),
+            "n_pairs":           n_pairs,
             "median_similarity": f"{med:.6f}" if med is not None else "",
         })
 
     if not rows:
         return
     path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", newline="") as fh:
+    with _atomic_path(path) as tmp, open(tmp, "w", newline="") as fh:
         if metadata:
             fh.write(_metadata_comment_lines(metadata))
         writer = csv.DictWriter(fh, fieldnames=list(rows[0].keys()),
@@ -3012,164 +6512,223 @@ def _extract_focus_medians(
         medians[focus_group] = intra_med
 
     # Inter-group medians: focus_group ↔ each other group
-    inter_pairs = rank_result["inter_pairs"]   # (sim, ta, tb, id1, id2)
-    pair_sims: dict[str, list[float]] = {}
-    for sim, ta, tb, _id1, _id2 in inter_pairs:
+    for (ta, tb), (_n, med) in inter_pair_stats(rank_result).items():
         if ta == focus_group:
-            pair_sims.setdefault(tb, []).append(sim)
+            medians[tb] = med
         elif tb == focus_group:
-            pair_sims.setdefault(ta, []).append(sim)
-
-    for taxon, sims in pair_sims.items():
-        medians[taxon] = statistics.median(sims)
+            medians[ta] = med
 
     return medians
 
 
-def _focus_dist_stats(values: list[float]) -> dict:
-    """Compute summary statistics for a list of similarity values."""
-    n = len(values)
-    if n == 0:
-        nan = float("nan")
-        return {"n": 0, "median": nan, "mean": nan, "stdev": nan,
-                "q1": nan, "q3": nan, "min": nan, "max": nan, "values": []}
-    sv = sorted(values)
-    med = statistics.median(sv)
-    mn  = statistics.mean(sv)
-    sd  = statistics.stdev(sv) if n > 1 else 0.0
-    # Quartiles
-    mid = n // 2
-    lower = sv[:mid]
-    upper = sv[mid + (n % 2):]
-    q1 = statistics.median(lower) if lower else sv[0]
-    q3 = statistics.median(upper) if upper else sv[-1]
-    return {"n": n, "median": med, "mean": mn, "stdev": sd,
-            "q1": q1, "q3": q3, "min": sv[0], "max": sv[-1], "values": sv}
-
-
-def _extract_focus_distributions(
-    rank_result: dict,
-    focus_group: str,
-) -> "dict[str, dict] | None":
-    """Extract full distributional statistics for *focus_group* vs every other group.
-
-    Returns a dict mapping taxon_name → stats dict (with keys: n, median, mean,
-    stdev, q1, q3, min, max, values).  The focus_group key holds intra-group
-    statistics.  Returns ``None`` if *focus_group* is absent.
+def _grouped_stats(vals, counts) -> list[dict]:
     """
-    groups = rank_result["groups"]
-    if focus_group not in groups:
-        return None
-
-    result: dict[str, dict] = {}
+    Summary statistics for consecutive segments of the array *vals*.
+
+    Segment k holds the next ``counts[k]`` values.  Each segment's values
+    are sorted in one ``lexsort``; sums and squared deviations are
+    ``np.add.reduceat`` reductions over the non-empty segments, and the
+    median and quartiles are read from the sorted segments by index.  Every
+    dict has the keys n, median, mean, stdev, q1, q3, min, max and values
+    (sorted); quartiles are the medians of the lower and upper halves, and
+    empty segments get NaNs.
+    """
+    import numpy as np
 
-    # Intra-group: raw pairwise similarities for the focus group
-    intra_sims = [s for s, *_ in groups[focus_group]["intra_pairs"]]
-    result[focus_group] = _focus_dist_stats(intra_sims)
+    counts = np.asarray(counts, dtype=np.int64)
+    vals   = np.asarray(vals, dtype=np.float64)
+    seg    = np.repeat(np.arange(len(counts)), counts)
+    sv     = vals[np.lexsort((vals, seg))]
+    starts = np.zeros(len(counts), dtype=np.int64)
+    np.cumsum(counts[:-1], out=starts[1:])
+
+    nz   = np.flatnonzero(counts)
+    lo   = starts[nz]
+    n    = counts[nz]
+    half = n // 2
+
+    def _median(first, size):
+        return (sv[first + (size - 1) // 2] + sv[first + size // 2]) / 2
+
+    if len(nz):
+        mean  = np.add.reduceat(sv, lo) / n
+        ss    = np.add.reduceat((sv - np.repeat(mean, n)) ** 2, lo)
+        stdev = np.sqrt(ss / np.maximum(n - 1, 1))
+        med   = _median(lo, n)
+        qn    = np.maximum(half, 1)   # singletons: quartile = the value
+        q1    = _median(lo, qn)
+        q3    = _median(lo + n - qn, qn)
 
-    # Inter-group: collect all pairwise sims for focus_group ↔ each other
-    inter_pairs = rank_result["inter_pairs"]
-    pair_sims: dict[str, list[float]] = {}
-    for sim, ta, tb, _id1, _id2 in inter_pairs:
-        if ta == focus_group:
-            pair_sims.setdefault(tb, []).append(sim)
-        elif tb == focus_group:
-            pair_sims.setdefault(ta, []).append(sim)
+    nan = float("nan")
+    out = [{"n": 0, "median": nan, "mean": nan, "stdev": nan,
+            "q1": nan, "q3": nan, "min": nan, "max": nan, "values": []}
+           for _ in counts]
+    for k, (g, first, size) in enumerate(zip(nz.tolist(), lo.tolist(),
+                                             n.tolist())):
+        out[g] = {
+            "n":      size,
+            "median": float(med[k]),
+            "mean":   float(mean[k]),
+            "stdev":  float(stdev[k]) if size > 1 else 0.0,
+            "q1":     float(q1[k]),
+            "q3":     float(q3[k]),
+            "min":    float(sv[first]),
+            "max":    float(sv[first + size - 1]),
+            "values": sv[first:first + size].tolist(),
+        }
+    return out
 
-    for taxon, sims in pair_sims.items():
-        result[taxon] = _focus_dist_stats(sims)
 
-    return result
+def focus_group_stats(
+    sim_mat,
+    groups: dict[str, list[int]],
+    focus: dict[str, list[str]],
+) -> "dict[str, tuple[dict, dict[str, dict]] | None]":
+    """
+    Similarity statistics of every focus group against every other group.
+
+    *groups* maps taxon → sequence indices (see ``group_by_rank``) and
+    *focus* maps a focus-group name → the taxa it is made of.  The matrix
+    is converted to an array once; for each focus group the within-group
+    pairs (upper triangle of its rows × its columns) and the block of
+    every other taxon's rows are gathered by fancy indexing into one
+    segmented vector and summarised by ``_grouped_stats``.
+
+    Returns ``{focus name: (intra stats, {other taxon: inter stats})}``,
+    with None for focus groups that have no member taxon in *groups*.  The
+    intra-group stats are kept apart because a focus name may also be the
+    name of one of the other taxa.
+    """
+    import numpy as np
 
+    sim = np.asarray(sim_mat, dtype=np.float64)
+    out: dict[str, "tuple[dict, dict[str, dict]] | None"] = {}
+    for name, taxa in focus.items():
+        members = {t for t in taxa if t in groups}
+        if not members:
+            out[name] = None
+            continue
+        fidx   = np.array(sorted(i for t in members for i in groups[t]))
+        others = sorted(t for t in groups if t not in members)
+        intra  = sim[np.ix_(fidx, fidx)][np.triu_indices(len(fidx), 1)]
+        if others:
+            rows  = np.concatenate([groups[t] for t in others])
+            inter = sim[np.ix_(rows, fidx)].ravel()
+        else:
+            inter = np.empty(0)
+        counts = [intra.size] + [len(groups[t]) * len(fidx) for t in others]
+        stats  = _grouped_stats(np.concatenate([intra, inter]), counts)
+        out[name] = (stats[0], dict(zip(others, stats[1:])))
+    return out
 
-def _build_focus_full(
-    results: list[dict],
-    focus_group: str,
-) -> "tuple[list[str], list[str], list[str], list[list[dict]]]":
-    """Build a taxa × files matrix of distributional stats for *focus_group*.
 
-    Returns ``(row_names, col_names, protein_labels, stats_matrix)`` where
-    *stats_matrix[r][c]* is a stats dict (or None if the taxon is absent).
+def _streamed_focus_stats(
+    rank_result: dict,
+    name: str,
+    taxa: list[str],
+) -> "tuple[dict | None, dict[str, dict]] | None":
     """
-    all_taxa: set[str] = set()
-    per_file: list[tuple[str, str, dict[str, dict]]] = []
-    for summary in results:
-        report = summary.get("_report")
-        if report is None or report.get("rank_result") is None:
-            continue
-        dists = _extract_focus_distributions(report["rank_result"], focus_group)
-        if dists is None:
-            continue
-        stem   = pathlib.Path(summary["file"]).stem
-        plabel = summary.get("protein_label", stem)
-        per_file.append((stem, plabel, dists))
-        all_taxa.update(dists.keys())
+    Focus statistics from a streamed ``rank_conservation`` result, in the
+    layout of ``focus_group_stats``.
 
-    if not per_file or not all_taxa:
-        return [], [], [], []
+    A memory-mapped run keeps only pair counts and medians per group pair,
+    so only single-taxon focus groups are available and the cells carry
+    n and median alone.
+    """
+    if len(taxa) != 1:
+        return None
+    medians = _extract_focus_medians(rank_result, taxa[0])
+    if medians is None:
+        return None
+    nan   = float("nan")
+    n_of  = {taxa[0]: intra_pair_count(rank_result["groups"][taxa[0]])}
+    for (ta, tb), (n, _med) in inter_pair_stats(rank_result).items():
+        if taxa[0] in (ta, tb):
+            n_of[tb if ta == taxa[0] else ta] = n
+    cells = {
+        taxon: {
+            "n": n_of.get(taxon, 0), "median": med, "mean": nan,
+            "stdev": nan, "q1": nan, "q3": nan, "min": nan, "max": nan,
+            "values": [],
+        }
+        for taxon, med in medians.items()
+    }
+    return cells.pop(taxa[0], None), cells
 
-    others = sorted(all_taxa - {focus_group})
-    row_names = ([focus_group] if focus_group in all_taxa else []) + others
-    col_names      = [s for s, _p, _d in per_file]
-    protein_labels = [p for _s, p, _d in per_file]
 
-    stats_matrix: list[list] = []
-    for taxon in row_names:
-        row = []
-        for _stem, _plabel, dists in per_file:
-            row.append(dists.get(taxon))
-        stats_matrix.append(row)
+def read_focus_file(path: str) -> dict[str, list[str]]:
+    """
+    Read a --focus-file: one focus group per line, ``name<TAB>taxa``.
 
-    return row_names, col_names, protein_labels, stats_matrix
+    *taxa* are taxon names at --rank, separated by tabs or commas; a line
+    with only a name stands for the taxon of that name.  Repeated names
+    add to the same group; blank lines and ``#`` comments are skipped.
+    """
+    focus: dict[str, list[str]] = {}
+    with open(path) as fh:
+        for line in fh:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            name, *rest = [f.strip() for f in line.split("\t")]
+            taxa = [t.strip() for f in rest for t in f.split(",") if t.strip()]
+            members = focus.setdefault(name, [])
+            for t in taxa or [name]:
+                if t not in members:
+                    members.append(t)
+    return focus
 
 
-def _build_focus_matrix(
+def _build_focus_tables(
     results: list[dict],
-    focus_group: str,
-) -> "tuple[list[str], list[str], list[str], list[list[float]]]":
-    """Build a taxa × files matrix of median similarity to *focus_group*.
-
-    Returns ``(row_names, col_names, protein_labels, matrix)`` where
-    *row_names* are the taxonomic group names (sorted, focus_group first),
-    *col_names* are file stems, *protein_labels* are the inferred
-    consensus protein names for each file (parallel to *col_names*), and
-    *matrix[r][c]* is the median similarity (or NaN if that taxon is
-    absent in the file).
+    focus: dict[str, list[str]],
+) -> "dict[str, tuple[list[str], list[str], list[str], list[list[float]], list[list]]]":
+    """Build the taxa × files tables for every focus group in one pass.
+
+    Each file's similarity matrix is visited once for all focus groups
+    (see ``focus_group_stats``).  Returns ``{focus name: (row_names,
+    col_names, protein_labels, matrix, stats_matrix)}`` where *row_names*
+    are the focus group (row 0 is always its intra-group row, even when a
+    taxon of the same name follows) and then the other taxa
+    alphabetically, *col_names* are the stems of the files containing the
+    group, *matrix[r][c]* is the median similarity (NaN if absent) and
+    *stats_matrix[r][c]* the full stats dict (None if absent).  Focus
+    groups found in no file are left out.
     """
     nan = float("nan")
-
-    # Collect per-file medians and union of taxon names
-    all_taxa: set[str] = set()
-    per_file: list[tuple[str, str, dict[str, float]]] = []
+    per_file: list[tuple[str, str, dict]] = []
     for summary in results:
         report = summary.get("_report")
         if report is None or report.get("rank_result") is None:
             continue
-        medians = _extract_focus_medians(report["rank_result"], focus_group)
-        if medians is None:
+        rank_result = report["rank_result"]
+        if report.get("sim_mat") is not None:
+            groups = group_by_rank(report["ids"], report["tax_map"],
+                                   rank_result["rank"])
+            stats = focus_group_stats(report["sim_mat"], groups, focus)
+        else:
+            stats = {name: _streamed_focus_stats(rank_result, name, taxa)
+                     for name, taxa in focus.items()}
+        stem = input_stem(summary["file"])
+        per_file.append((stem, summary.get("protein_label", stem), stats))
+
+    tables = {}
+    for name in focus:
+        files = [(stem, plabel, st[name]) for stem, plabel, st in per_file
+                 if st.get(name) is not None]
+        if not files:
             continue
-        stem  = pathlib.Path(summary["file"]).stem
-        plabel = summary.get("protein_label", stem)
-        per_file.append((stem, plabel, medians))
-        all_taxa.update(medians.keys())
-
-    if not per_file or not all_taxa:
-        return [], [], [], []
-
-    # Row order: focus_group first (intra), then others alphabetically
-    others = sorted(all_taxa - {focus_group})
-    row_names = ([focus_group] if focus_group in all_taxa else []) + others
-    col_names      = [stem   for stem, _pl, _m in per_file]
-    protein_labels = [plabel for _s, plabel, _m in per_file]
-
-    matrix: list[list[float]] = []
-    for taxon in row_names:
-        row: list[float] = []
-        for _stem, _plabel, medians in per_file:
-            row.append(medians.get(taxon, nan))
-        matrix.append(row)
-
-    return row_names, col_names, protein_labels, matrix
+        others = sorted(set().union(*(inter.keys()
+                                      for _s, _p, (_i, inter) in files)))
+        row_names = [name] + others
+        stats_matrix = ([[intra for _s, _p, (intra, _o) in files]]
+                        + [[inter.get(taxon) for _s, _p, (_i, inter) in files]
+                           for taxon in others])
+        matrix = [[st["median"] if st is not None else nan for st in row]
+                  for row in stats_matrix]
+        tables[name] = (row_names, [s for s, _p, _c in files],
+                        [p for _s, p, _c in files], matrix, stats_matrix)
+    return tables
 
 
 def _write_focus_tsv(
@@ -3183,7 +6742,7 @@ def _write_focus_tsv(
 ) -> None:
     """Write the focus-group cross-file matrix as a TSV table."""
     path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", newline="") as fh:
+    with _atomic_path(path) as tmp, open(tmp, "w", newline="") as fh:
         fh.write(f"# Focus group: {focus_group}  (rank: {rank})\n")
         fh.write(f"# Rows: taxonomic groups; first row is intra-group "
                  f"median for {focus_group}\n")
@@ -3267,12 +6826,12 @@ def _plot_focus_heatmap(
                         fontsize=fs, color="#888888")
                 continue
             txt_col = "white" if val < 0.22 or val > 0.82 else "black"
-            bold = (row_names[i] == focus_group)
+            bold = (i == 0)
             fw = "bold" if bold else "normal"
             st = None
             if stats_matrix is not None:
                 st = stats_matrix[i][j]
-            if st is not None and st["n"] > 1:
+            if st is not None and st["n"] > 1 and not math.isnan(st["q1"]):
                 # Rich annotation: median on first line, (Q1–Q3) n=N below
                 ax.text(j, i - 0.15, f"{st['median']:.3f}",
                         ha="center", va="center", fontsize=fs,
@@ -3289,11 +6848,10 @@ def _plot_focus_heatmap(
                         ha="center", va="center", fontsize=fs,
                         color=txt_col, fontweight=fw)
 
-    # Highlight the focus_group row (intra)
-    if focus_group in row_names:
-        fg_idx = row_names.index(focus_group)
+    # Highlight the focus_group row (intra, always the first)
+    if nrows:
         rect = plt.Rectangle(
-            (-0.5, fg_idx - 0.5), ncols, 1,
+            (-0.5, -0.5), ncols, 1,
             linewidth=2.2, edgecolor="black", facecolor="none",
         )
         ax.add_patch(rect)
@@ -3336,7 +6894,8 @@ def _plot_focus_heatmap(
 
     plt.tight_layout()
     try:
-        plt.savefig(str(path), dpi=150, bbox_inches="tight")
+        with _atomic_path(path) as tmp:
+            plt.savefig(str(tmp), dpi=150, bbox_inches="tight")
     except ValueError as exc:
         print(f"  Error saving focus heatmap: {exc}", file=sys.stderr)
         plt.close(fig)
@@ -3359,8 +6918,11 @@ def _write_focus_detailed_tsv(
     For each (group, file) cell the TSV includes: median, mean, stdev,
     Q1, Q3, min, max, and the number of pairwise comparisons.
     """
+    def _f(v: float) -> str:
+        return "" if math.isnan(v) else f"{v:.6f}"
+
     path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", newline="") as fh:
+    with _atomic_path(path) as tmp, open(tmp, "w", newline="") as fh:
         fh.write(f"# Focus group: {focus_group}  (rank: {rank})\n")
         fh.write("# Detailed distributional statistics per group per file\n")
         writer = csv.writer(fh, delimiter="\t")
@@ -3375,8 +6937,6 @@ def _write_focus_detailed_tsv(
                     writer.writerow([taxon, stem, plabel, 0,
                                      "", "", "", "", "", "", ""])
                 else:
-                    def _f(v: float) -> str:
-                        return "" if math.isnan(v) else f"{v:.6f}"
                     writer.writerow([
                         taxon, stem, plabel, st["n"],
                         _f(st["median"]), _f(st["mean"]), _f(st["stdev"]),
@@ -3440,7 +7000,7 @@ def _plot_focus_violin(
             st = stats_matrix[i][j]
             vals = st["values"] if st is not None else []
             data.append(vals if vals else [float("nan")])
-            colors.append(clr_focus if row_names[i] == focus_group else clr_inter)
+            colors.append(clr_focus if i == 0 else clr_inter)
             labels.append(row_names[i])
 
         positions = list(range(nrows))
@@ -3537,7 +7097,8 @@ def _plot_focus_violin(
     )
     plt.tight_layout()
     try:
-        plt.savefig(str(path), dpi=150, bbox_inches="tight")
+        with _atomic_path(path) as tmp:
+            plt.savefig(str(tmp), dpi=150, bbox_inches="tight")
     except ValueError as exc:
         print(f"  Error saving focus violin plot: {exc}", file=sys.stderr)
         plt.close(fig)
@@ -3599,9 +7160,11 @@ def _analyse_fasta(
     phyloxml_path:    "pathlib.Path | None",
     newick_path:      "pathlib.Path | None",
     violin_path:      "pathlib.Path | None",
+    qc_path:          "pathlib.Path | None",
     cache:            "TaxCache | None",
     logger:           "logging.Logger | None" = None,
     timer:            "PhaseTimer | None" = None,
+    pair_store:       "PairScoreStore | None" = None,
 ) -> dict:
     """
     Run the full conservation analysis for one FASTA file.
@@ -3628,11 +7191,32 @@ def _analyse_fasta(
             timer.start("parse")
         print(f"Reading: {fasta_path}")
         _log.info("Parsing %s", fasta_path)
-        records = parse_alignment(str(fasta_path))
+        hints   = LabelHints()
+        fai_entries: "list[FaiEntry] | None" = (
+            [] if getattr(args, "fasta_index", False) else None)
+        if fai_entries is not None and _compression(str(fasta_path)):
+            print(f"  Skipped: no .fai index for compressed input {fasta_path}",
+                  file=sys.stderr)
+            fai_entries = None
+        records = parse_alignment(str(fasta_path), hints=hints,
+                                  index=fai_entries)
         if not records:
             summary["error"] = "no sequences found"
             return summary
         summary["n_seqs"] = len(records)
+        if fai_entries is not None:
+            fai_path = FastaIndex.fai_path(str(fasta_path))
+            if not fai_entries:
+                print(f"  Skipped: {fasta_path} cannot be indexed (the .fai "
+                      f"index needs FASTA with fixed-width sequence lines)",
+                      file=sys.stderr)
+            else:
+                try:
+                    _guard(fai_path, args.overwrite)
+                    FastaIndex(str(fasta_path), fai_entries).write(fai_path)
+                    summary["outputs"].append(str(fai_path))
+                except FileExistsError as exc:
+                    print(f"  Skipped: {exc}", file=sys.stderr)
 
         # ── taxonomy (optional) ───────────────────────────────────────────
         if timer:
@@ -3642,7 +7226,8 @@ def _analyse_fasta(
         if args.rank:
             print(f"\nFetching taxonomy for {len(records)} sequence(s)…")
             tax_map, db_protein_names = fetch_all_taxonomies(
-                records, api_key=args.ncbi_api_key, cache=cache
+                records, api_key=args.ncbi_api_key, cache=cache,
+                batch_size=getattr(args, "tax_batch_size", _TAX_BATCH_SIZE),
             )
             before  = len(records)
             records = [r for r in records if r[0] in tax_map]
@@ -3657,8 +7242,25 @@ def _analyse_fasta(
         print_sequence_table(records)
 
         # ── pre-flight QC ─────────────────────────────────────────────────
-        qc = preflight_qc(records)
+        qc = preflight_qc(records, engine=getattr(args, "engine", "auto"))
         print_preflight_qc(qc)
+        summary["qc"] = {"n_outliers": len(qc["outliers"]),
+                         "gap_fraction": qc["gap_fraction"],
+                         "ambiguous_fraction": qc["ambiguous_fraction"]}
+        if qc_path is not None:
+            try:
+                _guard(qc_path, args.overwrite)
+                write_qc_tsv(qc_path, qc)
+                summary["outputs"].append(str(qc_path))
+            except FileExistsError as exc:
+                print(f"  Skipped: {exc}", file=sys.stderr)
+            qc_json = qc_path.with_suffix(".json")
+            try:
+                _guard(qc_json, args.overwrite)
+                write_qc_json(qc_json, qc, str(fasta_path))
+                summary["outputs"].append(str(qc_json))
+            except FileExistsError as exc:
+                print(f"  Skipped: {exc}", file=sys.stderr)
         _log.info("QC: %d seqs, lengths %d–%d, %.1f%% gaps",
                   qc["n_sequences"], qc["length_min"], qc["length_max"],
                   qc["gap_fraction"] * 100)
@@ -3741,7 +7343,8 @@ def _analyse_fasta(
         except ValueError as exc:
             summary["error"] = str(exc)
             return summary
-        mat_min = _matrix_min(score_matrix) if score_matrix else 0
+        compiled = compile_matrix(score_matrix)
+        mat_min  = compiled.min if compiled is not None else 0
 
         # ── pairwise similarity ───────────────────────────────────────────
         if timer:
@@ -3749,13 +7352,66 @@ def _analyse_fasta(
         label = scoring.upper() if scoring != "hamming" else "Hamming"
         print(f"\nScoring: {label}")
         print("Computing pairwise similarities…")
-        sim_mat, off_mat = pairwise_matrix(seqs, score_matrix, mat_min)
+        engine = getattr(args, "engine", "auto")
+        scratch = None
+        memmap_threshold = getattr(args, "memmap_threshold", _MEMMAP_THRESHOLD)
+        if memmap_threshold and len(seqs) > memmap_threshold:
+            if _use_numpy(engine):
+                scratch = getattr(args, "scratch_dir", None) or tempfile.gettempdir()
+                print(f"  {len(seqs)} sequences > --memmap-threshold "
+                      f"{memmap_threshold}: using a memory-mapped float32 "
+                      f"matrix in {scratch}")
+            else:
+                print(f"  Warning: {len(seqs)} sequences exceed "
+                      f"--memmap-threshold {memmap_threshold} but NumPy is "
+                      f"not available; keeping the matrix in memory.",
+                      file=sys.stderr)
+        store = pair_store if scratch is None else None
+        if pair_store is not None and store is None:
+            print("  Note: the pair-score cache is not used for a "
+                  "memory-mapped matrix.", file=sys.stderr)
+        if store is not None:
+            hits0, misses0 = store.hits, store.misses
+        try:
+            sim_mat, off_mat = pairwise_matrix(
+                seqs, compiled, mat_min, engine=engine,
+                jobs=getattr(args, "jobs", 1), scratch_dir=scratch,
+                store=store, context=pair_context(scoring, is_aligned, mat_min),
+            )
+        except ValueError as exc:
+            summary["error"] = str(exc)
+            return summary
+        out_of_core = _is_array(sim_mat)
+        if timer:
+            timer.count("pairs", len(seqs) * (len(seqs) - 1) // 2)
+        pair_cache_stats = None
+        if store is not None:
+            pair_cache_stats = {"hits":   store.hits - hits0,
+                                "misses": store.misses - misses0}
+            if timer:
+                timer.count("pairs_cached", pair_cache_stats["hits"])
+            summary["pair_cache"] = pair_cache_stats
+            print(f"  Pair-score cache: {pair_cache_stats['hits']:,} pair(s) "
+                  f"reused, {pair_cache_stats['misses']:,} scored")
         _log.info("Pairwise similarity matrix computed (%d×%d)", len(ids), len(ids))
         print_pairwise_summary(display_ids, seqs, sim_mat, off_mat)
 
         # ── near-duplicate detection ──────────────────────────────────────
         dup_threshold = getattr(args, "dup_threshold", 0.98)
-        near_dupes = detect_near_duplicates(ids, sim_mat, dup_threshold)
+        if not getattr(args, "dedupe_minhash", False):
+            near_dupes = detect_near_duplicates(ids, sim_mat, dup_threshold)
+        else:
+            try:
+                near_dupes = detect_near_duplicates(
+                    ids, sim_mat, dup_threshold, seqs=seqs,
+                    k=getattr(args, "minhash_k", _MINHASH_K),
+                    n_hashes=getattr(args, "minhash_hashes", _MINHASH_HASHES),
+                    bands=getattr(args, "minhash_bands", _MINHASH_BANDS),
+                    engine=engine,
+                )
+            except ValueError as exc:
+                summary["error"] = str(exc)
+                return summary
         if near_dupes:
             print(f"\n  ⚠ Near-duplicate warning: {len(near_dupes)} pair(s) "
                   f"with similarity ≥ {dup_threshold:.2f}")
@@ -3766,11 +7422,7 @@ def _analyse_fasta(
             _log.warning("%d near-duplicate pair(s) at threshold %.2f",
                          len(near_dupes), dup_threshold)
 
-        all_pairs = [
-            sim_mat[i][j]
-            for i, j in combinations(range(len(ids)), 2)
-        ]
-        summary["sim_median"] = statistics.median(all_pairs) if all_pairs else None
+        summary["sim_median"] = matrix_median(sim_mat)
 
         if args.matrix:
             print_pairwise_matrix(
@@ -3800,7 +7452,8 @@ def _analyse_fasta(
                 f"reference (length {lengths[ref_idx]} aa)…"
             )
             offsets = best_offsets_vs_reference(seqs, ref_idx,
-                                                   score_matrix, mat_min)
+                                                   compiled, mat_min,
+                                                   engine=engine)
             for i, (seq_id, off) in enumerate(zip(display_ids, offsets)):
                 if i != ref_idx:
                     print(f"  {seq_id}: placed at offset {off}"
@@ -3809,16 +7462,16 @@ def _analyse_fasta(
 
         seq_weights: "list[float] | None" = None
         if getattr(args, "weights", False):
-            seq_weights = henikoff_weights(aligned_seqs)
+            seq_weights = henikoff_weights(aligned_seqs, engine=engine)
             print(f"\nHenikoff sequence weights: "
                   f"{', '.join(f'{w:.3f}' for w in seq_weights)}")
 
-        scores = per_position_conservation(aligned_seqs, score_matrix, mat_min,
-                                           weights=seq_weights)
+        scores = per_position_conservation(aligned_seqs, compiled, mat_min,
+                                           weights=seq_weights, engine=engine)
         print_position_summary(scores, aligned_seqs, args.top)
 
         # ── Shannon entropy / information content ─────────────────────────
-        entropy = per_position_entropy(aligned_seqs)
+        entropy = per_position_entropy(aligned_seqs, engine=engine)
         mean_h  = sum(h for h, _ in entropy) / len(entropy) if entropy else 0.0
         mean_ic = sum(ic for _, ic in entropy) / len(entropy) if entropy else 0.0
         print(f"\n  Shannon entropy:         mean {mean_h:.3f} bits/position")
@@ -3835,6 +7488,12 @@ def _analyse_fasta(
             except FileExistsError as exc:
                 print(f"  Skipped: {exc}", file=sys.stderr)
 
+        # Figures are collected as jobs and drawn together further down;
+        # the report reuses their PNGs instead of drawing them again.
+        fig_jobs: list[FigureJob] = []
+        want_report = (bool(getattr(args, "report", None))
+                       and not getattr(args, "no_plots", False))
+
         # ── rank-based taxonomy conservation ──────────────────────────────
         if timer:
             timer.start("rank_analysis")
@@ -3842,30 +7501,40 @@ def _analyse_fasta(
         perm_result: "dict | None" = None
         if args.rank:
             n_boot = getattr(args, "bootstrap", 0)
+            seed   = getattr(args, "seed", None)
             rank_result = rank_conservation(
                 ids, seqs, sim_mat, tax_map, args.rank,
-                n_bootstrap=n_boot,
+                n_bootstrap=n_boot, seed=seed, engine=engine,
             )
             n_perm = getattr(args, "permutations", 0)
             if n_perm > 0:
                 print(f"\nRunning permutation test ({n_perm} permutations)…")
                 perm_result = permutation_test_rank(
                     ids, sim_mat, tax_map, args.rank,
-                    n_permutations=n_perm,
+                    n_permutations=n_perm, seed=seed, engine=engine,
                 )
+                if timer:
+                    timer.count("permutations", n_perm)
             print_rank_conservation(rank_result, ids, tax_map, perm_result,
                                         display_ids=display_ids)
 
             summary["intra_median"] = rank_result["intra_median"]
             summary["inter_median"] = rank_result["inter_median"]
 
+            fig_rank = (_figure_rank_result(rank_result)
+                        if heatmap_path or violin_path or want_report else None)
+            heatmap_file = None
             if heatmap_path is not None:
                 try:
                     _guard(heatmap_path, args.overwrite)
-                    plot_rank_heatmap(rank_result, str(heatmap_path))
-                    summary["outputs"].append(str(heatmap_path))
+                    heatmap_file = str(heatmap_path)
+                    summary["outputs"].append(heatmap_file)
                 except FileExistsError as exc:
                     print(f"  Skipped: {exc}", file=sys.stderr)
+            if heatmap_file or want_report:
+                fig_jobs.append(FigureJob(
+                    "heatmap", "plot_rank_heatmap", (fig_rank,),
+                    {"path": heatmap_file, "png": want_report}))
 
             missing = [
                 acc for acc in ids
@@ -3883,13 +7552,17 @@ def _analyse_fasta(
                 print(f"  Available ranks in this dataset: {', '.join(avail)}")
 
             # ── violin plot ────────────────────────────────────────────
+            violin_file = None
             if violin_path is not None:
                 try:
                     _guard(violin_path, args.overwrite)
-                    plot_violin(rank_result, str(violin_path))
-                    summary["outputs"].append(str(violin_path))
+                    violin_file = str(violin_path)
+                    summary["outputs"].append(violin_file)
                 except FileExistsError as exc:
                     print(f"  Skipped: {exc}", file=sys.stderr)
+            if violin_file or want_report:
+                fig_jobs.append(FigureJob("violin", "plot_violin",
+                                          (fig_rank, violin_file)))
 
             if out_rank_tsv is not None and rank_result["groups"]:
                 try:
@@ -3927,26 +7600,52 @@ def _analyse_fasta(
                 f"{len(dend_ids)} {args.rank} groups  ·  "
                 f"between-group median similarity"
             )
+        elif out_of_core:
+            # A sequence-level linkage needs the full condensed matrix in
+            # RAM, which is exactly what the memory-mapped mode avoids.
+            dend_ids = dend_sim = dend_title = None
+            if dendrogram_path or phyloxml_path or newick_path:
+                print("  Note: sequence-level trees are not built for a "
+                      "memory-mapped matrix; use --rank for a group-level "
+                      "tree.", file=sys.stderr)
+            dendrogram_path = phyloxml_path = newick_path = None
         else:
             dend_ids, dend_sim = display_ids, sim_mat
             dend_title = None   # plot_dendrogram uses its own default
 
+        # Cluster once; every tree output and the HTML report share it
+        clustering: "ClusteringResult | None" = None
+        if dend_sim is not None and (
+                dendrogram_path is not None or phyloxml_path is not None
+                or newick_path is not None
+                or (getattr(args, "report", None)
+                    and not getattr(args, "no_plots", False))):
+            clustering = cluster_similarity(dend_ids, dend_sim, dend_method)
+
+        dendrogram_file = None
         if dendrogram_path is not None:
             dendrogram_path.parent.mkdir(parents=True, exist_ok=True)
             try:
                 _guard(dendrogram_path, args.overwrite)
-                plot_dendrogram(dend_ids, dend_sim, str(dendrogram_path),
-                                method=dend_method, title=dend_title)
-                summary["outputs"].append(str(dendrogram_path))
+                dendrogram_file = str(dendrogram_path)
+                summary["outputs"].append(dendrogram_file)
             except FileExistsError as exc:
                 print(f"  Skipped: {exc}", file=sys.stderr)
+        if dendrogram_file or (want_report and clustering is not None):
+            # The precomputed clustering is all the plot needs, so the
+            # similarity matrix itself is not sent to a figure worker.
+            fig_jobs.append(FigureJob(
+                "dendrogram", "plot_dendrogram",
+                (dend_ids, None, dendrogram_file),
+                {"method": dend_method, "title": dend_title,
+                 "clustering": clustering, "png": want_report}))
 
         if phyloxml_path is not None:
             phyloxml_path.parent.mkdir(parents=True, exist_ok=True)
             try:
                 _guard(phyloxml_path, args.overwrite)
                 export_phyloxml(dend_ids, dend_sim, str(phyloxml_path),
-                                method=dend_method)
+                                method=dend_method, clustering=clustering)
                 summary["outputs"].append(str(phyloxml_path))
             except FileExistsError as exc:
                 print(f"  Skipped: {exc}", file=sys.stderr)
@@ -3956,25 +7655,40 @@ def _analyse_fasta(
             try:
                 _guard(newick_path, args.overwrite)
                 export_newick(dend_ids, dend_sim, str(newick_path),
-                              method=dend_method)
+                              method=dend_method, clustering=clustering)
                 summary["outputs"].append(str(newick_path))
             except FileExistsError as exc:
                 print(f"  Skipped: {exc}", file=sys.stderr)
 
+        # ── figures ───────────────────────────────────────────────────────
+        if want_report and scores:
+            fig_jobs.append(FigureJob(
+                "conservation", "_conservation_plot_b64",
+                (scores, f"Per-Position Conservation \u2013 {fasta_path.name}")))
+        figures: dict = {}
+        if fig_jobs:
+            if timer:
+                timer.start("figures")
+                timer.count("figures", len(fig_jobs))
+            figures = render_figures(fig_jobs, workers=getattr(args, "jobs", 1))
+
         # ── timing ─────────────────────────────────────────────────────────
         if timer:
             timer.start("output")
 
         # ── collect data for HTML/PDF report ──────────────────────────────
         summary["protein_label"] = _infer_protein_label(
-            str(fasta_path), db_protein_names=db_protein_names or None
+            str(fasta_path), db_protein_names=db_protein_names or None,
+            hints=hints,
         )
         summary["_report"] = {
             "records":             records,
             "ids":                 ids,
             "display_ids":         display_ids,
-            "sim_mat":             sim_mat,
-            "off_mat":             off_mat,
+            "sim_mat":             None if out_of_core else sim_mat,
+            "off_mat":             None if out_of_core else off_mat,
+            "out_of_core":         out_of_core,
+            "pair_cache":          pair_cache_stats,
             "conservation_scores": scores,
             "entropy":             entropy,
             "is_aligned":          is_aligned,
@@ -3986,7 +7700,9 @@ def _analyse_fasta(
             "dendrogram_method":   getattr(args, "dendrogram_method", "average"),
             "dend_ids":            dend_ids,
             "dend_sim":            dend_sim,
+            "clustering":          clustering,
             "dend_title":          dend_title,
+            "figures":             figures,
             "qc":                  qc,
             "near_dupes":          near_dupes,
             "metadata":            metadata,
@@ -3998,6 +7714,7 @@ def _analyse_fasta(
 
     if timer:
         timer.end()
+        summary["timing"] = timer.as_dict()
         _log.info("Timing:\n%s", timer.summary())
 
     return summary
@@ -4122,40 +7839,29 @@ def _conservation_plot_b64(scores: list[float], title: str) -> str | None:
     return base64.b64encode(buf.read()).decode()
 
 
+def _cached_figure(figures: dict, key: str, draw) -> "str | None":
+    """Figure *key* as drawn during the analysis, or ``draw()`` it now."""
+    return figures[key] if key in figures else draw()
+
+
 def _heatmap_b64(rank_result: dict) -> str | None:
     """Render the rank heatmap to an embedded base64 PNG string."""
-    import os, tempfile, base64
-    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f:
-        tmp = f.name
     try:
-        plot_rank_heatmap(rank_result, tmp)
-        with open(tmp, "rb") as f:
-            data = f.read()
-        return base64.b64encode(data).decode() if data else None
+        return plot_rank_heatmap(rank_result, png=True)
     except Exception:
         return None
-    finally:
-        if os.path.exists(tmp):
-            os.unlink(tmp)
 
 
 def _dendrogram_b64(ids: list[str], sim_mat: list[list[float]],
                     method: str = "average",
-                    title: "str | None" = None) -> "str | None":
+                    title: "str | None" = None,
+                    clustering: "ClusteringResult | None" = None) -> "str | None":
     """Render a dendrogram to an embedded base64 PNG string."""
-    import os, tempfile, base64
-    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f:
-        tmp = f.name
     try:
-        plot_dendrogram(ids, sim_mat, tmp, method=method, title=title)
-        with open(tmp, "rb") as f:
-            data = f.read()
-        return base64.b64encode(data).decode() if data else None
+        return plot_dendrogram(ids, sim_mat, None, method=method, title=title,
+                               clustering=clustering, png=True)
     except Exception:
         return None
-    finally:
-        if os.path.exists(tmp):
-            os.unlink(tmp)
 
 
 _REPORT_CSS = """\
@@ -4289,7 +7995,9 @@ def _html_sim_matrix(ids: list[str], sim_mat: list[list[float]],
 
 def _html_rank_section(rank_result: dict, tax_map: dict,
                         ids: list[str], rank: str,
-                        perm_result: "dict | None" = None) -> str:
+                        perm_result: "dict | None" = None,
+                        plots: bool = True,
+                        figures: "dict | None" = None) -> str:
     groups    = rank_result["groups"]
     intra_med = rank_result["intra_median"]
     inter_med = rank_result["inter_median"]
@@ -4320,21 +8028,17 @@ def _html_rank_section(rank_result: dict, tax_map: dict,
         intra_rows.append(
             f'<tr><td><em>{_h(taxon)}</em></td>'
             f'<td>{len(gdata["members"])}</td>'
-            f'<td>{len(gdata["intra_pairs"])}</td>'
+            f'<td>{intra_pair_count(gdata)}</td>'
             f'<td style="background:{bg}"><span class="bold">'
             f'{"n/a" if med is None else f"{med:.4f}"}</span></td></tr>'
         )
 
     # Between-group medians
-    inter_by_pair: dict = defaultdict(list)
-    for sim, ta, tb, *_ in rank_result["inter_pairs"]:
-        inter_by_pair[(ta, tb)].append(sim)
     inter_rows = []
-    for (ta, tb), sims in sorted(inter_by_pair.items()):
-        med = statistics.median(sims)
+    for (ta, tb), (n_pairs, med) in sorted(inter_pair_stats(rank_result).items()):
         inter_rows.append(
             f'<tr><td><em>{_h(ta)}</em></td><td><em>{_h(tb)}</em></td>'
-            f'<td>{len(sims)}</td>'
+            f'<td>{n_pairs}</td>'
             f'<td style="background:{_sim_color(med)}">'
             f'<span class="bold">{med:.4f}</span></td></tr>'
         )
@@ -4368,7 +8072,9 @@ def _html_rank_section(rank_result: dict, tax_map: dict,
         )
 
     heatmap_img = ""
-    hb64 = _heatmap_b64(rank_result)
+    figures = figures or {}
+    hb64 = _cached_figure(figures, "heatmap",
+                          lambda: _heatmap_b64(rank_result)) if plots else None
     if hb64:
         heatmap_img = (
             f'<h3>Similarity Heatmap (by {_h(rank)})</h3>'
@@ -4405,7 +8111,8 @@ def _html_rank_section(rank_result: dict, tax_map: dict,
 
     # Violin plot
     violin_img = ""
-    vb64 = plot_violin(rank_result)
+    vb64 = _cached_figure(figures, "violin",
+                          lambda: plot_violin(rank_result)) if plots else None
     if vb64:
         violin_img = (
             f'<h3>Similarity Distributions (violin plot)</h3>'
@@ -4436,7 +8143,8 @@ def _html_rank_section(rank_result: dict, tax_map: dict,
 
 
 def _html_file_section(summary: dict, file_id: str,
-                        idx: int, rank: str | None) -> str:
+                        idx: int, rank: str | None,
+                        plots: bool = True) -> str:
     name  = _h(summary["file"].name)
     rpt   = summary.get("_report")
     err   = summary.get("error")
@@ -4466,7 +8174,13 @@ def _html_file_section(summary: dict, file_id: str,
     meta_html = (f'<p class="meta">'
                  f'<strong>{len(records)}</strong> sequences &nbsp;·&nbsp; '
                  f'Mode: <strong>{_h(mode_label)}</strong> &nbsp;·&nbsp; '
-                 f'Scoring: <strong>{_h(scoring_label)}</strong></p>')
+                 f'Scoring: <strong>{_h(scoring_label)}</strong>')
+    pair_cache = rpt.get("pair_cache")
+    if pair_cache:
+        meta_html += (f' &nbsp;·&nbsp; Pair-score cache: '
+                      f'<strong>{pair_cache["hits"]:,}</strong> reused, '
+                      f'<strong>{pair_cache["misses"]:,}</strong> scored')
+    meta_html += '</p>'
 
     # ── Reproducibility metadata ──────────────────────────────────────
     file_meta = rpt.get("metadata") or {}
@@ -4501,6 +8215,9 @@ def _html_file_section(summary: dict, file_id: str,
             f'<td>{qc["gap_count"]:,} ({qc["gap_fraction"]:.1%})</td></tr>'
             f'<tr><td style="font-weight:600">Ambiguous (X/B/Z/J)</td>'
             f'<td>{qc["ambiguous_count"]:,} ({qc["ambiguous_fraction"]:.1%})</td></tr>'
+            f'<tr><td style="font-weight:600">Outliers (robust z &gt; '
+            f'{qc.get("outlier_z", _QC_OUTLIER_Z):g})</td>'
+            f'<td>{_h(", ".join(qc.get("outliers", [])) or "none")}</td></tr>'
             '</table>'
         )
 
@@ -4528,9 +8245,10 @@ def _html_file_section(summary: dict, file_id: str,
         )
 
     # ── Conservation plot (or text fallback) ──────────────────────────
-    b64 = _conservation_plot_b64(
+    figures = rpt.get("figures") or {}
+    b64 = _cached_figure(figures, "conservation", lambda: _conservation_plot_b64(
         scores, f"Per-Position Conservation \u2013 {summary['file'].name}"
-    )
+    )) if plots else None
     entropy_data = rpt.get("entropy")
     entropy_note = ""
     if entropy_data:
@@ -4554,7 +8272,8 @@ def _html_file_section(summary: dict, file_id: str,
             '<h3>Per-Position Conservation</h3>'
             f'<p>median={med:.4f} &nbsp; min={min(scores):.4f} &nbsp; '
             f'max={max(scores):.4f} '
-            f'<em>(install matplotlib for the plot)</em></p>'
+            + ('<em>(install matplotlib for the plot)</em>' if plots else '')
+            + '</p>'
             + entropy_note
         )
     else:
@@ -4563,15 +8282,20 @@ def _html_file_section(summary: dict, file_id: str,
     rank_block = ""
     if rank and rank_result:
         perm_result = rpt.get("perm_result")
-        rank_block = _html_rank_section(rank_result, tax_map, ids, rank, perm_result)
+        rank_block = _html_rank_section(rank_result, tax_map, ids, rank,
+                                        perm_result, plots=plots,
+                                        figures=figures)
 
     dend_block = ""
     dend_method = rpt.get("dendrogram_method", "average")
     dend_ids   = rpt.get("dend_ids", ids)
     dend_sim   = rpt.get("dend_sim", sim_mat)
     dend_title = rpt.get("dend_title")
-    db64 = _dendrogram_b64(dend_ids, dend_sim, method=dend_method,
-                           title=dend_title)
+    db64 = None
+    if plots and (dend_sim is not None or rpt.get("clustering") is not None):
+        db64 = _cached_figure(figures, "dendrogram", lambda: _dendrogram_b64(
+            dend_ids, dend_sim, method=dend_method, title=dend_title,
+            clustering=rpt.get("clustering")))
     if db64:
         subtitle = (
             "group-level \u00b7 between-group median similarity"
@@ -4589,7 +8313,11 @@ def _html_file_section(summary: dict, file_id: str,
         f'<div class="file-section">'
         + header + meta_html + meta_block + qc_block + dup_block
         + _html_seq_table(records)
-        + _html_sim_matrix(ids, sim_mat, off_mat, is_aligned)
+        + (_html_sim_matrix(ids, sim_mat, off_mat, is_aligned)
+           if sim_mat is not None else
+           '<h3>Pairwise Similarity Matrix</h3>'
+           '<p class="meta">Omitted: the matrix was memory-mapped '
+           f'({len(ids)}&times;{len(ids)}); use --out-matrix to export it.</p>')
         + cons_block
         + dend_block
         + rank_block
@@ -4625,7 +8353,8 @@ def _render_html_report(results: list[dict], args,
     )
 
     file_sections = "\n".join(
-        _html_file_section(r, f"file-{i}", i, rank)
+        _html_file_section(r, f"file-{i}", i, rank,
+                           plots=not getattr(args, "no_plots", False))
         for i, r in enumerate(results, 1)
     )
 
@@ -4661,7 +8390,8 @@ def _render_html_report(results: list[dict], args,
 </html>"""
 
     _guard(html_path, getattr(args, "overwrite", False))
-    html_path.write_text(html, encoding="utf-8")
+    with _atomic_path(html_path) as tmp:
+        tmp.write_text(html, encoding="utf-8")
     print(f"  HTML report written to: {html_path}")
 
 
@@ -4713,6 +8443,326 @@ def _render_report(results: list[dict], args, report_arg: str) -> None:
             print(f"  PDF generation failed: {exc}", file=sys.stderr)
 
 
+# ---------------------------------------------------------------------------
+# Multi-file processing (serial or --parallel-files process pool)
+# ---------------------------------------------------------------------------
+
+_DEFAULT_RUN_SUMMARY = "prot_ction_run_summary.json"
+
+# Per-process state of a --parallel-files worker, set by _file_worker_init
+_FILE_WORKER: dict = {}
+
+
+def _file_output_paths(args, fasta_path: pathlib.Path,
+                       out_dir: "pathlib.Path | None", multi: bool) -> tuple:
+    """Resolve the per-file output paths, in ``_analyse_fasta`` order."""
+    stem   = input_stem(fasta_path)
+    parent = fasta_path.parent
+    out_matrix = _resolve_out_path(
+        args.out_matrix, stem, "_matrix", ".csv", parent, out_dir, multi
+    )
+    out_cons = _resolve_out_path(
+        args.out_conservation, stem, "_conservation", ".csv",
+        parent, out_dir, multi
+    )
+    rank_suffix = f"_rank_{args.rank}" if args.rank else "_rank"
+    out_rank = _resolve_out_path(
+        args.out_rank_tsv, stem, rank_suffix, ".tsv", parent, out_dir, multi
+    )
+    heatmap = _resolve_heatmap_path(
+        args.heatmap, stem, parent, out_dir, multi
+    )
+    dendrogram_p = _resolve_dendrogram_path(
+        args.dendrogram, stem, parent, out_dir, multi
+    )
+    phyloxml_p = _resolve_out_path(
+        args.out_phyloxml, stem, "_dendrogram", ".xml", parent, out_dir, multi
+    )
+    newick_p = _resolve_out_path(
+        args.out_newick, stem, "_dendrogram", ".nwk", parent, out_dir, multi
+    )
+    violin_p = _resolve_out_path(
+        args.violin, stem, "_violin", ".pdf", parent, out_dir, multi
+    )
+    qc_p = _resolve_out_path(
+        getattr(args, "out_qc", None), stem, "_qc", ".tsv",
+        parent, out_dir, multi
+    )
+    if args.no_plots:
+        heatmap = dendrogram_p = violin_p = None
+    return (out_matrix, out_cons, out_rank, heatmap, dendrogram_p,
+            phyloxml_p, newick_p, violin_p, qc_p)
+
+
+def _run_files_serial(
+    args: argparse.Namespace,
+    input_files: list[pathlib.Path],
+    out_dir: "pathlib.Path | None",
+    cache: "TaxCache | None",
+    pair_store: "PairScoreStore | None",
+    logger: logging.Logger,
+) -> list[dict]:
+    """Analyse *input_files* one after another in this process."""
+    multi = len(input_files) > 1
+    results: list[dict] = []
+    for idx, fasta_path in enumerate(input_files, 1):
+        if multi:
+            _print_file_banner(idx, len(input_files), fasta_path)
+
+        file_timer = PhaseTimer(args.profile_dir, label=input_stem(fasta_path))
+        t0 = time.time()
+        summary = _analyse_fasta(
+            args, fasta_path, *_file_output_paths(args, fasta_path, out_dir, multi),
+            cache, logger=logger, timer=file_timer, pair_store=pair_store,
+        )
+        summary["elapsed"] = time.time() - t0
+        results.append(summary)
+
+        # Print timing summary when verbose or logging to file
+        if getattr(args, "verbose", False) or getattr(args, "log_file", None):
+            print(f"\nTiming:\n{file_timer.summary()}")
+
+        if summary["error"] and not multi:
+            sys.exit(f"Error: {summary['error']}")
+    return results
+
+
+def _print_file_banner(idx: int, total: int, fasta_path: pathlib.Path) -> None:
+    bar = "\u2501" * 70
+    print(f"\n{bar}")
+    print(f"[{idx}/{total}]  {fasta_path}")
+    print(bar)
+
+
+class _FileTagFilter(logging.Filter):
+    """Prefix log records with the name of the file being analysed."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.tag = ""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.tag:
+            record.msg  = f"[{self.tag}] {record.getMessage()}"
+            record.args = None
+        return True
+
+
+def _file_worker_init(args: argparse.Namespace, log_queue) -> None:
+    """
+    Set up a --parallel-files worker: log records go to the parent through
+    *log_queue*, and the taxonomy / pair-score caches are opened once per
+    process on the shared SQLite files.
+    """
+    import logging.handlers
+    logger = logging.getLogger("prot_ction")
+    for h in list(logger.handlers):
+        logger.removeHandler(h)
+    tag = _FileTagFilter()
+    qh  = logging.handlers.QueueHandler(log_queue)
+    qh.addFilter(tag)
+    logger.addHandler(qh)
+    logger.setLevel(logging.DEBUG if args.verbose else logging.INFO)
+
+    cache = pair_store = None
+    if args.rank and not args.no_cache and args.cache_file:
+        try:
+            cache = open_tax_cache(args.cache_file, "sqlite",
+                                   ttl_days=args.cache_ttl)
+        except (sqlite3.Error, ValueError) as exc:
+            logger.warning("taxonomy cache unavailable in worker %d: %s",
+                           os.getpid(), exc)
+    if args.pair_cache:
+        try:
+            pair_store = PairScoreStore(args.pair_cache)
+        except (sqlite3.Error, ValueError) as exc:
+            logger.warning("pair-score cache unavailable in worker %d: %s",
+                           os.getpid(), exc)
+    _FILE_WORKER.update(args=args, logger=logger, tag=tag,
+                        cache=cache, pair_store=pair_store)
+
+
+def _analyse_file_task(fasta_path: pathlib.Path,
+                       paths: tuple) -> tuple[dict, str, str]:
+    """
+    Analyse one file in a --parallel-files worker.
+
+    Console output is captured and returned as ``(summary, stdout,
+    stderr)`` so the parent prints each file's output as one block.
+    """
+    st   = _FILE_WORKER
+    args = st["args"]
+    st["tag"].tag = fasta_path.name
+    out, err = io.StringIO(), io.StringIO()
+    t0 = time.time()
+    try:
+        with redirect_stdout(out), redirect_stderr(err):
+            file_timer = PhaseTimer(args.profile_dir, label=input_stem(fasta_path))
+            summary = _analyse_fasta(
+                args, fasta_path, *paths, st["cache"],
+                logger=st["logger"], timer=file_timer,
+                pair_store=st["pair_store"],
+            )
+            if args.verbose or args.log_file:
+                print(f"\nTiming:\n{file_timer.summary()}")
+    except Exception as exc:          # noqa: BLE001 – isolate the file
+        st["logger"].exception("Unhandled error")
+        summary = {"file": fasta_path, "n_seqs": 0, "n_kept": 0, "mode": "–",
+                   "sim_median": None, "intra_median": None,
+                   "inter_median": None, "outputs": [], "error": str(exc)}
+    finally:
+        if st["cache"] is not None:
+            st["cache"].save()
+        st["tag"].tag = ""
+    summary["elapsed"] = time.time() - t0
+    return summary, out.getvalue(), err.getvalue()
+
+
+def _failed_summary(fasta_path: pathlib.Path, error: str) -> dict:
+    return {"file": fasta_path, "n_seqs": 0, "n_kept": 0, "mode": "–",
+            "sim_median": None, "intra_median": None, "inter_median": None,
+            "outputs": [], "error": error}
+
+
+def _run_files_parallel(
+    args: argparse.Namespace,
+    input_files: list[pathlib.Path],
+    out_dir: "pathlib.Path | None",
+    logger: logging.Logger,
+) -> list[dict]:
+    """
+    Analyse *input_files* on ``args.parallel_files`` worker processes.
+
+    Each file's console output is printed as one block when it finishes;
+    results come back in input order.  An error inside a file is recorded
+    in its summary like in a serial run.  If a worker process dies
+    (e.g. killed for memory), the files it may have been running are
+    retried one per fresh process, so only the file that actually kills
+    its worker is recorded as failed.
+    """
+    import logging.handlers
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from concurrent.futures.process import BrokenProcessPool
+
+    total    = len(input_files)
+    paths    = {f: _file_output_paths(args, f, out_dir, True)
+                for f in input_files}
+    position = {f: i for i, f in enumerate(input_files, 1)}
+    results: dict[pathlib.Path, dict] = {}
+    done = 0
+
+    log_queue = multiprocessing.Queue()
+    listener  = logging.handlers.QueueListener(
+        log_queue, *logger.handlers, respect_handler_level=True)
+    listener.start()
+
+    def _finish(fasta_path, summary, out_text, err_text) -> None:
+        nonlocal done
+        done += 1
+        results[fasta_path] = summary
+        _print_file_banner(position[fasta_path], total, fasta_path)
+        sys.stdout.write(out_text)
+        sys.stdout.flush()
+        if err_text:
+            sys.stderr.write(err_text)
+        status = "failed" if summary["error"] else "done"
+        print(f"  [{done}/{total} finished] {fasta_path.name} {status} "
+              f"in {summary.get('elapsed', 0.0):.1f}s")
+
+    def _run(batch: list[pathlib.Path], workers: int) -> list[pathlib.Path]:
+        """Run *batch*; return the files lost to a broken pool."""
+        lost: list[pathlib.Path] = []
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_file_worker_init,
+            initargs=(args, log_queue),
+        ) as pool:
+            futures = {pool.submit(_analyse_file_task, f, paths[f]): f
+                       for f in batch}
+            for fut in as_completed(futures):
+                f = futures[fut]
+                try:
+                    _finish(f, *fut.result())
+                except BrokenProcessPool:
+                    lost.append(f)
+        return lost
+
+    try:
+        lost = _run(input_files, args.parallel_files)
+        if lost:
+            logger.warning("A worker process died; retrying %d file(s) one "
+                           "at a time", len(lost))
+        for f in sorted(lost, key=position.get):
+            if _run([f], 1):
+                logger.error("[%s] worker process died", f.name)
+                _finish(f, _failed_summary(
+                    f, "worker process died while analysing this file"), "", "")
+    finally:
+        listener.stop()
+        log_queue.close()
+    return [results[f] for f in input_files]
+
+
+def _write_run_summary(path: pathlib.Path, results: list[dict],
+                       args, started: float) -> None:
+    """Write the run-level JSON summary: one entry per input file."""
+    files = []
+    for r in results:
+        files.append({
+            "file":         str(r["file"]),
+            "status":       "error" if r["error"] else "ok",
+            "error":        r["error"],
+            "n_seqs":       r["n_seqs"],
+            "n_kept":       r["n_kept"],
+            "mode":         r["mode"],
+            "sim_median":   r["sim_median"],
+            "intra_median": r["intra_median"],
+            "inter_median": r["inter_median"],
+            "outputs":      [str(o) for o in r["outputs"]],
+            "elapsed_s":    round(r["elapsed"], 3) if "elapsed" in r else None,
+            "pair_cache":   r.get("pair_cache"),
+            "qc":           r.get("qc"),
+            "timing":       r.get("timing"),
+        })
+    n_failed = sum(1 for r in results if r["error"])
+    payload = {
+        "version":        VERSION,
+        "started":        time.strftime("%Y-%m-%dT%H:%M:%S",
+                                        time.localtime(started)),
+        "elapsed_s":      round(time.time() - started, 3),
+        "parallel_files": getattr(args, "parallel_files", 1),
+        "n_files":        len(results),
+        "n_ok":           len(results) - n_failed,
+        "n_failed":       n_failed,
+        "files":          files,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _atomic_path(path) as tmp, open(tmp, "w") as fh:
+        json.dump(payload, fh, indent=2)
+        fh.write("\n")
+    print(f"  Run summary written to: {path}"
+          + (f"  ({n_failed} file(s) failed)" if n_failed else ""))
+
+
+def _write_timing_json(path: pathlib.Path, payload: dict) -> None:
+    """Write a --timing-json payload atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _atomic_path(path) as tmp, open(tmp, "w") as fh:
+        json.dump(payload, fh, indent=2)
+        fh.write("\n")
+    print(f"  Timing written to: {path}")
+
+
+def _print_benchmark(result: dict) -> None:
+    print(f"\nBest of {result['params']['repeat']} "
+          f"(engine {result['engine']}, jobs {result['jobs']}):")
+    print(f"  {'Phase':<25} {'Time':>8}")
+    print(f"  {'-' * 25} {'-' * 8}")
+    for name, wall in result["best_wall_s"].items():
+        print(f"  {name:<25} {wall:>7.3f}s")
+
+
 # ---------------------------------------------------------------------------
 # Entry point
 # ---------------------------------------------------------------------------
@@ -4723,12 +8773,34 @@ def main() -> None:
         parser.print_help()
         sys.exit(0)
     args = parser.parse_args()
+    if args.jobs < 1:
+        args.jobs = os.cpu_count() or 1
 
     # ── handle --example ──────────────────────────────────────────────────
     if getattr(args, "example", False):
         example_path = _write_example_fasta()
         print(f"Using built-in example dataset: {example_path}")
         args.fasta = [example_path]
+    elif getattr(args, "benchmark", False):
+        print(f"Benchmark: {args.bench_n} synthetic sequences, root length "
+              f"{args.bench_length}, identity {args.bench_identity:.2f}")
+        try:
+            result = run_benchmark(
+                args.bench_n, args.bench_length, args.bench_identity,
+                repeat=max(1, args.bench_repeat), engine=args.engine,
+                jobs=args.jobs, profile_dir=args.profile_dir,
+            )
+        except ValueError as exc:
+            sys.exit(f"Error: {exc}")
+        _print_benchmark(result)
+        if args.timing_json:
+            timing_path = pathlib.Path(args.timing_json)
+            try:
+                _guard(timing_path, args.overwrite)
+                _write_timing_json(timing_path, result)
+            except FileExistsError as exc:
+                print(f"  Skipped: {exc}", file=sys.stderr)
+        return
     elif not args.fasta:
         parser.print_help()
         sys.exit(0)
@@ -4739,6 +8811,7 @@ def main() -> None:
         log_file=getattr(args, "log_file", None),
     )
     logger.info("prot_ction v%s started", VERSION)
+    started = time.time()
 
     # ── expand input paths ─────────────────────────────────────────────────
     input_files = expand_input_paths(args.fasta, recursive=args.recursive)
@@ -4748,20 +8821,45 @@ def main() -> None:
     multi = len(input_files) > 1
     if multi:
         print(f"Found {len(input_files)} file(s) to process.")
+    if args.parallel_files < 1:
+        args.parallel_files = os.cpu_count() or 1
+    parallel = multi and args.parallel_files > 1
+    if parallel and args.cache_backend == "json":
+        # Workers share the taxonomy cache through SQLite's locking; the
+        # JSON file would be rewritten by every worker.
+        print("  Note: --parallel-files uses the SQLite taxonomy cache "
+              "(the JSON cache is imported on first use).")
+        args.cache_backend = "sqlite"
 
     # ── clear cache if requested ────────────────────────────────────────────
     if getattr(args, "clear_cache", False) and args.cache_file:
-        cache_path = pathlib.Path(args.cache_file).expanduser()
-        if cache_path.exists():
-            cache_path.unlink()
-            print(f"Cache cleared: {cache_path}")
+        removed = clear_tax_cache(args.cache_file, args.cache_backend)
+        if removed:
+            for path in removed:
+                print(f"Cache cleared: {path}")
         else:
-            print(f"Cache file not found (nothing to clear): {cache_path}")
+            print(f"Cache file not found (nothing to clear): "
+                  f"{cache_path(args.cache_file, args.cache_backend)}")
 
     # ── shared taxonomy cache ──────────────────────────────────────────────
+    # (--parallel-files workers open their own connections instead)
     cache: "TaxCache | None" = None
-    if args.rank and not args.no_cache and args.cache_file:
-        cache = TaxCache(args.cache_file)
+    if args.rank and not args.no_cache and args.cache_file and not parallel:
+        try:
+            cache = open_tax_cache(args.cache_file, args.cache_backend,
+                                   ttl_days=args.cache_ttl)
+        except (sqlite3.Error, ValueError) as exc:
+            print(f"  Warning: taxonomy cache unavailable ({exc}); "
+                  f"continuing without cache.", file=sys.stderr)
+
+    # ── pair-score cache ───────────────────────────────────────────────────
+    pair_store: "PairScoreStore | None" = None
+    if args.pair_cache and not parallel:
+        try:
+            pair_store = PairScoreStore(args.pair_cache)
+        except (sqlite3.Error, ValueError) as exc:
+            print(f"  Warning: pair-score cache unavailable ({exc}); "
+                  f"scoring every pair.", file=sys.stderr)
 
     # ── out-dir ────────────────────────────────────────────────────────────
     out_dir: "pathlib.Path | None" = None
@@ -4770,77 +8868,40 @@ def main() -> None:
         out_dir.mkdir(parents=True, exist_ok=True)
 
     # ── process each file ──────────────────────────────────────────────────
-    results: list[dict] = []
-    for idx, fasta_path in enumerate(input_files, 1):
-        if multi:
-            bar = "\u2501" * 70
-            print(f"\n{bar}")
-            print(f"[{idx}/{len(input_files)}]  {fasta_path}")
-            print(bar)
-
-        stem   = fasta_path.stem
-        parent = fasta_path.parent
-        file_timer = PhaseTimer()
-
-        # Resolve output paths for this file
-        out_matrix = _resolve_out_path(
-            args.out_matrix, stem, "_matrix", ".csv", parent, out_dir, multi
-        )
-        out_cons = _resolve_out_path(
-            args.out_conservation, stem, "_conservation", ".csv",
-            parent, out_dir, multi
-        )
-        rank_suffix = f"_rank_{args.rank}" if args.rank else "_rank"
-        out_rank = _resolve_out_path(
-            args.out_rank_tsv, stem, rank_suffix, ".tsv", parent, out_dir, multi
-        )
-        heatmap = _resolve_heatmap_path(
-            args.heatmap, stem, parent, out_dir, multi
-        )
-        dendrogram_p = _resolve_dendrogram_path(
-            args.dendrogram, stem, parent, out_dir, multi
-        )
-        phyloxml_p = _resolve_out_path(
-            args.out_phyloxml, stem, "_dendrogram", ".xml", parent, out_dir, multi
-        )
-        newick_p = _resolve_out_path(
-            args.out_newick, stem, "_dendrogram", ".nwk", parent, out_dir, multi
-        )
-        violin_p = _resolve_out_path(
-            args.violin, stem, "_violin", ".pdf", parent, out_dir, multi
-        )
-
-        summary = _analyse_fasta(
-            args, fasta_path,
-            out_matrix, out_cons, out_rank, heatmap, dendrogram_p, phyloxml_p,
-            newick_p, violin_p,
-            cache, logger=logger, timer=file_timer,
-        )
-        results.append(summary)
-
-        # Print timing summary when verbose or logging to file
-        if getattr(args, "verbose", False) or getattr(args, "log_file", None):
-            print(f"\nTiming:\n{file_timer.summary()}")
-
-        if summary["error"] and not multi:
-            sys.exit(f"Error: {summary['error']}")
+    if parallel:
+        print(f"Analysing on {args.parallel_files} worker process(es).")
+        results = _run_files_parallel(args, input_files, out_dir, logger)
+    else:
+        results = _run_files_serial(args, input_files, out_dir, cache,
+                                    pair_store, logger)
 
     # ── cross-file summary ─────────────────────────────────────────────────
     if multi:
         _print_multifile_summary(results, args.rank)
 
     # ── focus-group cross-file output ────────────────────────────────────
-    if getattr(args, "focus_group", None) and args.rank and len(results) > 0:
-        fg = args.focus_group  # argparse converts --focus-group → args.focus_group
-        row_names, col_names, plabels, fg_matrix = _build_focus_matrix(results, fg)
-        # Also build the full distributional stats matrix
-        _rn2, _cn2, _pl2, fg_stats = _build_focus_full(results, fg)
-        if not row_names:
-            print(f"\n  Warning: focus group '{fg}' not found in any file at "
-                  f"rank '{args.rank}' – skipped.", file=sys.stderr)
-        else:
-            base = fg.replace(" ", "_")
-            fg_dir = out_dir if out_dir else pathlib.Path(".")
+    focus: dict[str, list[str]] = {}
+    if getattr(args, "focus_group", None):
+        focus[args.focus_group] = [args.focus_group]
+    if getattr(args, "focus_file", None):
+        try:
+            focus.update(read_focus_file(args.focus_file))
+        except OSError as exc:
+            print(f"\n  Warning: cannot read --focus-file: {exc}",
+                  file=sys.stderr)
+    if focus and args.rank and len(results) > 0:
+        tables = _build_focus_tables(results, focus)
+        fg_dir = out_dir if out_dir else pathlib.Path(".")
+        fg_jobs: list[FigureJob] = []
+        for fg in focus:
+            if fg not in tables:
+                hint = (" (groups of several taxa need the in-memory matrix; "
+                        "see --memmap-threshold)" if len(focus[fg]) > 1 else "")
+                print(f"\n  Warning: focus group '{fg}' not found in any file "
+                      f"at rank '{args.rank}'{hint} – skipped.", file=sys.stderr)
+                continue
+            row_names, col_names, plabels, fg_matrix, fg_stats = tables[fg]
+            base = fg.replace(" ", "_").replace("/", "_")
             fg_tsv_path     = fg_dir / f"focus_{base}_{args.rank}.tsv"
             fg_det_path     = fg_dir / f"focus_{base}_{args.rank}_detailed.tsv"
             fg_pdf_path     = fg_dir / f"focus_{base}_{args.rank}_heatmap.pdf"
@@ -4853,38 +8914,76 @@ def main() -> None:
             except FileExistsError as exc:
                 print(f"  Skipped: {exc}", file=sys.stderr)
             # Detailed TSV (full distributional stats)
-            if fg_stats:
-                try:
-                    _guard(fg_det_path, args.overwrite)
-                    _write_focus_detailed_tsv(fg_det_path, fg, args.rank,
-                                              row_names, col_names, plabels,
-                                              fg_stats)
-                except FileExistsError as exc:
-                    print(f"  Skipped: {exc}", file=sys.stderr)
-            # Heatmap (enhanced with IQR when stats available)
+            try:
+                _guard(fg_det_path, args.overwrite)
+                _write_focus_detailed_tsv(fg_det_path, fg, args.rank,
+                                          row_names, col_names, plabels,
+                                          fg_stats)
+            except FileExistsError as exc:
+                print(f"  Skipped: {exc}", file=sys.stderr)
+            if args.no_plots:
+                continue
+            # Heatmap (annotated with IQR) and violin + box plot
             try:
                 _guard(fg_pdf_path, args.overwrite)
-                _plot_focus_heatmap(fg_pdf_path, fg, args.rank,
-                                    row_names, col_names, plabels, fg_matrix,
-                                    stats_matrix=fg_stats if fg_stats else None)
+                fg_jobs.append(FigureJob(
+                    f"focus heatmap {fg}", "_plot_focus_heatmap",
+                    (fg_pdf_path, fg, args.rank, row_names, col_names,
+                     plabels, fg_matrix),
+                    {"stats_matrix": fg_stats}))
             except FileExistsError as exc:
                 print(f"  Skipped: {exc}", file=sys.stderr)
-            # Violin + box plot (distribution view)
-            if fg_stats:
-                try:
-                    _guard(fg_violin_path, args.overwrite)
-                    _plot_focus_violin(fg_violin_path, fg, args.rank,
-                                       row_names, col_names, plabels, fg_stats)
-                except FileExistsError as exc:
-                    print(f"  Skipped: {exc}", file=sys.stderr)
+            try:
+                _guard(fg_violin_path, args.overwrite)
+                fg_jobs.append(FigureJob(
+                    f"focus violin {fg}", "_plot_focus_violin",
+                    (fg_violin_path, fg, args.rank, row_names, col_names,
+                     plabels, fg_stats)))
+            except FileExistsError as exc:
+                print(f"  Skipped: {exc}", file=sys.stderr)
+        render_figures(fg_jobs, workers=args.jobs)
 
     # ── HTML / PDF report ──────────────────────────────────────────────────
     if args.report:
         _render_report(results, args, args.report)
 
+    # ── run-level summary JSON ─────────────────────────────────────────────
+    summary_arg = args.run_summary
+    if summary_arg is None and parallel:
+        summary_arg = _DEFAULT_RUN_SUMMARY
+    if summary_arg:
+        summary_path = pathlib.Path(summary_arg)
+        if out_dir is not None and not summary_path.is_absolute():
+            summary_path = out_dir / summary_path
+        try:
+            _guard(summary_path, args.overwrite)
+            _write_run_summary(summary_path, results, args, started)
+        except FileExistsError as exc:
+            print(f"  Skipped: {exc}", file=sys.stderr)
+
+    # ── per-phase timing JSON ──────────────────────────────────────────────
+    if args.timing_json:
+        timing_path = pathlib.Path(args.timing_json)
+        if out_dir is not None and not timing_path.is_absolute():
+            timing_path = out_dir / timing_path
+        try:
+            _guard(timing_path, args.overwrite)
+            _write_timing_json(timing_path, {
+                "version": VERSION,
+                "files":   [{"file": str(r["file"]), "timing": r.get("timing")}
+                            for r in results],
+            })
+        except FileExistsError as exc:
+            print(f"  Skipped: {exc}", file=sys.stderr)
+
     # Flush cache once after all files
     if cache is not None:
-        cache.save()
+        cache.close()
+    if pair_store is not None:
+        st = pair_store.stats()
+        logger.info("Pair-score cache %s: %d hit(s), %d miss(es), %d stored",
+                    pair_store.path, st["hits"], st["misses"], st["stored"])
+        pair_store.close()
 
     logger.info("prot_ction finished")
 